@@ -1,12 +1,25 @@
 import discord
 from discord.ext import commands, tasks
 import json
-import random
 import os
 import datetime
 import asyncio
+import atexit
+import contextlib
+import copy
+import functools
+import gzip
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import re
+import shlex
+import shutil
+import sqlite3
+import sys
+import tempfile
 import time
+import zipfile
 import aiohttp
 import platform
 import socket
@@ -21,128 +34,929 @@ try:
 except ImportError:
     requests = None
 
+# ===== JSON DOCUMENT CACHE =====
+
+# Seconds a cached document is trusted before its file is stat()ed again
+DOCUMENT_CACHE_CHECK_INTERVAL = float(os.getenv("DOCUMENT_CACHE_CHECK_INTERVAL", "2.0"))
+# Write-behind: seconds between flushes of dirty ticket documents (0 writes every change immediately)
+STORAGE_FLUSH_INTERVAL = float(os.getenv("STORAGE_FLUSH_INTERVAL", "1.0"))
+# Pending changes to one document that force a flush before the interval elapses
+STORAGE_FLUSH_THRESHOLD = int(os.getenv("STORAGE_FLUSH_THRESHOLD", "50"))
+
+class JsonDocumentCache:
+    """Process-wide cache of parsed JSON files keyed by path.
+
+    Entries are revalidated against the file's mtime/size at most once per
+    check_interval, so out-of-band edits are picked up without re-reading
+    the file on every lookup. Missing and unparsable files are cached as None.
+    Deferred stores stay dirty in memory until flush() and are never
+    revalidated against the file meanwhile. All methods are thread-safe; hold
+    lock for compound read-modify-write.
+    """
+
+    def __init__(self, check_interval=DOCUMENT_CACHE_CHECK_INTERVAL, flush_threshold=STORAGE_FLUSH_THRESHOLD):
+        self.check_interval = check_interval
+        self.flush_threshold = flush_threshold
+        self.entries = {}
+        self.dirty = {}  # path -> number of changes not yet written
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def file_version(path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @staticmethod
+    def write_file(path, data):
+        """Atomically replace path with data (temp file + fsync + rename)"""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        if hasattr(os, "O_DIRECTORY"):
+            # Persist the rename itself
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def load(self, path):
+        """Return the parsed document at path, or None if missing/invalid.
+
+        The returned object is shared with the cache; persist changes with store().
+        """
+        with self.lock:
+            now = time.monotonic()
+            entry = self.entries.get(path)
+            if entry and (path in self.dirty or now - entry["checked_at"] < self.check_interval):
+                return entry["data"]
+
+            version = self.file_version(path)
+            if entry and entry["version"] == version:
+                entry["checked_at"] = now
+                return entry["data"]
+
+            data = None
+            if version is not None:
+                try:
+                    with open(path, "r") as f:
+                        data = json.load(f)
+                except json.JSONDecodeError:
+                    data = None
+
+            self.entries[path] = {"data": data, "version": version, "checked_at": now}
+            return data
+
+    def store(self, path, data, keep_derived=False, defer=False):
+        """Update the cached entry and write data to path
+
+        With defer the write is left to flush(), unless the document has
+        collected flush_threshold changes (0 never forces one). Derived values are dropped unless
+        keep_derived is set, in which case the caller is responsible for having
+        updated them to match data.
+        """
+        with self.lock:
+            previous = self.entries.get(path)
+            entry = {"data": data, "version": previous["version"] if previous else None, "checked_at": time.monotonic()}
+            if keep_derived and previous and "derived" in previous:
+                entry["derived"] = previous["derived"]
+            self.entries[path] = entry
+
+            self.dirty[path] = self.dirty.get(path, 0) + 1
+            if not defer or (self.flush_threshold and self.dirty[path] >= self.flush_threshold):
+                self.flush(path)
+
+    def flush(self, path=None):
+        """Write one dirty path, or every dirty path when path is None; returns how many were written"""
+        with self.lock:
+            paths = [path] if path is not None else list(self.dirty)
+            written = 0
+            for dirty_path in paths:
+                if self.dirty.pop(dirty_path, None) is None:
+                    continue
+                entry = self.entries[dirty_path]
+                self.write_file(dirty_path, entry["data"])
+                entry["version"] = self.file_version(dirty_path)
+                entry["checked_at"] = time.monotonic()
+                written += 1
+            return written
+
+    def derived(self, path, name, builder):
+        """Return builder(document) memoized until the document changes"""
+        with self.lock:
+            data = self.load(path)
+            derived = self.entries[path].setdefault("derived", {})
+            if name not in derived:
+                derived[name] = builder(data)
+            return derived[name]
+
+    def invalidate(self, path=None):
+        """Drop one cached path, or everything when path is None (pending writes are flushed first)"""
+        with self.lock:
+            self.flush(path)
+            if path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(path, None)
+
+# ===== STORAGE BACKENDS =====
+
+# "json" (default) keeps one pretty-printed file per guild, "sqlite" one WAL database
+STORAGE_BACKEND = os.getenv("TICKET_STORAGE_BACKEND", "json").lower()
+SQLITE_DATABASE_PATH = os.getenv("TICKET_DATABASE_PATH", "tickets.db")
+
+# Per-guild documents besides tickets, mapped to their value when nothing is stored
+DOCUMENT_DEFAULTS = {
+    "configs": lambda: None,
+    "blacklists": list,
+    "warnings": dict,
+    "tags": dict,
+    "panels": dict,
+}
+
+# Legacy tickets used random 5-digit IDs; sequential IDs start above that range
+LEGACY_TICKET_ID_MAX = 99999
+
+# Closed tickets older than this move out of the live ticket file into tickets_archive/
+TICKET_ARCHIVE_AFTER_DAYS = float(os.getenv("TICKET_ARCHIVE_AFTER_DAYS", "7"))
+
+# Ticket changes are appended to tickets_journal/; after this many events the
+# ticket file is rewritten as a snapshot and the journal emptied (0 disables the journal)
+TICKET_JOURNAL_COMPACT_EVENTS = int(os.getenv("TICKET_JOURNAL_COMPACT_EVENTS", "500"))
+
+def seed_ticket_counters(tickets_data):
+    """Derive the starting ticket sequences from existing tickets"""
+    last_number = max([0] + [int(ticket_info.get("ticket_number", 0)) for ticket_info in tickets_data.values()])
+    last_id = max([LEGACY_TICKET_ID_MAX] + [int(ticket_id) for ticket_id in tickets_data if ticket_id.isdigit()])
+    return {"ticket_number": last_number, "ticket_id": last_id}
+
+def summarize_tickets(tickets):
+    """Count totals, claims and open tickets per priority"""
+    stats = {"total": 0, "open": 0, "closed": 0, "claimed": 0, "priority": {"high": 0, "medium": 0, "low": 0}}
+    for ticket_info in tickets:
+        stats["total"] += 1
+        if ticket_info.get("claimed_by"):
+            stats["claimed"] += 1
+        if ticket_info.get("closed", False):
+            stats["closed"] += 1
+            continue
+        stats["open"] += 1
+        priority = ticket_info.get("priority")
+        if priority in stats["priority"]:
+            stats["priority"][priority] += 1
+    return stats
+
+def merge_ticket_stats(stats, other, sign=1):
+    """Add (or with sign=-1 subtract) one summarize_tickets result into another"""
+    for key in ("total", "open", "closed", "claimed"):
+        stats[key] += sign * other[key]
+    for priority, count in other["priority"].items():
+        stats["priority"][priority] += sign * count
+    return stats
+
+def archive_shard_name(ticket_info):
+    """Monthly archive shard (YYYY-MM) a closed ticket belongs to"""
+    timestamp = ticket_info.get("closed_at") or ticket_info.get("created_at") or ""
+    return timestamp[:7] if len(timestamp) >= 7 else "undated"
+
+class StorageBackend:
+    """Interface implemented by every storage backend.
+
+    Documents are the small per-guild blobs listed in DOCUMENT_DEFAULTS plus
+    "tickets"; tickets can also be read and written one at a time so single
+    ticket updates do not have to rewrite the whole guild.
+    """
+
+    def load_document(self, kind, guild_id):
+        raise NotImplementedError
+
+    def save_document(self, kind, guild_id, data):
+        raise NotImplementedError
+
+    def list_guilds(self, kind="configs"):
+        raise NotImplementedError
+
+    def load_tickets(self, guild_id):
+        raise NotImplementedError
+
+    def save_tickets(self, guild_id, tickets_data):
+        raise NotImplementedError
+
+    def get_ticket(self, guild_id, ticket_id):
+        raise NotImplementedError
+
+    def save_ticket(self, guild_id, ticket_id, ticket_info, event="updated"):
+        """Save one ticket; event names the change (created, claimed, closed, ...) for backends that journal it"""
+        raise NotImplementedError
+
+    def get_ticket_by_channel(self, guild_id, channel_id):
+        raise NotImplementedError
+
+    def count_open_tickets(self, guild_id, creator_id):
+        raise NotImplementedError
+
+    def list_open_tickets(self, guild_id):
+        raise NotImplementedError
+
+    def get_ticket_stats(self, guild_id):
+        raise NotImplementedError
+
+    def load_counters(self, guild_id):
+        raise NotImplementedError
+
+    def save_counters(self, guild_id, counters):
+        raise NotImplementedError
+
+    def allocate_ticket_ids(self, guild_id):
+        raise NotImplementedError
+
+    def archive_closed_tickets(self, guild_id, closed_before):
+        """Move tickets closed before closed_before (ISO timestamp) out of the hot set; returns how many moved
+
+        Backends whose lookups never scan closed tickets have nothing to do.
+        """
+        return 0
+
+    def flush(self):
+        """Persist any writes the backend is holding back"""
+        pass
+
+    def close(self):
+        pass
+
+class JsonStorageBackend(StorageBackend):
+    """One pretty-printed JSON file per guild and kind, e.g. tickets/{guild_id}.json
+
+    Reads hand out copies of the cached documents and writes store copies, so
+    callers on other threads can never mutate a document while it is being
+    serialized. With write_behind, ticket changes are coalesced in the cache
+    and written at most once per flush() instead of on every mutation.
+
+    With journal_compact_events, every ticket change is instead appended as one
+    JSON line to tickets_journal/{guild_id}.jsonl (full ticket state, so replay
+    is idempotent). The ticket file becomes a snapshot that is only rewritten
+    once the journal reaches journal_compact_events events or on close(); the
+    first access to a guild replays the journal tail on top of the snapshot.
+
+    Closed tickets are archived to tickets_archive/{guild_id}/{YYYY-MM}.json;
+    tickets_archive/{guild_id}/index.json maps archived ticket IDs to their
+    shard and keeps their summarize_tickets totals, so lookups and stats
+    never have to open the shards.
+    """
+
+    def __init__(self, root=".", write_behind=STORAGE_FLUSH_INTERVAL > 0, journal_compact_events=TICKET_JOURNAL_COMPACT_EVENTS):
+        self.root = root
+        self.write_behind = write_behind
+        self.journal_compact_events = journal_compact_events
+        self.defer_tickets = write_behind or journal_compact_events > 0
+        # Snapshots are written by compaction, never by the cache's change counter
+        self.cache = JsonDocumentCache(flush_threshold=0 if journal_compact_events > 0 else STORAGE_FLUSH_THRESHOLD)
+        self.journal_events = {}  # guild_id -> events since the last snapshot, once replayed
+        self.journal_replayed = {}  # guild_id -> the cached ticket document the journal was applied to
+        self.journal_unsynced = {}  # guild_id -> True while appended events await fsync
+
+    def _path(self, kind, guild_id):
+        return os.path.join(self.root, kind, f"{guild_id}.json")
+
+    def load_document(self, kind, guild_id):
+        return copy.deepcopy(self.cache.load(self._path(kind, guild_id)))
+
+    def save_document(self, kind, guild_id, data):
+        self.cache.store(self._path(kind, guild_id), copy.deepcopy(data), defer=self.defer_tickets and kind == "tickets")
+
+    def list_guilds(self, kind="configs"):
+        directory = os.path.join(self.root, kind)
+        with self.cache.lock:
+            # Include documents that have not been flushed to disk yet
+            names = {os.path.basename(path): True for path in self.cache.dirty if os.path.dirname(path) == directory}
+        if os.path.exists(directory):
+            names.update((name, True) for name in os.listdir(directory))
+        journal_directory = os.path.join(self.root, "tickets_journal")
+        if kind == "tickets" and os.path.exists(journal_directory):
+            # Guilds whose tickets so far only exist as journal events
+            names.update((name[:-1], True) for name in os.listdir(journal_directory) if name.endswith(".jsonl"))
+        return [name[:-5] for name in names if name.endswith(".json")]
+
+    def _tickets(self, guild_id):
+        """The cached ticket document itself, journal applied; only touch it while holding cache.lock"""
+        guild_id = str(guild_id)
+        tickets_data = self.cache.load(self._path("tickets", guild_id))
+        if self.journal_compact_events > 0 and (tickets_data is None or self.journal_replayed.get(guild_id) is not tickets_data):
+            # First access, or the snapshot was (re)read from disk: the journal tail goes on top of it
+            tickets_data = self._replay_journal(guild_id, tickets_data if tickets_data is not None else {})
+        return tickets_data if tickets_data is not None else {}
+
+    def _journal_path(self, guild_id):
+        return os.path.join(self.root, "tickets_journal", f"{guild_id}.jsonl")
+
+    def _replay_journal(self, guild_id, tickets_data):
+        """Apply the events recorded since the last snapshot to tickets_data and return it"""
+        events = 0
+        journal_path = self._journal_path(guild_id)
+        if os.path.exists(journal_path):
+            with open(journal_path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # Torn last line from a crash mid-append
+                    if record["event"] == "archived":
+                        tickets_data.pop(record["ticket_id"], None)
+                    else:
+                        tickets_data[record["ticket_id"]] = record["ticket"]
+                    events += 1
+        self.journal_events[guild_id] = events
+        if events:
+            self.cache.store(self._path("tickets", guild_id), tickets_data, defer=True)
+        self.journal_replayed[guild_id] = tickets_data
+        return tickets_data
+
+    def _append_event(self, guild_id, event, ticket_id, ticket_info=None):
+        """Record one ticket change in the guild's journal"""
+        guild_id = str(guild_id)
+        journal_path = self._journal_path(guild_id)
+        os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+        record = {"at": datetime.datetime.utcnow().isoformat(), "event": event, "ticket_id": ticket_id}
+        if ticket_info is not None:
+            record["ticket"] = ticket_info
+        with open(journal_path, "a") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            if self.write_behind:
+                self.journal_unsynced[guild_id] = True
+            else:
+                os.fsync(f.fileno())
+        self.journal_events[guild_id] = self.journal_events.get(guild_id, 0) + 1
+
+    def _compact(self, guild_id):
+        """Write the guild's ticket snapshot, then empty its journal"""
+        guild_id = str(guild_id)
+        with self.cache.lock:
+            self.cache.flush(self._path("tickets", guild_id))
+            journal_path = self._journal_path(guild_id)
+            if os.path.exists(journal_path):
+                with open(journal_path, "w"):
+                    pass
+            self.journal_events[guild_id] = 0
+            self.journal_unsynced.pop(guild_id, None)
+
+    def _archive_path(self, guild_id, name):
+        return os.path.join(self.root, "tickets_archive", str(guild_id), f"{name}.json")
+
+    def _archive_index(self, guild_id):
+        """The cached archive index; only touch it while holding cache.lock"""
+        index = self.cache.load(self._archive_path(guild_id, "index"))
+        return index if index is not None else {"tickets": {}, "stats": summarize_tickets([])}
+
+    def _archive_shard(self, guild_id, shard):
+        """A cached archive shard; only touch it while holding cache.lock"""
+        shard_data = self.cache.load(self._archive_path(guild_id, shard))
+        return shard_data if shard_data is not None else {}
+
+    def _unarchive(self, guild_id, ticket_id):
+        """Remove a ticket from its archive shard and the index"""
+        index = self._archive_index(guild_id)
+        shard = index["tickets"].pop(ticket_id, None)
+        if shard is None:
+            return
+        shard_data = self._archive_shard(guild_id, shard)
+        ticket_info = shard_data.pop(ticket_id, None)
+        if ticket_info is not None:
+            merge_ticket_stats(index["stats"], summarize_tickets([ticket_info]), sign=-1)
+            self.cache.store(self._archive_path(guild_id, shard), shard_data)
+        self.cache.store(self._archive_path(guild_id, "index"), index)
+
+    def load_tickets(self, guild_id, include_archived=False):
+        with self.cache.lock:
+            tickets_data = copy.deepcopy(self._tickets(guild_id))
+            if include_archived:
+                for shard in dict.fromkeys(self._archive_index(guild_id)["tickets"].values()):
+                    for ticket_id, ticket_info in self._archive_shard(guild_id, shard).items():
+                        tickets_data.setdefault(ticket_id, copy.deepcopy(ticket_info))
+            return tickets_data
+
+    def save_tickets(self, guild_id, tickets_data):
+        with self.cache.lock:
+            self.save_document("tickets", guild_id, tickets_data)
+            if self.journal_compact_events > 0:
+                # A full replacement supersedes every journaled event
+                self.journal_events.setdefault(str(guild_id), 0)
+                self._compact(guild_id)
+
+    def get_ticket(self, guild_id, ticket_id):
+        ticket_id = str(ticket_id)
+        with self.cache.lock:
+            ticket_info = self._tickets(guild_id).get(ticket_id)
+            if ticket_info is None:
+                shard = self._archive_index(guild_id)["tickets"].get(ticket_id)
+                if shard is not None:
+                    ticket_info = self._archive_shard(guild_id, shard).get(ticket_id)
+            return copy.deepcopy(ticket_info)
+
+    def _channel_index(self, guild_id):
+        self._tickets(guild_id)  # Index the snapshot with the journal replayed
+        return self.cache.derived(self._path("tickets", guild_id), "channels", _build_channel_index)
+
+    def _creator_index(self, guild_id):
+        self._tickets(guild_id)
+        return self.cache.derived(self._path("tickets", guild_id), "creators", _build_creator_index)
+
+    def save_ticket(self, guild_id, ticket_id, ticket_info, event="updated"):
+        ticket_id = str(ticket_id)
+        ticket_info = copy.deepcopy(ticket_info)
+        with self.cache.lock:
+            tickets_data = self._tickets(guild_id)
+            channel_index = self._channel_index(guild_id)
+            creator_index = self._creator_index(guild_id)
+
+            if self.journal_compact_events > 0:
+                self._append_event(guild_id, event, ticket_id, ticket_info)
+            tickets_data[ticket_id] = ticket_info
+            _index_ticket_channel(channel_index, ticket_id, ticket_info)
+            _index_ticket_creator(creator_index, ticket_id, ticket_info)
+            self.cache.store(self._path("tickets", guild_id), tickets_data, keep_derived=True, defer=self.defer_tickets)
+            if ticket_id in self._archive_index(guild_id)["tickets"]:
+                # Reopened (or re-saved) tickets live in the hot file again
+                self._unarchive(guild_id, ticket_id)
+            if 0 < self.journal_compact_events <= self.journal_events.get(str(guild_id), 0):
+                self._compact(guild_id)
+
+    def get_ticket_by_channel(self, guild_id, channel_id):
+        with self.cache.lock:
+            ticket_id = self._channel_index(guild_id)["by_channel"].get(channel_id)
+            if ticket_id is None:
+                return None, None
+            return ticket_id, copy.deepcopy(self._tickets(guild_id)[ticket_id])
+
+    def count_open_tickets(self, guild_id, creator_id):
+        with self.cache.lock:
+            return len(self._creator_index(guild_id)["by_creator"].get(creator_id, ()))
+
+    def list_open_tickets(self, guild_id):
+        with self.cache.lock:
+            tickets_data = self._tickets(guild_id)
+            return {
+                ticket_id: copy.deepcopy(tickets_data[ticket_id])
+                for ticket_id in self._creator_index(guild_id)["by_ticket"]
+            }
+
+    def get_ticket_stats(self, guild_id):
+        with self.cache.lock:
+            stats = summarize_tickets(self._tickets(guild_id).values())
+            return merge_ticket_stats(stats, self._archive_index(guild_id)["stats"])
+
+    def load_counters(self, guild_id):
+        with self.cache.lock:
+            counters = self.load_document("counters", guild_id)
+            if counters is None:
+                counters = seed_ticket_counters(self._tickets(guild_id))
+            return counters
+
+    def save_counters(self, guild_id, counters):
+        self.save_document("counters", guild_id, counters)
+
+    def allocate_ticket_ids(self, guild_id):
+        with self.cache.lock:
+            counters = self.load_counters(guild_id)
+            counters["ticket_number"] += 1
+            counters["ticket_id"] += 1
+            self.save_counters(guild_id, counters)
+            return counters["ticket_id"], counters["ticket_number"]
+
+    def archive_closed_tickets(self, guild_id, closed_before):
+        with self.cache.lock:
+            tickets_data = self._tickets(guild_id)
+            archived = {
+                ticket_id: ticket_info for ticket_id, ticket_info in tickets_data.items()
+                if ticket_info.get("closed", False) and (ticket_info.get("closed_at") or "") < closed_before
+            }
+            if not archived:
+                return 0
+
+            # Counters are seeded from the live file, so pin them before it shrinks
+            if self.load_document("counters", guild_id) is None:
+                self.save_counters(guild_id, seed_ticket_counters(tickets_data))
+
+            index = self._archive_index(guild_id)
+            shards = {}
+            for ticket_id, ticket_info in archived.items():
+                shard = archive_shard_name(ticket_info)
+                shard_data = shards.setdefault(shard, self._archive_shard(guild_id, shard))
+                previous = shard_data.get(ticket_id)
+                if previous is not None:
+                    merge_ticket_stats(index["stats"], summarize_tickets([previous]), sign=-1)
+                shard_data[ticket_id] = ticket_info
+                index["tickets"][ticket_id] = shard
+                merge_ticket_stats(index["stats"], summarize_tickets([ticket_info]))
+
+            # Archive first so a crash can only leave a ticket in both places, never in neither
+            for shard, shard_data in shards.items():
+                self.cache.store(self._archive_path(guild_id, shard), shard_data)
+            self.cache.store(self._archive_path(guild_id, "index"), index)
+
+            for ticket_id in archived:
+                if self.journal_compact_events > 0:
+                    self._append_event(guild_id, "archived", ticket_id)
+                del tickets_data[ticket_id]
+            # Only closed tickets moved, so the open-ticket indexes are still valid
+            self.cache.store(self._path("tickets", guild_id), tickets_data, keep_derived=True, defer=self.defer_tickets)
+            if 0 < self.journal_compact_events <= self.journal_events.get(str(guild_id), 0):
+                self._compact(guild_id)
+            return len(archived)
+
+    def flush(self):
+        with self.cache.lock:
+            for guild_id in list(self.journal_unsynced):
+                with open(self._journal_path(guild_id), "a") as f:
+                    os.fsync(f.fileno())
+            self.journal_unsynced.clear()
+            if self.journal_compact_events <= 0:
+                self.cache.flush()
+
+    def close(self):
+        with self.cache.lock:
+            for guild_id, events in list(self.journal_events.items()):
+                if events:
+                    self._compact(guild_id)
+            self.flush()
+            self.cache.flush()
+
+def _build_channel_index(tickets_data):
+    """Build the channel_id -> ticket_id index for open tickets"""
+    channel_index = {"by_channel": {}, "by_ticket": {}}
+    for ticket_id, ticket_info in (tickets_data or {}).items():
+        _index_ticket_channel(channel_index, ticket_id, ticket_info)
+    return channel_index
+
+def _index_ticket_channel(channel_index, ticket_id, ticket_info):
+    """Point the index at the ticket's current channel, or drop it once closed"""
+    old_channel_id = channel_index["by_ticket"].pop(ticket_id, None)
+    if old_channel_id is not None:
+        channel_index["by_channel"].pop(old_channel_id, None)
+
+    if ticket_info.get("closed", False) or not ticket_info.get("channel_id"):
+        return
+    channel_index["by_channel"][ticket_info["channel_id"]] = ticket_id
+    channel_index["by_ticket"][ticket_id] = ticket_info["channel_id"]
+
+def _build_creator_index(tickets_data):
+    """Build the creator_id -> open ticket ids index"""
+    creator_index = {"by_creator": {}, "by_ticket": {}}
+    for ticket_id, ticket_info in (tickets_data or {}).items():
+        _index_ticket_creator(creator_index, ticket_id, ticket_info)
+    return creator_index
+
+def _index_ticket_creator(creator_index, ticket_id, ticket_info):
+    """Count the ticket against its creator while it is open"""
+    old_creator_id = creator_index["by_ticket"].pop(ticket_id, None)
+    if old_creator_id is not None:
+        open_ticket_ids = creator_index["by_creator"].get(old_creator_id, {})
+        open_ticket_ids.pop(ticket_id, None)
+        if not open_ticket_ids:
+            creator_index["by_creator"].pop(old_creator_id, None)
+
+    if ticket_info.get("closed", False):
+        return
+    creator_id = ticket_info.get("creator_id")
+    creator_index["by_creator"].setdefault(creator_id, {})[ticket_id] = True
+    creator_index["by_ticket"][ticket_id] = creator_id
+
+class SqliteStorageBackend(StorageBackend):
+    """All guilds in a single SQLite database running in WAL mode.
+
+    Tickets are one row each, with the fields used for lookups (channel,
+    creator, closed/status, priority, created_at) promoted to indexed columns
+    and the full ticket kept as JSON in the data column. The connection is
+    shared by the storage threads and guarded by lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS documents (
+            kind TEXT NOT NULL,
+            guild_id TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (kind, guild_id)
+        );
+        CREATE TABLE IF NOT EXISTS tickets (
+            guild_id TEXT NOT NULL,
+            ticket_id TEXT NOT NULL,
+            channel_id INTEGER,
+            creator_id INTEGER,
+            claimed_by INTEGER,
+            closed INTEGER NOT NULL DEFAULT 0,
+            status TEXT,
+            priority TEXT,
+            created_at TEXT,
+            ticket_number INTEGER,
+            data TEXT NOT NULL,
+            PRIMARY KEY (guild_id, ticket_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_tickets_channel ON tickets (guild_id, channel_id);
+        CREATE INDEX IF NOT EXISTS idx_tickets_creator ON tickets (guild_id, creator_id, closed);
+        CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (guild_id, closed, status);
+        CREATE INDEX IF NOT EXISTS idx_tickets_priority ON tickets (guild_id, priority);
+        CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets (guild_id, created_at);
+        CREATE TABLE IF NOT EXISTS counters (
+            guild_id TEXT PRIMARY KEY,
+            ticket_number INTEGER NOT NULL,
+            ticket_id INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path=SQLITE_DATABASE_PATH):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def _ticket_row(guild_id, ticket_id, ticket_info):
+        return (
+            str(guild_id),
+            str(ticket_id),
+            ticket_info.get("channel_id"),
+            ticket_info.get("creator_id"),
+            ticket_info.get("claimed_by"),
+            1 if ticket_info.get("closed", False) else 0,
+            ticket_info.get("status"),
+            ticket_info.get("priority"),
+            ticket_info.get("created_at"),
+            ticket_info.get("ticket_number"),
+            json.dumps(ticket_info)
+        )
+
+    def load_document(self, kind, guild_id):
+        with self.lock:
+            if kind == "tickets":
+                return self.load_tickets(guild_id) or None
+            if kind == "counters":
+                return self.load_counters(guild_id)
+            row = self.conn.execute(
+                "SELECT data FROM documents WHERE kind = ? AND guild_id = ?", (kind, str(guild_id))
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def save_document(self, kind, guild_id, data):
+        with self.lock:
+            if kind == "tickets":
+                return self.save_tickets(guild_id, data)
+            if kind == "counters":
+                return self.save_counters(guild_id, data)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO documents (kind, guild_id, data) VALUES (?, ?, ?)",
+                    (kind, str(guild_id), json.dumps(data))
+                )
+
+    def list_guilds(self, kind="configs"):
+        with self.lock:
+            if kind in ("tickets", "counters"):
+                rows = self.conn.execute(f"SELECT DISTINCT guild_id FROM {kind}").fetchall()
+            else:
+                rows = self.conn.execute("SELECT guild_id FROM documents WHERE kind = ?", (kind,)).fetchall()
+            return [row[0] for row in rows]
+
+    def load_tickets(self, guild_id, include_archived=False):
+        with self.lock:
+            rows = self.conn.execute("SELECT ticket_id, data FROM tickets WHERE guild_id = ?", (str(guild_id),)).fetchall()
+            return {ticket_id: json.loads(data) for ticket_id, data in rows}
+
+    def save_tickets(self, guild_id, tickets_data):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM tickets WHERE guild_id = ?", (str(guild_id),))
+                self.conn.executemany(
+                    "INSERT INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [self._ticket_row(guild_id, ticket_id, ticket_info) for ticket_id, ticket_info in tickets_data.items()]
+                )
+
+    def get_ticket(self, guild_id, ticket_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM tickets WHERE guild_id = ? AND ticket_id = ?", (str(guild_id), str(ticket_id))
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+
+    def save_ticket(self, guild_id, ticket_id, ticket_info, event="updated"):
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO tickets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._ticket_row(guild_id, ticket_id, ticket_info)
+                )
+
+    def get_ticket_by_channel(self, guild_id, channel_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT ticket_id, data FROM tickets WHERE guild_id = ? AND channel_id = ? AND closed = 0",
+                (str(guild_id), channel_id)
+            ).fetchone()
+            if not row:
+                return None, None
+            return row[0], json.loads(row[1])
+
+    def count_open_tickets(self, guild_id, creator_id):
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM tickets WHERE guild_id = ? AND creator_id = ? AND closed = 0",
+                (str(guild_id), creator_id)
+            ).fetchone()[0]
+
+    def list_open_tickets(self, guild_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT ticket_id, data FROM tickets WHERE guild_id = ? AND closed = 0", (str(guild_id),)
+            ).fetchall()
+            return {ticket_id: json.loads(data) for ticket_id, data in rows}
+
+    def get_ticket_stats(self, guild_id):
+        with self.lock:
+            total, closed, claimed = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(closed), 0), COUNT(claimed_by) FROM tickets WHERE guild_id = ?",
+                (str(guild_id),)
+            ).fetchone()
+            stats = {"total": total, "open": total - closed, "closed": closed, "claimed": claimed, "priority": {"high": 0, "medium": 0, "low": 0}}
+            for priority, count in self.conn.execute(
+                "SELECT priority, COUNT(*) FROM tickets WHERE guild_id = ? AND closed = 0 GROUP BY priority",
+                (str(guild_id),)
+            ):
+                if priority in stats["priority"]:
+                    stats["priority"][priority] = count
+            return stats
+
+    def load_counters(self, guild_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT ticket_number, ticket_id FROM counters WHERE guild_id = ?", (str(guild_id),)
+            ).fetchone()
+            if row:
+                return {"ticket_number": row[0], "ticket_id": row[1]}
+            last_number, last_id = self.conn.execute(
+                "SELECT COALESCE(MAX(ticket_number), 0), COALESCE(MAX(CAST(ticket_id AS INTEGER)), 0) FROM tickets WHERE guild_id = ?",
+                (str(guild_id),)
+            ).fetchone()
+            return {"ticket_number": last_number, "ticket_id": max(LEGACY_TICKET_ID_MAX, last_id)}
+
+    def save_counters(self, guild_id, counters):
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO counters (guild_id, ticket_number, ticket_id) VALUES (?, ?, ?)",
+                    (str(guild_id), counters["ticket_number"], counters["ticket_id"])
+                )
+
+    def allocate_ticket_ids(self, guild_id):
+        with self.lock:
+            with self.conn:
+                counters = self.load_counters(guild_id)
+                counters["ticket_number"] += 1
+                counters["ticket_id"] += 1
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO counters (guild_id, ticket_number, ticket_id) VALUES (?, ?, ?)",
+                    (str(guild_id), counters["ticket_number"], counters["ticket_id"])
+                )
+            return counters["ticket_id"], counters["ticket_number"]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+STORAGE_BACKENDS = {
+    "json": JsonStorageBackend,
+    "sqlite": SqliteStorageBackend,
+}
+
+def create_storage_backend(name=STORAGE_BACKEND):
+    """Instantiate a storage backend by name"""
+    if name not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend '{name}'. Available: {', '.join(STORAGE_BACKENDS)}")
+    return STORAGE_BACKENDS[name]()
+
+def migrate_storage(source, target):
+    """Copy every guild's documents, tickets and counters from one backend to another"""
+    for kind in DOCUMENT_DEFAULTS:
+        for guild_id in source.list_guilds(kind):
+            data = source.load_document(kind, guild_id)
+            if data is not None:
+                target.save_document(kind, guild_id, data)
+    for guild_id in source.list_guilds("tickets"):
+        target.save_tickets(guild_id, source.load_tickets(guild_id, include_archived=True))
+    for guild_id in source.list_guilds("counters"):
+        target.save_counters(guild_id, source.load_counters(guild_id))
+    target.flush()
+
+storage = create_storage_backend()
+
 # ===== MULTI-SERVER CONFIGURATION =====
 
 def load_guild_config(guild_id):
     """Load configuration for a specific guild"""
-    config_path = f"configs/{guild_id}.json"
-    if not os.path.exists(config_path):
-        return None
-
-    try:
-        with open(config_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return None
+    return storage.load_document("configs", guild_id)
 
 def save_guild_config(guild_id, config_data):
     """Save configuration for a specific guild"""
-    os.makedirs("configs", exist_ok=True)
-    config_path = f"configs/{guild_id}.json"
-    with open(config_path, "w") as f:
-        json.dump(config_data, f, indent=4)
+    storage.save_document("configs", guild_id, config_data)
 
 def load_guild_tickets(guild_id):
     """Load tickets for a specific guild"""
-    ticket_path = f"tickets/{guild_id}.json"
-    if not os.path.exists(ticket_path):
-        return {}
-
-    try:
-        with open(ticket_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+    return storage.load_tickets(guild_id)
 
 def save_guild_tickets(guild_id, tickets_data):
     """Save tickets for a specific guild"""
-    os.makedirs("tickets", exist_ok=True)
-    ticket_path = f"tickets/{guild_id}.json"
-    with open(ticket_path, "w") as f:
-        json.dump(tickets_data, f, indent=4)
+    storage.save_tickets(guild_id, tickets_data)
+
+def get_guild_ticket(guild_id, ticket_id):
+    """Load a single ticket, or None if it does not exist"""
+    return storage.get_ticket(guild_id, ticket_id)
+
+def save_guild_ticket(guild_id, ticket_id, ticket_info, event="updated"):
+    """Save a single ticket without rewriting the rest of the guild where the backend allows"""
+    storage.save_ticket(guild_id, ticket_id, ticket_info, event)
+
+def get_ticket_by_channel(guild_id, channel_id):
+    """Return (ticket_id, ticket_info) for the open ticket using a channel, or (None, None)"""
+    return storage.get_ticket_by_channel(guild_id, channel_id)
+
+def count_open_tickets(guild_id, creator_id):
+    """Return how many open tickets a user has in a guild"""
+    return storage.count_open_tickets(guild_id, creator_id)
+
+def list_open_guild_tickets(guild_id):
+    """Return {ticket_id: ticket_info} for every open ticket in a guild"""
+    return storage.list_open_tickets(guild_id)
+
+def get_guild_ticket_stats(guild_id):
+    """Return ticket totals for a guild (see summarize_tickets)"""
+    return storage.get_ticket_stats(guild_id)
+
+def archive_closed_guild_tickets(guild_id):
+    """Archive a guild's tickets closed more than TICKET_ARCHIVE_AFTER_DAYS ago"""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=TICKET_ARCHIVE_AFTER_DAYS)
+    return storage.archive_closed_tickets(guild_id, cutoff.isoformat())
+
+def list_configured_guilds():
+    """Return the IDs of every guild that has a saved configuration"""
+    return storage.list_guilds("configs")
 
 def load_guild_blacklist(guild_id):
     """Load blacklisted users for a guild"""
-    blacklist_path = f"blacklists/{guild_id}.json"
-    if not os.path.exists(blacklist_path):
-        return []
-
-    try:
-        with open(blacklist_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
+    blacklist = storage.load_document("blacklists", guild_id)
+    return blacklist if blacklist is not None else []
 
 def save_guild_blacklist(guild_id, blacklist_data):
     """Save blacklisted users for a guild"""
-    os.makedirs("blacklists", exist_ok=True)
-    blacklist_path = f"blacklists/{guild_id}.json"
-    with open(blacklist_path, "w") as f:
-        json.dump(blacklist_data, f, indent=4)
+    storage.save_document("blacklists", guild_id, blacklist_data)
 
 def load_guild_warnings(guild_id):
     """Load warnings for a guild"""
-    warnings_path = f"warnings/{guild_id}.json"
-    if not os.path.exists(warnings_path):
-        return {}
-
-    try:
-        with open(warnings_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+    warnings = storage.load_document("warnings", guild_id)
+    return warnings if warnings is not None else {}
 
 def save_guild_warnings(guild_id, warnings_data):
     """Save warnings for a guild"""
-    os.makedirs("warnings", exist_ok=True)
-    warnings_path = f"warnings/{guild_id}.json"
-    with open(warnings_path, "w") as f:
-        json.dump(warnings_data, f, indent=4)
+    storage.save_document("warnings", guild_id, warnings_data)
 
 def load_guild_tags(guild_id):
     """Load custom tags for a guild"""
-    tags_path = f"tags/{guild_id}.json"
-    if not os.path.exists(tags_path):
-        return {}
-
-    try:
-        with open(tags_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+    tags = storage.load_document("tags", guild_id)
+    return tags if tags is not None else {}
 
 def save_guild_tags(guild_id, tags_data):
     """Save custom tags for a guild"""
-    os.makedirs("tags", exist_ok=True)
-    tags_path = f"tags/{guild_id}.json"
-    with open(tags_path, "w") as f:
-        json.dump(tags_data, f, indent=4)
+    storage.save_document("tags", guild_id, tags_data)
 
 def load_guild_panels(guild_id):
     """Load saved panels for a guild"""
-    panels_path = f"panels/{guild_id}.json"
-    if not os.path.exists(panels_path):
-        return {}
-    
-    try:
-        with open(panels_path, "r") as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return {}
+    panels = storage.load_document("panels", guild_id)
+    return panels if panels is not None else {}
 
 def save_guild_panels(guild_id, panels_data):
     """Save panels for a guild"""
-    os.makedirs("panels", exist_ok=True)
-    panels_path = f"panels/{guild_id}.json"
-    with open(panels_path, "w") as f:
-        json.dump(panels_data, f, indent=4)
+    storage.save_document("panels", guild_id, panels_data)
 
 def get_guild_ticket_counter(guild_id):
     """Get the next ticket counter for a guild"""
-    tickets = load_guild_tickets(guild_id)
-    if not tickets:
-        return 1
-    return max([0] + [int(ticket_data.get("ticket_number", 0)) for ticket_data in tickets.values()]) + 1
+    return storage.load_counters(guild_id)["ticket_number"] + 1
+
+def allocate_ticket_ids(guild_id):
+    """Reserve the next (ticket_id, ticket_number) pair for a guild
+
+    Both sequences only move forward and are persisted before returning. The
+    backend allocates under its lock, so concurrent modal submits cannot be
+    handed the same IDs.
+    """
+    return storage.allocate_ticket_ids(guild_id)
 
 def is_guild_configured(guild_id):
     """Check if a guild is configured"""
@@ -160,6 +974,129 @@ def is_user_blacklisted(guild_id, user_id):
     blacklist = load_guild_blacklist(guild_id)
     return user_id in blacklist
 
+# ===== NON-BLOCKING STORAGE API =====
+
+# Coroutines reach storage through this bounded pool so file I/O and JSON
+# (de)serialization never stall the gateway heartbeat
+STORAGE_IO_WORKERS = int(os.getenv("STORAGE_IO_WORKERS", "4"))
+storage_executor = ThreadPoolExecutor(max_workers=STORAGE_IO_WORKERS, thread_name_prefix="storage-io")
+
+async def run_storage_io(func, *args, **kwargs):
+    """Run a blocking storage call on the storage thread pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(storage_executor, functools.partial(func, *args, **kwargs))
+
+def shutdown_storage():
+    """Let queued storage calls finish, flush and close the backend and search index and stop the render pool"""
+    storage_executor.shutdown(wait=True)
+    storage.close()
+    if search_index is not None:
+        search_index.close()
+    if transcript_executor is not None:
+        transcript_executor.shutdown(wait=True)
+
+atexit.register(shutdown_storage)
+
+def storage_io(func):
+    """Build the awaitable counterpart of a blocking storage helper"""
+    async def wrapper(*args, **kwargs):
+        return await run_storage_io(func, *args, **kwargs)
+    wrapper.__name__ = f"{func.__name__}_async"
+    wrapper.__doc__ = f"Non-blocking version of {func.__name__}"
+    return wrapper
+
+load_guild_config_async = storage_io(load_guild_config)
+save_guild_config_async = storage_io(save_guild_config)
+load_guild_tickets_async = storage_io(load_guild_tickets)
+save_guild_tickets_async = storage_io(save_guild_tickets)
+get_guild_ticket_async = storage_io(get_guild_ticket)
+save_guild_ticket_async = storage_io(save_guild_ticket)
+get_ticket_by_channel_async = storage_io(get_ticket_by_channel)
+count_open_tickets_async = storage_io(count_open_tickets)
+list_open_guild_tickets_async = storage_io(list_open_guild_tickets)
+get_guild_ticket_stats_async = storage_io(get_guild_ticket_stats)
+archive_closed_guild_tickets_async = storage_io(archive_closed_guild_tickets)
+list_configured_guilds_async = storage_io(list_configured_guilds)
+load_guild_blacklist_async = storage_io(load_guild_blacklist)
+save_guild_blacklist_async = storage_io(save_guild_blacklist)
+load_guild_warnings_async = storage_io(load_guild_warnings)
+save_guild_warnings_async = storage_io(save_guild_warnings)
+load_guild_tags_async = storage_io(load_guild_tags)
+save_guild_tags_async = storage_io(save_guild_tags)
+load_guild_panels_async = storage_io(load_guild_panels)
+save_guild_panels_async = storage_io(save_guild_panels)
+get_guild_ticket_counter_async = storage_io(get_guild_ticket_counter)
+allocate_ticket_ids_async = storage_io(allocate_ticket_ids)
+is_guild_configured_async = storage_io(is_guild_configured)
+get_embed_color_async = storage_io(get_embed_color)
+is_user_blacklisted_async = storage_io(is_user_blacklisted)
+
+# ===== TICKET TRANSACTIONS =====
+
+class TicketTransaction:
+    """Tickets read and modified inside one ticket_store.transaction() block.
+
+    Tickets are read once, mutated in memory and every ticket passed to put()
+    is written back when the block exits without an exception.
+    """
+
+    def __init__(self, guild_id):
+        self.guild_id = guild_id
+        self.tickets = {}
+        self.dirty = {}
+
+    async def get(self, ticket_id):
+        """Return a ticket (or None), reading it from storage at most once"""
+        ticket_id = str(ticket_id)
+        if ticket_id not in self.tickets:
+            self.tickets[ticket_id] = await get_guild_ticket_async(self.guild_id, ticket_id)
+        return self.tickets[ticket_id]
+
+    async def get_by_channel(self, channel_id):
+        """Return (ticket_id, ticket_info) for the open ticket using a channel, or (None, None)"""
+        ticket_id, ticket_info = await get_ticket_by_channel_async(self.guild_id, channel_id)
+        if ticket_id is None:
+            return None, None
+        return ticket_id, self.tickets.setdefault(str(ticket_id), ticket_info)
+
+    def put(self, ticket_id, ticket_info, event="updated"):
+        """Stage a ticket to be written when the transaction commits; event names the change for the journal"""
+        ticket_id = str(ticket_id)
+        self.tickets[ticket_id] = ticket_info
+        self.dirty[ticket_id] = event
+
+    def _write(self):
+        for ticket_id, event in self.dirty.items():
+            save_guild_ticket(self.guild_id, ticket_id, self.tickets[ticket_id], event)
+
+    async def commit(self):
+        if self.dirty:
+            await run_storage_io(self._write)
+            self.dirty = {}
+
+class TicketStore:
+    """Serializes ticket read-modify-write cycles per guild.
+
+    Each guild has its own asyncio lock, so interactions in one guild can no
+    longer overwrite each other's changes while other guilds keep running in
+    parallel. Keep Discord API calls outside the block where possible.
+    """
+
+    def __init__(self):
+        self.locks = {}
+
+    def lock(self, guild_id):
+        return self.locks.setdefault(str(guild_id), asyncio.Lock())
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, guild_id):
+        async with self.lock(guild_id):
+            transaction = TicketTransaction(str(guild_id))
+            yield transaction
+            await transaction.commit()
+
+ticket_store = TicketStore()
+
 # ===== ANIMATED EMOJIS =====
 ANIMATED_EMOJIS = {
     'ticket': '<a:Ticket:1401583771547074560>',
@@ -188,8 +1125,13 @@ TOKEN = PASTE YOUR TOKEN HERE
 intents = discord.Intents.all()
 intents.message_content = True
 
+class TicketBot(commands.Bot):
+    async def close(self):
+        await close_http_session()
+        await super().close()
+
 # Initialize bot with default prefix (can be overridden per guild)
-bot = commands.Bot(command_prefix="-", intents=intents)
+bot = TicketBot(command_prefix="-", intents=intents)
 bot.remove_command('help')
 
 # Rate limiting helper
@@ -330,632 +1272,158 @@ async def fallback_message_recreation(channel, messages_data):
     except Exception as e:
         print(f"Fallback recreation failed: {e}")
 
-# ===== TICKET PANEL & BUTTON VIEWS =====
-
-class TicketPanelView(discord.ui.View):
-    def __init__(self, button_names: list, guild_id: str):
-        super().__init__(timeout=None)
-        self.guild_id = guild_id
-        for name in button_names:
-            self.add_item(ReasonButton(label=name, guild_id=guild_id))
-
-class ReasonButton(discord.ui.Button):
-    def __init__(self, label: str, guild_id: str):
-        # Truncate label to 45 characters max to comply with Discord limits
-        truncated_label = label[:45] if len(label) > 45 else label
-        super().__init__(label=truncated_label, style=discord.ButtonStyle.primary, custom_id=f"reason_button_{guild_id}_{label}")
-        self.guild_id = guild_id
-
-    async def callback(self, interaction: discord.Interaction):
-        if not is_guild_configured(self.guild_id):
-            await interaction.response.send_message(
-                "❌ This server is not configured yet! An administrator needs to run `-setup` first.", 
-                ephemeral=True
-            )
-            return
+# ===== TRANSCRIPT TEMPLATE =====
 
-        # Check if user is blacklisted
-        if is_user_blacklisted(self.guild_id, interaction.user.id):
-            await interaction.response.send_message(
-                "❌ You are blacklisted from creating tickets in this server.", 
-                ephemeral=True
-            )
-            return
+# "inline" embeds the stylesheet and scripts in every HTML transcript; "shared" links one
+# versioned transcripts/transcript-<version>.css/.js pair instead (serve transcripts/ as a whole)
+TRANSCRIPT_ASSETS = os.getenv("TRANSCRIPT_ASSETS", "inline").lower()
+TRANSCRIPT_ASSETS_DIR = "transcripts"
 
-        # Check for existing open tickets
-        tickets_data = load_guild_tickets(self.guild_id)
-        user_open_tickets = [
-            ticket for ticket in tickets_data.values() 
-            if ticket["creator_id"] == interaction.user.id and not ticket.get("closed", False)
-        ]
+TRANSCRIPT_CSS = """        * {
+            margin: 0;
+            padding: 0;
+            box-sizing: border-box;
+        }
         
-        config = load_guild_config(self.guild_id)
-        max_tickets = config.get("max_tickets_per_user", 3)
+        body {
+            font-family: "Whitney", "Helvetica Neue", Helvetica, Arial, "Noto Color Emoji", sans-serif;
+            background: #36393f;
+            color: #dcddde;
+            line-height: 1.375;
+            font-feature-settings: "liga" 1, "kern" 1;
+            text-rendering: optimizeLegibility;
+        }
         
-        if len(user_open_tickets) >= max_tickets:
-            await interaction.response.send_message(
-                f"❌ You already have {len(user_open_tickets)} open tickets. Maximum allowed: {max_tickets}", 
-                ephemeral=True
-            )
-            return
-
-        await interaction.response.send_modal(ReasonModal(self.label, self.guild_id))
-
-class ReasonModal(discord.ui.Modal, title='Reason for Ticket'):
-    reason = discord.ui.TextInput(
-        label='Describe your issue (max 500 characters)', 
-        style=discord.TextStyle.paragraph, 
-        max_length=500,
-        placeholder="Describe your issue in detail..."
-    )
-
-    def __init__(self, button_name: str, guild_id: str):
-        super().__init__()
-        self.button_name = button_name
-        self.guild_id = guild_id
-
-    async def on_submit(self, interaction: discord.Interaction):
-        config = load_guild_config(self.guild_id)
-        if not config:
-            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
-            return
-
-        ticket_counter = get_guild_ticket_counter(self.guild_id)
-        ticket_id = random.randint(10000, 99999)  # 5-digit ticket IDs
-
-        tickets_data = load_guild_tickets(self.guild_id)
-        while str(ticket_id) in tickets_data:
-            ticket_id = random.randint(10000, 99999)
-
-        ticket_channel_name = f"{self.button_name.lower()}-{ticket_counter}"
-        guild = interaction.guild
-        category = guild.get_channel(config["ticket_category_id"])
-
-        if not category:
-            await interaction.response.send_message("❌ Ticket category not found! Please check configuration.", ephemeral=True)
-            return
-
-        overwrites = {
-            guild.default_role: discord.PermissionOverwrite(view_channel=False),
-            interaction.user: discord.PermissionOverwrite(
-                view_channel=True, 
-                send_messages=True, 
-                read_messages=True, 
-                attach_files=True,
-                add_reactions=True,
-                embed_links=True
-            ),
-            guild.me: discord.PermissionOverwrite(
-                view_channel=True, 
-                send_messages=True, 
-                read_messages=True, 
-                attach_files=True,
-                manage_channels=True,
-                manage_webhooks=True
-            )
+        .transcript-container {
+            max-width: 1200px;
+            margin: 0 auto;
+            background: #36393f;
         }
-
-        for role_id in config["staff_role_ids"]:
-            role = guild.get_role(role_id)
-            if role:
-                overwrites[role] = discord.PermissionOverwrite(
-                    view_channel=True, 
-                    send_messages=True, 
-                    read_messages=True, 
-                    attach_files=True,
-                    manage_messages=True
-                )
-
-        try:
-            ticket_channel = await guild.create_text_channel(
-                ticket_channel_name, 
-                category=category, 
-                overwrites=overwrites,
-                topic=f"Ticket #{ticket_id} | Created by {interaction.user} | Type: {self.button_name}"
-            )
-        except discord.Forbidden:
-            await interaction.response.send_message("❌ I don't have permission to create channels!", ephemeral=True)
-            return
-
-        tickets_data[str(ticket_id)] = {
-            "channel_id": ticket_channel.id,
-            "creator_id": interaction.user.id,
-            "button_name": self.button_name,
-            "ticket_number": ticket_counter,
-            "created_at": datetime.datetime.utcnow().isoformat(),
-            "closed": False,
-            "reopened": "No",
-            "reason": self.reason.value,
-            "added_users": [],
-            "claimed_by": None,
-            "priority": "medium",
-            "notes": [],
-            "tags": [],
-            "status": "open"
+        
+        .header {
+            background: #2f3136;
+            padding: 15px;
+            border-bottom: 1px solid #202225;
         }
-        save_guild_tickets(self.guild_id, tickets_data)
-
-        embed_color = get_embed_color(self.guild_id)
-        embed = discord.Embed(
-            title=f"{ANIMATED_EMOJIS['ticket']} New Support Ticket",
-            color=embed_color
-        )
-        embed.set_author(
-            name=f"{interaction.user.display_name} ({interaction.user})", 
-            icon_url=interaction.user.avatar.url if interaction.user.avatar else interaction.user.default_avatar.url
-        )
-        if interaction.user.avatar:
-            embed.set_thumbnail(url=interaction.user.avatar.url)
         
-        embed.add_field(name=f"{ANIMATED_EMOJIS['usermanage']} Created by", value=f"{interaction.user.mention}", inline=True)
-        embed.add_field(name=f"{ANIMATED_EMOJIS['label']} Type", value=f"`{self.button_name}`", inline=True)
-        embed.add_field(name=f"{ANIMATED_EMOJIS['tickets']} Ticket ID", value=f"`{ticket_id}`", inline=True)
-        embed.add_field(name=f"{ANIMATED_EMOJIS['file']} Reason", value=f"```{self.reason.value}```", inline=False)
-        embed.add_field(name=f"{ANIMATED_EMOJIS['zap']} Priority", value="`Medium`", inline=True)
-        embed.add_field(name=f"{ANIMATED_EMOJIS['stats']} Status", value="`Open`", inline=True)
-        embed.set_footer(text=f"Ticket #{ticket_counter} • Created at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-        # Get custom welcome message or use default
-        welcome_msg = config.get("welcome_message", 
-            f"**Welcome {interaction.user.mention}!** {ANIMATED_EMOJIS['wave']}\n\n"
-            "Thank you for creating a ticket. Our support team will be with you shortly.\n"
-            "Please provide any additional details about your issue while you wait."
-        )
-
-        view = TicketControlView(ticket_id, self.guild_id)
-        await ticket_channel.send(welcome_msg, embed=embed, view=view)
+        .header h1 {
+            color: #ffffff;
+            font-size: 24px;
+            margin-bottom: 10px;
+            display: flex;
+            align-items: center;
+        }
         
-        # Send confirmation
-        await interaction.response.send_message(
-            f"✅ Ticket created successfully! {ticket_channel.mention}", 
-            ephemeral=True
-        )
-
-        # Log ticket creation
-        log_channel = guild.get_channel(config["log_channel_id"])
-        if log_channel:
-            log_embed = discord.Embed(
-                title=f"{ANIMATED_EMOJIS['ticket']} New Ticket Created",
-                color=embed_color
-            )
-            log_embed.add_field(name="User", value=interaction.user.mention, inline=True)
-            log_embed.add_field(name="Channel", value=ticket_channel.mention, inline=True)
-            log_embed.add_field(name="ID", value=f"`{ticket_id}`", inline=True)
-            log_embed.add_field(name="Type", value=f"`{self.button_name}`", inline=True)
-            await log_channel.send(embed=log_embed)
-
-# ===== ENHANCED TICKET CONTROL VIEWS =====
-
-class TicketControlView(discord.ui.View):
-    def __init__(self, ticket_id: int, guild_id: str):
-        super().__init__(timeout=None)
-        self.ticket_id = ticket_id
-        self.guild_id = guild_id
-        self.add_item(CloseTicketButton(ticket_id, guild_id))
-        self.add_item(ClaimTicketButton(ticket_id, guild_id))
-        self.add_item(TranscriptButton(ticket_id, guild_id))
-        self.add_item(RenameTicketButton(ticket_id, guild_id))
-
-class CloseTicketButton(discord.ui.Button):
-    def __init__(self, ticket_id: int, guild_id: str):
-        super().__init__(
-            label="Close Ticket",
-            style=discord.ButtonStyle.danger,
-            emoji=ANIMATED_EMOJIS['lock'],
-            custom_id=f"close_ticket_{guild_id}_{ticket_id}"
-        )
-        self.ticket_id = ticket_id
-        self.guild_id = guild_id
-
-    async def callback(self, interaction: discord.Interaction):
-        config = load_guild_config(self.guild_id)
-        if not config:
-            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
-            return
-
-        tickets_data = load_guild_tickets(self.guild_id)
-        ticket_data = tickets_data.get(str(self.ticket_id))
-
-        if not ticket_data:
-            await interaction.response.send_message("Ticket data not found.", ephemeral=True)
-            return
-
-        is_staff = any(role.id in config["staff_role_ids"] for role in interaction.user.roles)
-        is_creator = interaction.user.id == ticket_data["creator_id"]
-        is_claimer = ticket_data.get("claimed_by") == interaction.user.id
-
-        if not (is_staff or is_creator or is_claimer):
-            await interaction.response.send_message("❌ You do not have permission to close this ticket.", ephemeral=True)
-            return
-
-        view = ConfirmCloseView(self.ticket_id, self.guild_id)
-        embed = discord.Embed(
-            title="⚠️ Confirm Ticket Closure",
-            description="Are you sure you want to close this ticket?\n\n**This action will:**\n• Archive all messages\n• Send logs to staff\n• Delete the channel after 10 seconds",
-            color=discord.Color.orange()
-        )
-        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
-
-class ClaimTicketButton(discord.ui.Button):
-    def __init__(self, ticket_id: int, guild_id: str):
-        super().__init__(
-            label="Claim",
-            style=discord.ButtonStyle.success,
-            emoji=ANIMATED_EMOJIS['wave'],
-            custom_id=f"claim_ticket_{guild_id}_{ticket_id}"
-        )
-        self.ticket_id = ticket_id
-        self.guild_id = guild_id
-
-    async def callback(self, interaction: discord.Interaction):
-        config = load_guild_config(self.guild_id)
-        if not config:
-            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
-            return
-
-        is_staff = any(role.id in config["staff_role_ids"] for role in interaction.user.roles)
-        if not is_staff:
-            await interaction.response.send_message("❌ Only staff members can claim tickets.", ephemeral=True)
-            return
-
-        tickets_data = load_guild_tickets(self.guild_id)
-        ticket_data = tickets_data.get(str(self.ticket_id))
-
-        if not ticket_data:
-            await interaction.response.send_message("Ticket data not found.", ephemeral=True)
-            return
-
-        # Toggle claim/unclaim
-        if ticket_data.get("claimed_by") == interaction.user.id:
-            # Unclaim
-            ticket_data["claimed_by"] = None
-            ticket_data.pop("claimed_at", None)
-            tickets_data[str(self.ticket_id)] = ticket_data
-            save_guild_tickets(self.guild_id, tickets_data)
-
-            embed_color = get_embed_color(self.guild_id)
-            embed = discord.Embed(
-                title="🔓 Ticket Unclaimed",
-                description=f"This ticket has been unclaimed by {interaction.user.mention}",
-                color=embed_color
-            )
-            await interaction.response.send_message(embed=embed)
-            
-            # Update button label
-            self.label = "Claim"
-            self.style = discord.ButtonStyle.success
-            await interaction.edit_original_response(view=self.view)
-            
-        elif ticket_data.get("claimed_by"):
-            claimer = interaction.guild.get_member(ticket_data["claimed_by"])
-            claimer_name = claimer.display_name if claimer else "Unknown"
-            await interaction.response.send_message(f"❌ This ticket is already claimed by {claimer_name}.", ephemeral=True)
-            return
-        else:
-            # Claim
-            ticket_data["claimed_by"] = interaction.user.id
-            ticket_data["claimed_at"] = datetime.datetime.utcnow().isoformat()
-            tickets_data[str(self.ticket_id)] = ticket_data
-            save_guild_tickets(self.guild_id, tickets_data)
-
-            embed_color = get_embed_color(self.guild_id)
-            embed = discord.Embed(
-                title="🎯 Ticket Claimed",
-                description=f"This ticket has been claimed by {interaction.user.mention}",
-                color=embed_color
-            )
-            await interaction.response.send_message(embed=embed)
-            
-            # Update button label
-            self.label = "Unclaim"
-            self.style = discord.ButtonStyle.secondary
-            await interaction.edit_original_response(view=self.view)
-
-class TranscriptButton(discord.ui.Button):
-    def __init__(self, ticket_id: int, guild_id: str):
-        super().__init__(
-            label="Transcript",
-            style=discord.ButtonStyle.secondary,
-            emoji=ANIMATED_EMOJIS['file'],
-            custom_id=f"transcript_{guild_id}_{ticket_id}"
-        )
-        self.ticket_id = ticket_id
-        self.guild_id = guild_id
-
-    async def callback(self, interaction: discord.Interaction):
-        config = load_guild_config(self.guild_id)
-        if not config:
-            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
-            return
-
-        is_staff = any(role.id in config["staff_role_ids"] for role in interaction.user.roles)
-        if not is_staff:
-            await interaction.response.send_message("❌ Only staff members can generate transcripts.", ephemeral=True)
-            return
-
-        await interaction.response.defer(ephemeral=True)
-
-        # Generate enhanced transcript with full message data
-        messages_data = []
-        async for msg in interaction.channel.history(limit=None, oldest_first=True):
-            # Get user avatar
-            avatar_url = msg.author.avatar.url if msg.author.avatar else msg.author.default_avatar.url
-            
-            message_data = {
-                'id': msg.id,
-                'author': {
-                    'id': msg.author.id,
-                    'username': msg.author.name,
-                    'display_name': msg.author.display_name,
-                    'avatar_url': avatar_url,
-                    'bot': msg.author.bot
-                },
-                'content': msg.content,
-                'timestamp': msg.created_at,
-                'embeds': [],
-                'attachments': []
-            }
-            
-            # Process embeds
-            for embed in msg.embeds:
-                embed_data = {
-                    'title': embed.title,
-                    'description': embed.description,
-                    'color': embed.color.value if embed.color else None,
-                    'fields': [{'name': field.name, 'value': field.value, 'inline': field.inline} for field in embed.fields],
-                    'footer': embed.footer.text if embed.footer else None,
-                    'thumbnail': embed.thumbnail.url if embed.thumbnail else None,
-                    'image': embed.image.url if embed.image else None
-                }
-                message_data['embeds'].append(embed_data)
-            
-            # Process attachments
-            for attachment in msg.attachments:
-                attachment_data = {
-                    'filename': attachment.filename,
-                    'url': attachment.url,
-                    'size': attachment.size
-                }
-                message_data['attachments'].append(attachment_data)
-            
-            messages_data.append(message_data)
-
-        # Add ticket metadata
-        tickets_data = load_guild_tickets(self.guild_id)
-        ticket_info = tickets_data.get(str(self.ticket_id), {})
-
-        # Create only HTML transcript with Discord styling
-        html_content = await self.generate_discord_html_transcript(messages_data, ticket_info, interaction.guild, interaction.channel)
+        .ticket-icon {
+            background: #5865f2;
+            color: white;
+            border-radius: 50%;
+            width: 40px;
+            height: 40px;
+            display: flex;
+            align-items: center;
+            justify-content: center;
+            margin-right: 12px;
+            font-weight: bold;
+        }
         
-        # Create transcript file
-        os.makedirs(f"transcripts/{self.guild_id}", exist_ok=True)
-        html_filename = f"transcripts/{self.guild_id}/transcript_{self.ticket_id}_{int(time.time())}.html"
+        .header-info {
+            display: grid;
+            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
+            gap: 15px;
+            margin-top: 15px;
+        }
         
-        with open(html_filename, "w", encoding="utf-8") as f:
-            f.write(html_content)
-
-        # Create a mobile-friendly text version
-        text_content = await self.generate_mobile_friendly_transcript(messages_data, ticket_info, interaction.guild, interaction.channel)
-        text_filename = f"transcripts/{self.guild_id}/transcript_{self.ticket_id}_{int(time.time())}.txt"
+        .info-item {
+            background: #40444b;
+            padding: 12px;
+            border-radius: 6px;
+            border-left: 4px solid #5865f2;
+        }
         
-        with open(text_filename, "w", encoding="utf-8") as f:
-            f.write(text_content)
-
-        # Check if transcripts should be sent to users
-        config = load_guild_config(self.guild_id)
-        send_to_user = config.get("send_transcript_to_user", True)
+        .info-label {
+            font-size: 12px;
+            color: #b9bbbe;
+            text-transform: uppercase;
+            font-weight: 600;
+            margin-bottom: 4px;
+        }
         
-        if send_to_user:
-            # Send both HTML and text versions with user guidance
-            embed = discord.Embed(
-                title="<a:file:1401629622973759650> Transcript Generated Successfully",
-                description="Choose your preferred format:",
-                color=discord.Color.green()
-            )
-            embed.add_field(
-                name="<a:laptop:1401636098098073720> Desktop Users",
-                value="Download the HTML file for the best viewing experience with Discord styling",
-                inline=False
-            )
-            embed.add_field(
-                name="<a:mobile:1401636122282426529> Mobile Users", 
-                value="Use the TXT file for easier mobile viewing and copying",
-                inline=False
-            )
-            embed.add_field(
-                name="<a:stats:1401587832526602240> Stats",
-                value=f"**Messages:** {len(messages_data)}\n**File Size:** HTML (~{len(html_content)//1024}KB), TXT (~{len(text_content)//1024}KB)",
-                inline=False
-            )
-            
-            try:
-                await interaction.followup.send(
-                    embed=embed,
-                    files=[discord.File(html_filename), discord.File(text_filename)],
-                    ephemeral=True
-                )
-            except discord.HTTPException:
-                # Fallback if files are too large
-                await interaction.followup.send(
-                    "<a:file:1401629622973759650> Transcript generated but files are too large to send directly. Check the transcripts directory.",
-                    ephemeral=True
-                )
-        else:
-            # Just confirm generation without sending files to user
-            await interaction.followup.send(
-                "<a:file:1401629622973759650> Transcript generated successfully and sent to log channel.",
-                ephemeral=True
-            )
-
-        # Send transcripts to log channel
-        config = load_guild_config(self.guild_id)
-        if config and config.get("log_channel_id"):
-            log_channel = interaction.guild.get_channel(config["log_channel_id"])
-            if log_channel:
-                try:
-                    log_embed = discord.Embed(
-                        title="<a:file:1401629622973759650> Transcript Generated",
-                        description=f"Transcript for Ticket #{self.ticket_id}",
-                        color=discord.Color.blue()
-                    )
-                    log_embed.add_field(name="Generated by", value=interaction.user.mention, inline=True)
-                    log_embed.add_field(name="Channel", value=interaction.channel.mention, inline=True)
-                    log_embed.add_field(name="Messages", value=str(len(messages_data)), inline=True)
-                    
-                    # Always send both HTML and TXT to log channel
-                    await log_channel.send(
-                        embed=log_embed,
-                        files=[discord.File(html_filename), discord.File(text_filename)]
-                    )
-                except discord.HTTPException:
-                    # Send a message if files are too large for log channel
-                    await log_channel.send(
-                        embed=log_embed.add_field(name="Note", value="Files too large for Discord - check transcripts directory", inline=False)
-                    )
-                except Exception as e:
-                    print(f"Failed to send transcript to log channel: {e}")
-
-    async def generate_discord_html_transcript(self, messages_data, ticket_info, guild, channel):
-        """Generate Discord-styled HTML transcript"""
-        
-        # Get creator info
-        creator_id = ticket_info.get('creator_id')
-        creator = guild.get_member(creator_id) if creator_id else None
-        
-        html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Ticket #{self.ticket_id} Transcript - {guild.name}</title>
-    <link href="https://fonts.googleapis.com/css2?family=Noto+Color+Emoji&family=Whitney:wght@400;500;600;700&display=swap" rel="stylesheet">
-    <style>
-        * {{
-            margin: 0;
-            padding: 0;
-            box-sizing: border-box;
-        }}
-        
-        body {{
-            font-family: "Whitney", "Helvetica Neue", Helvetica, Arial, "Noto Color Emoji", sans-serif;
-            background: #36393f;
-            color: #dcddde;
-            line-height: 1.375;
-            font-feature-settings: "liga" 1, "kern" 1;
-            text-rendering: optimizeLegibility;
-        }}
-        
-        .transcript-container {{
-            max-width: 1200px;
-            margin: 0 auto;
-            background: #36393f;
-        }}
-        
-        .header {{
-            background: #2f3136;
-            padding: 15px;
-            border-bottom: 1px solid #202225;
-        }}
-        
-        .header h1 {{
-            color: #ffffff;
-            font-size: 24px;
-            margin-bottom: 10px;
-            display: flex;
-            align-items: center;
-        }}
-        
-        .ticket-icon {{
-            background: #5865f2;
-            color: white;
-            border-radius: 50%;
-            width: 40px;
-            height: 40px;
-            display: flex;
-            align-items: center;
-            justify-content: center;
-            margin-right: 12px;
-            font-weight: bold;
-        }}
-        
-        .header-info {{
-            display: grid;
-            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-            gap: 15px;
-            margin-top: 15px;
-        }}
-        
-        .info-item {{
-            background: #40444b;
-            padding: 12px;
-            border-radius: 6px;
-            border-left: 4px solid #5865f2;
-        }}
-        
-        .info-label {{
-            font-size: 12px;
-            color: #b9bbbe;
-            text-transform: uppercase;
-            font-weight: 600;
-            margin-bottom: 4px;
-        }}
-        
-        .info-value {{
+        .info-value {
             color: #ffffff;
             font-weight: 500;
-        }}
+        }
         
-        .messages {{
+        .messages {
             padding: 20px;
-        }}
+        }
         
-        .message {{
+        .message {
             display: flex;
             margin-bottom: 20px;
             padding: 8px 0;
             position: relative;
-        }}
+        }
         
-        .message:hover {{
+        .message:hover {
             background: rgba(4, 4, 5, 0.07);
             margin: 0 -20px 20px -20px;
             padding: 8px 20px;
             border-radius: 0;
-        }}
+        }
         
-        .avatar {{
+        .avatar {
             width: 40px;
             height: 40px;
             border-radius: 50%;
             margin-right: 16px;
             flex-shrink: 0;
             cursor: pointer;
-        }}
+            background-size: cover;
+            background-position: center;
+        }
+        
+        .message-continued,
+        .message-continued:hover {
+            margin-top: -20px;
+            padding-top: 2px;
+            padding-bottom: 2px;
+        }
+        
+        .message-continued .message-content {
+            margin-left: 56px;
+        }
+        
+        .transcript-more {
+            text-align: center;
+            color: #72767d;
+            font-size: 12px;
+            padding: 16px 0;
+        }
         
-        .message-content {{
+        .message-content {
             flex: 1;
             min-width: 0;
-        }}
+        }
         
-        .message-header {{
+        .message-header {
             display: flex;
             align-items: baseline;
             margin-bottom: 4px;
-        }}
+        }
         
-        .username {{
+        .username {
             font-weight: 500;
             color: #ffffff;
             margin-right: 8px;
             cursor: pointer;
-        }}
+        }
         
-        .username:hover {{
+        .username:hover {
             text-decoration: underline;
-        }}
+        }
         
-        .bot-tag {{
+        .bot-tag {
             background: #5865f2;
             color: #ffffff;
             font-size: 10px;
@@ -964,41 +1432,41 @@ class TranscriptButton(discord.ui.Button):
             border-radius: 3px;
             margin-right: 8px;
             text-transform: uppercase;
-        }}
+        }
         
-        .timestamp {{
+        .timestamp {
             font-size: 12px;
             color: #72767d;
             margin-left: 8px;
-        }}
+        }
         
-        .message-text {{
+        .message-text {
             color: #dcddde;
             word-wrap: break-word;
             white-space: pre-wrap;
             font-family: "Whitney", "Helvetica Neue", Helvetica, Arial, "Noto Color Emoji", sans-serif;
-        }}
+        }
         
-        .message-text strong {{
+        .message-text strong {
             font-weight: 600;
             color: #ffffff;
-        }}
+        }
         
-        .message-text em {{
+        .message-text em {
             font-style: italic;
             color: #dcddde;
-        }}
+        }
         
-        .message-text code {{
+        .message-text code {
             background: #2f3136;
             color: #f8f8f2;
             padding: 2px 4px;
             border-radius: 3px;
             font-family: "Consolas", "Monaco", "Menlo", monospace;
             font-size: 85%;
-        }}
+        }
         
-        .message-text pre {{
+        .message-text pre {
             background: #2f3136;
             color: #f8f8f2;
             padding: 8px 12px;
@@ -1010,48 +1478,48 @@ class TranscriptButton(discord.ui.Button):
             white-space: pre-wrap;
             overflow-x: auto;
             margin: 4px 0;
-        }}
+        }
         
-        .message-text .spoiler {{
+        .message-text .spoiler {
             background: #202225;
             color: #202225;
             border-radius: 3px;
             padding: 0 2px;
             cursor: pointer;
             user-select: none;
-        }}
+        }
         
         .message-text .spoiler:hover,
-        .message-text .spoiler.revealed {{
+        .message-text .spoiler.revealed {
             color: #dcddde;
             background: #484c52;
-        }}
+        }
         
-        .message-text .mention {{
+        .message-text .mention {
             background: #414675;
             color: #dee0fc;
             padding: 0 2px;
             border-radius: 3px;
             font-weight: 500;
-        }}
+        }
         
-        .message-text .channel-mention {{
+        .message-text .channel-mention {
             background: #414675;
             color: #00b0f4;
             padding: 0 2px;
             border-radius: 3px;
             font-weight: 500;
-        }}
+        }
         
-        .message-text .role-mention {{
+        .message-text .role-mention {
             background: #414675;
             color: #faa61a;
             padding: 0 2px;
             border-radius: 3px;
             font-weight: 500;
-        }}
+        }
         
-        .message-text .emoji {{
+        .message-text .emoji {
             width: 22px;
             height: 22px;
             vertical-align: middle;
@@ -1060,9 +1528,9 @@ class TranscriptButton(discord.ui.Button):
             border: none;
             background: transparent;
             margin: 0 1px;
-        }}
+        }
         
-        .message-text .emoji-large {{
+        .message-text .emoji-large {
             width: 48px;
             height: 48px;
             vertical-align: middle;
@@ -1071,21 +1539,21 @@ class TranscriptButton(discord.ui.Button):
             border: none;
             background: transparent;
             margin: 2px;
-        }}
+        }
         
-        .message-text .emoji:hover {{
+        .message-text .emoji:hover {
             transform: scale(1.1);
             transition: transform 0.1s ease;
-        }}
+        }
         
-        .unicode-emoji {{
+        .unicode-emoji {
             font-family: "Apple Color Emoji", "Segoe UI Emoji", "Noto Color Emoji", "Twemoji Mozilla", "Android Emoji", sans-serif;
             font-size: 1.2em;
             line-height: 1;
             vertical-align: middle;
-        }}
+        }
         
-        .emoji-fallback {{
+        .emoji-fallback {
             background: #40444b;
             color: #dcddde;
             padding: 2px 4px;
@@ -1097,27 +1565,27 @@ class TranscriptButton(discord.ui.Button):
             display: inline-block;
             vertical-align: middle;
             margin: 0 1px;
-        }}
+        }
         
-        .discord-header {{
+        .discord-header {
             color: #ffffff;
             margin: 12px 0 8px 0;
             font-weight: 600;
-        }}
+        }
         
-        .discord-header h1 {{
+        .discord-header h1 {
             font-size: 20px;
-        }}
+        }
         
-        .discord-header h2 {{
+        .discord-header h2 {
             font-size: 18px;
-        }}
+        }
         
-        .discord-header h3 {{
+        .discord-header h3 {
             font-size: 16px;
-        }}
+        }
         
-        .code-block {{
+        .code-block {
             background: #2f3136;
             color: #f8f8f2;
             padding: 8px 12px;
@@ -1130,9 +1598,9 @@ class TranscriptButton(discord.ui.Button):
             overflow-x: auto;
             margin: 4px 0;
             position: relative;
-        }}
+        }
         
-        .code-block[data-lang]:not([data-lang=""]):before {{
+        .code-block[data-lang]:not([data-lang=""]):before {
             content: attr(data-lang);
             position: absolute;
             top: 2px;
@@ -1141,18 +1609,18 @@ class TranscriptButton(discord.ui.Button):
             color: #72767d;
             text-transform: uppercase;
             font-weight: 600;
-        }}
+        }
         
-        .inline-code {{
+        .inline-code {
             background: #2f3136;
             color: #f8f8f2;
             padding: 2px 4px;
             border-radius: 3px;
             font-family: "Consolas", "Monaco", "Menlo", "Courier New", monospace;
             font-size: 85%;
-        }}
+        }
         
-        .quote-line {{
+        .quote-line {
             background: #2f3136;
             border-left: 4px solid #4f545c;
             margin: 4px 0;
@@ -1161,26 +1629,26 @@ class TranscriptButton(discord.ui.Button):
             color: #b5b6b8;
             font-style: italic;
             position: relative;
-        }}
+        }
         
-        .quote-line::before {{
+        .quote-line::before {
             content: "▶ ";
             color: #72767d;
             font-weight: bold;
             font-style: normal;
-        }}
+        }
         
-        .discord-link {{
+        .discord-link {
             color: #00b0f4;
             text-decoration: none;
             word-break: break-all;
-        }}
+        }
         
-        .discord-link:hover {{
+        .discord-link:hover {
             text-decoration: underline;
-        }}
+        }
         
-        .message-reply {{
+        .message-reply {
             background: #2f3136;
             border-left: 4px solid #4f545c;
             margin: 4px 0;
@@ -1188,28 +1656,28 @@ class TranscriptButton(discord.ui.Button):
             border-radius: 0 4px 4px 0;
             color: #b5b6b8;
             font-style: italic;
-        }}
+        }
         
-        .message-reply::before {{
+        .message-reply::before {
             content: "↳ ";
             color: #72767d;
             font-weight: bold;
-        }}
+        }
         
-        .video-attachment {{
+        .video-attachment {
             max-width: 500px;
             border-radius: 8px;
             margin: 8px 0;
-        }}
+        }
         
-        .video-container {{
+        .video-container {
             position: relative;
             display: inline-block;
             border-radius: 8px;
             overflow: hidden;
-        }}
+        }
         
-        .video-controls {{
+        .video-controls {
             background: rgba(0, 0, 0, 0.8);
             color: white;
             padding: 8px;
@@ -1217,21 +1685,21 @@ class TranscriptButton(discord.ui.Button):
             display: flex;
             justify-content: space-between;
             align-items: center;
-        }}
+        }
         
-        .image-attachment {{
+        .image-attachment {
             max-width: 500px;
             border-radius: 8px;
             margin: 8px 0;
             cursor: pointer;
             transition: transform 0.2s ease;
-        }}
+        }
         
-        .image-attachment:hover {{
+        .image-attachment:hover {
             transform: scale(1.02);
-        }}
+        }
         
-        .media-modal {{
+        .media-modal {
             display: none;
             position: fixed;
             z-index: 9999;
@@ -1241,10 +1709,10 @@ class TranscriptButton(discord.ui.Button):
             height: 100%;
             background: rgba(0, 0, 0, 0.9);
             cursor: pointer;
-        }}
+        }
         
         .media-modal img,
-        .media-modal video {{
+        .media-modal video {
             position: absolute;
             top: 50%;
             left: 50%;
@@ -1252,9 +1720,9 @@ class TranscriptButton(discord.ui.Button):
             max-width: 90%;
             max-height: 90%;
             object-fit: contain;
-        }}
+        }
         
-        .close-modal {{
+        .close-modal {
             position: absolute;
             top: 20px;
             right: 30px;
@@ -1263,78 +1731,78 @@ class TranscriptButton(discord.ui.Button):
             font-weight: bold;
             cursor: pointer;
             z-index: 10000;
-        }}
+        }
         
-        .close-modal:hover {{
+        .close-modal:hover {
             color: #ccc;
-        }}
+        }
         
-        .embed {{
+        .embed {
             border-left: 4px solid #5865f2;
             background: #2f3136;
             margin: 8px 0;
             border-radius: 0 4px 4px 0;
             padding: 16px;
             max-width: 520px;
-        }}
+        }
         
-        .embed-title {{
+        .embed-title {
             color: #00b0f4;
             font-size: 16px;
             font-weight: 600;
             margin-bottom: 8px;
-        }}
+        }
         
-        .embed-description {{
+        .embed-description {
             color: #dcddde;
             font-size: 14px;
             line-height: 1.375;
             margin-bottom: 8px;
-        }}
+        }
         
-        .embed-field {{
+        .embed-field {
             margin-bottom: 8px;
-        }}
+        }
         
-        .embed-field-name {{
+        .embed-field-name {
             color: #ffffff;
             font-size: 14px;
             font-weight: 600;
             margin-bottom: 2px;
-        }}
+        }
         
-        .embed-field-value {{
+        .embed-field-value {
             color: #dcddde;
             font-size: 14px;
-        }}
+        }
         
-        .embed-footer {{
+        .embed-footer {
             color: #72767d;
             font-size: 12px;
             margin-top: 8px;
-        }}
+        }
         
-        .attachment {{
+        .attachment {
             background: #2f3136;
             border: 1px solid #40444b;
             border-radius: 8px;
             padding: 16px;
             margin: 8px 0;
             max-width: 400px;
-        }}
+        }
         
-        .attachment-name {{
+        .attachment-name {
             color: #00b0f4;
             font-weight: 500;
             margin-bottom: 4px;
-        }}
+        }
         
-        .attachment-size {{
+        .attachment-size {
             color: #72767d;
             font-size: 12px;
-        }}
+        }
         
-        .button {{
+        .button {
             background: #5865f2;
             color: #ffffff;
             border: none;
@@ -1345,155 +1813,159 @@ class TranscriptButton(discord.ui.Button):
             margin: 4px 8px 4px 0;
             cursor: pointer;
             display: inline-block;
-        }}
+        }
         
-        .button:hover {{
+        .button:hover {
             background: #4752c4;
-        }}
+        }
         
-        .button.secondary {{
+        .button.secondary {
             background: #4f545c;
-        }}
+        }
         
-        .button.secondary:hover {{
+        .button.secondary:hover {
             background: #5d6269;
-        }}
+        }
         
-        .button.danger {{
+        .button.danger {
             background: #ed4245;
-        }}
+        }
         
-        .button.danger:hover {{
+        .button.danger:hover {
             background: #c03537;
-        }}
+        }
         
-        .button.success {{
+        .button.success {
             background: #3ba55d;
-        }}
+        }
         
-        .button.success:hover {{
+        .button.success:hover {
             background: #2d7d32;
-        }}
+        }
         
-        .footer {{
+        .footer {
             background: #2f3136;
             padding: 20px;
             text-align: center;
             border-top: 1px solid #202225;
             margin-top: 40px;
-        }}
+        }
         
-        .footer-text {{
+        .footer-text {
             color: #72767d;
             font-size: 14px;
-        }}
+        }
         
-        .footer-links {{
+        .footer-links {
             margin-top: 10px;
-        }}
+        }
         
-        .footer-link {{
+        .footer-link {
             color: #00b0f4;
             text-decoration: none;
             margin: 0 10px;
-        }}
+        }
         
-        .footer-link:hover {{
+        .footer-link:hover {
             text-decoration: underline;
-        }}
+        }
         
-        @media (max-width: 768px) {{
-            .header {{
+        @media (max-width: 768px) {
+            .header {
                 padding: 10px;
-            }}
+            }
             
-            .header h1 {{
+            .header h1 {
                 font-size: 18px;
                 flex-direction: column;
                 align-items: flex-start;
                 gap: 8px;
-            }}
+            }
             
-            .ticket-icon {{
+            .ticket-icon {
                 width: 30px;
                 height: 30px;
                 margin-right: 8px;
-            }}
+            }
             
-            .header-info {{
+            .header-info {
                 grid-template-columns: 1fr;
                 gap: 8px;
                 margin-top: 10px;
-            }}
+            }
             
-            .info-item {{
+            .info-item {
                 padding: 8px;
-            }}
+            }
             
-            .info-label {{
+            .info-label {
                 font-size: 11px;
-            }}
+            }
             
-            .info-value {{
+            .info-value {
                 font-size: 13px;
                 word-break: break-word;
-            }}
+            }
             
-            .messages {{
+            .messages {
                 padding: 10px 5px;
-            }}
+            }
             
-            .message {{
+            .message {
                 margin-bottom: 15px;
-            }}
+            }
             
-            .avatar {{
+            .avatar {
                 width: 32px;
                 height: 32px;
                 margin-right: 12px;
-            }}
+            }
+            
+            .message-continued .message-content {
+                margin-left: 44px;
+            }
             
-            .username {{
+            .username {
                 font-size: 14px;
-            }}
+            }
             
-            .timestamp {{
+            .timestamp {
                 font-size: 11px;
-            }}
+            }
             
-            .message-text {{
+            .message-text {
                 font-size: 14px;
                 line-height: 1.4;
-            }}
+            }
             
-            .embed {{
+            .embed {
                 padding: 12px;
                 max-width: 100%;
-            }}
+            }
             
-            .embed-title {{
+            .embed-title {
                 font-size: 15px;
-            }}
+            }
             
-            .embed-description {{
+            .embed-description {
                 font-size: 13px;
-            }}
+            }
             
-            .attachment {{
+            .attachment {
                 max-width: 100%;
                 padding: 12px;
-            }}
+            }
             
-            .message-reply {{
+            .message-reply {
                 padding: 6px 10px;
                 margin: 2px 0;
                 font-size: 13px;
-            }}
-        }}
-    </style>
-    <script>
-        // Enhanced Discord markdown parser with emoji and reply support
-        function parseDiscordMarkdown(text) {{
+            }
+        }
+"""
+
+TRANSCRIPT_JS = """        // Enhanced Discord markdown parser with emoji and reply support
+        function parseDiscordMarkdown(text) {
             if (!text || typeof text !== 'string') return '';
             
             // First preserve any existing HTML entities
@@ -1504,9 +1976,9 @@ class TranscriptButton(discord.ui.Button):
                       .replace(/'/g, '&#39;');
             
             // Handle code blocks first (triple backticks with language support)
-            text = text.replace(/```([a-zA-Z]*)?\\n?([\\s\\S]*?)```/g, function(match, lang, code) {{
+            text = text.replace(/```([a-zA-Z]*)?\\n?([\\s\\S]*?)```/g, function(match, lang, code) {
                 return '<pre class="code-block" data-lang="' + (lang || '') + '">' + code.trim() + '</pre>';
-            }});
+            });
             
             // Handle inline code (single backticks)
             text = text.replace(/`([^`\\n]+)`/g, '<code class="inline-code">$1</code>');
@@ -1514,11 +1986,11 @@ class TranscriptButton(discord.ui.Button):
             // Handle Discord formatting with proper escaping
             // Bold (**text** or __text__)
             text = text.replace(/\\*\\*([^*\\n]+?)\\*\\*/g, '<strong>$1</strong>');
-            text = text.replace(/(?<!_)__([^_\\n]+?)__(?!_)/g, '<strong>$1</strong>');
+            text = text.replace(/(?<!\\w)__([^_\\n]+?)__(?!\\w)/g, '<strong>$1</strong>');
             
             // Italic (*text* or _text_) - be careful not to interfere with bold
             text = text.replace(/(?<!\\*)\\*([^*\\n]+?)\\*(?!\\*)/g, '<em>$1</em>');
-            text = text.replace(/(?<!_)_([^_\\n]+?)_(?!_)/g, '<em>$1</em>');
+            text = text.replace(/(?<!\\w)_([^_\\n]+?)_(?!\\w)/g, '<em>$1</em>');
             
             // Strikethrough (~~text~~)
             text = text.replace(/~~([^~\\n]+?)~~/g, '<s>$1</s>');
@@ -1532,11 +2004,11 @@ class TranscriptButton(discord.ui.Button):
             text = text.replace(/&lt;@&amp;(\\d+)&gt;/g, '<span class="role-mention">@role</span>');
             
             // Handle custom Discord emojis with animated support
-            text = text.replace(/&lt;(a?):(\\w+):(\\d+)&gt;/g, function(match, animated, name, id) {{
+            text = text.replace(/&lt;(a?):(\\w+):(\\d+)&gt;/g, function(match, animated, name, id) {
                 const extension = animated ? 'gif' : 'png';
                 const emojiUrl = 'https://cdn.discordapp.com/emojis/' + id + '.' + extension;
                 return '<img class="emoji" src="' + emojiUrl + '" alt=":' + name + ':" title=":' + name + '" loading="lazy" onerror="this.outerHTML=\\'&lt;:' + name + ':' + id + '&gt;\\'">';
-            }});
+            });
             
             // Handle Discord headers (## text)
             text = text.replace(/^### (.+)$/gm, '<h3 class="discord-header">$1</h3>');
@@ -1553,140 +2025,651 @@ class TranscriptButton(discord.ui.Button):
             text = text.replace(/\\n/g, '<br>');
             
             return text;
-        }}
+        }
         
         // Function to render Unicode emojis properly
-        function enhanceUnicodeEmojis(text) {{
+        function enhanceUnicodeEmojis(text) {
             // This function ensures Unicode emojis render properly
             // by wrapping them in spans with emoji font fallbacks
             const emojiRegex = abc
             return text.replace(emojiRegex, '<span class="unicode-emoji">$1</span>');
-        }}
+        }
         
         // Media modal functions
-        function openModal(src, type) {{
+        function openModal(src, type) {
             const modal = document.getElementById('mediaModal');
             const modalContent = document.getElementById('modalContent');
             
-            if (type === 'video') {{
-                modalContent.innerHTML = `<video controls autoplay style="max-width: 90%; max-height: 90%;"><source src="${{src}}" type="video/mp4">Your browser does not support the video tag.</video>`;
-            }} else {{
-                modalContent.innerHTML = `<img src="${{src}}" style="max-width: 90%; max-height: 90%; object-fit: contain;">`;
-            }}
+            if (type === 'video') {
+                modalContent.innerHTML = `<video controls autoplay style="max-width: 90%; max-height: 90%;"><source src="${src}" type="video/mp4">Your browser does not support the video tag.</video>`;
+            } else {
+                modalContent.innerHTML = `<img src="${src}" style="max-width: 90%; max-height: 90%; object-fit: contain;">`;
+            }
             
             modal.style.display = 'block';
-        }}
+        }
         
-        function closeModal() {{
+        function closeModal() {
             document.getElementById('mediaModal').style.display = 'none';
-        }}
+        }
         
         // Initialize page
-        document.addEventListener('DOMContentLoaded', function() {{
-            // Parse all message text for Discord markdown and emojis
-            const messageTexts = document.querySelectorAll('.message-text');
-            messageTexts.forEach(function(element) {{
-                if (element.textContent && element.textContent.trim()) {{
+        document.addEventListener('DOMContentLoaded', function() {
+            // Parse Discord markdown and emojis in text the bot did not pre-render
+            const messageTexts = document.querySelectorAll('.message-text:not([data-markdown])');
+            messageTexts.forEach(function(element) {
+                if (element.textContent && element.textContent.trim()) {
                     const originalText = element.textContent;
                     let parsedText = parseDiscordMarkdown(originalText);
                     parsedText = enhanceUnicodeEmojis(parsedText);
                     element.innerHTML = parsedText;
-                }}
-            }});
+                }
+            });
             
             // Add retry mechanism for failed emoji images
-            setTimeout(function() {{
+            setTimeout(function() {
                 const failedEmojis = document.querySelectorAll('.emoji[src*="discordapp.com"]');
-                failedEmojis.forEach(function(img) {{
-                    if (img.naturalHeight === 0) {{
+                failedEmojis.forEach(function(img) {
+                    if (img.naturalHeight === 0) {
                         // Try alternative CDN or fallback
                         const originalSrc = img.src;
                         const emojiId = originalSrc.match(/emojis\\/(\\d+)\\./);
                         const emojiName = img.title.replace(/:/g, '');
                         
-                        if (emojiId) {{
+                        if (emojiId) {
                             // Try webp format as fallback
                             const newSrc = originalSrc.replace(/\\.(png|gif)$/, '.webp');
                             img.src = newSrc;
                             
-                            img.onerror = function() {{
+                            img.onerror = function() {
                                 // Final fallback to text
                                 this.outerHTML = '<span class="emoji-fallback" title="' + emojiName + '">:' + emojiName + ':</span>';
-                            }};
-                        }}
-                    }}
-                }});
-            }}, 2000);
+                            };
+                        }
+                    }
+                });
+            }, 2000);
             
             // Also process embed content
-            const embedDescriptions = document.querySelectorAll('.embed-description, .embed-field-value');
-            embedDescriptions.forEach(function(element) {{
-                if (element.textContent && element.textContent.trim()) {{
+            const embedDescriptions = document.querySelectorAll('.embed-description:not([data-markdown]), .embed-field-value:not([data-markdown])');
+            embedDescriptions.forEach(function(element) {
+                if (element.textContent && element.textContent.trim()) {
                     const originalText = element.textContent;
                     let parsedText = parseDiscordMarkdown(originalText);
                     parsedText = enhanceUnicodeEmojis(parsedText);
                     element.innerHTML = parsedText;
-                }}
-            }});
-            
-            // Add click handlers for images and videos
-            const images = document.querySelectorAll('.image-attachment');
-            images.forEach(function(img) {{
-                img.addEventListener('click', function() {{
-                    openModal(this.src, 'image');
-                }});
-            }});
+                }
+            });
             
-            const videos = document.querySelectorAll('.video-attachment');
-            videos.forEach(function(video) {{
-                video.addEventListener('click', function() {{
-                    openModal(this.src, 'video');
-                }});
-            }});
+            // Click handlers for images, videos and spoilers, delegated so that
+            // lazily loaded transcript pages get them too
+            document.addEventListener('click', function(e) {
+                const target = e.target;
+                if (target.matches('.image-attachment')) {
+                    openModal(target.src, 'image');
+                } else if (target.matches('.video-attachment')) {
+                    openModal(target.src, 'video');
+                } else if (target.closest('.spoiler:not([onclick])')) {
+                    target.closest('.spoiler').classList.toggle('revealed');
+                }
+            });
             
             // Close modal when clicking outside
-            document.getElementById('mediaModal').addEventListener('click', function(e) {{
-                if (e.target === this) {{
+            document.getElementById('mediaModal').addEventListener('click', function(e) {
+                if (e.target === this) {
                     closeModal();
-                }}
-            }});
+                }
+            });
             
-            // Handle spoiler clicks
-            const spoilers = document.querySelectorAll('.spoiler');
-            spoilers.forEach(function(spoiler) {{
-                spoiler.addEventListener('click', function() {{
-                    this.classList.toggle('revealed');
-                }});
-            }});
-        }});
-    </script>
-</head>
-<body>
-    <!-- Media Modal -->
-    <div id="mediaModal" class="media-modal">
-        <span class="close-modal" onclick="closeModal()">&times;</span>
-        <div id="modalContent"></div>
+            // Long transcripts keep later pages as inert text until they scroll into view
+            const more = document.querySelector('.transcript-more');
+            if (more) {
+                const observer = new IntersectionObserver(function(entries) {
+                    if (!entries[0].isIntersecting) return;
+                    const page = document.querySelector('script.transcript-page');
+                    if (!page) {
+                        observer.disconnect();
+                        more.remove();
+                        return;
+                    }
+                    page.insertAdjacentHTML('beforebegin', page.textContent.replace(/<\\\\(\\/script|!--)/gi, '<$1'));
+                    page.remove();
+                    // Observe again so a page shorter than the screen loads the next one too
+                    observer.unobserve(more);
+                    observer.observe(more);
+                }, { rootMargin: '2000px' });
+                observer.observe(more);
+            }
+        });
+"""
+
+# Changes whenever the stylesheet or scripts do, so cached shared assets are never stale
+TRANSCRIPT_ASSET_VERSION = hashlib.sha256((TRANSCRIPT_CSS + TRANSCRIPT_JS).encode("utf-8")).hexdigest()[:12]
+
+TRANSCRIPT_INLINE_ASSET_TAGS = f"""    <style>
+{TRANSCRIPT_CSS}    </style>
+    <script>
+{TRANSCRIPT_JS}    </script>
+"""
+
+# Transcripts are written to transcripts/{guild_id}/, one level below the shared assets
+TRANSCRIPT_SHARED_ASSET_TAGS = f"""    <link rel="stylesheet" href="{{root}}/transcript-{TRANSCRIPT_ASSET_VERSION}.css">
+    <script src="{{root}}/transcript-{TRANSCRIPT_ASSET_VERSION}.js"></script>
+"""
+
+TRANSCRIPT_HTML_FOOTER = """
+        </div>
+        
+        <div class="footer">
+            <div class="footer-text">
+                Discord Ticket Transcript • Generated by Enhanced Ticket Bot
+            </div>
+            <div class="footer-links">
+                <a href="#" class="footer-link">🎫 Close Ticket</a>
+                <a href="#" class="footer-link">🎯 Claim Ticket</a>
+                <a href="#" class="footer-link">📄 Generate New Transcript</a>
+                <a href="#" class="footer-link">✏️ Rename Channel</a>
+            </div>
+        </div>
     </div>
-    <div class="transcript-container">
-        <div class="header">
-            <h1>
-                <div class="ticket-icon">🎫</div>
-                Ticket #{self.ticket_id} Transcript
-            </h1>
-            <div class="header-info">
-                <div class="info-item">
-                    <div class="info-label">Server</div>
-                    <div class="info-value">{guild.name}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Channel</div>
-                    <div class="info-value">#{channel.name}</div>
-                </div>
-                <div class="info-item">
-                    <div class="info-label">Created By</div>
-                    <div class="info-value">{creator.display_name if creator else 'Unknown User'}</div>
-                </div>
-                <div class="info-item">
+</body>
+</html>
+"""
+
+def unique_temp_path(path):
+    """A temp file beside path that no concurrent writer (thread or render process) shares"""
+    return f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+def write_shared_transcript_assets(directory=TRANSCRIPT_ASSETS_DIR):
+    """Write this version's transcript.css/.js under directory unless they already exist"""
+    os.makedirs(directory, exist_ok=True)
+    for extension, content in (("css", TRANSCRIPT_CSS), ("js", TRANSCRIPT_JS)):
+        path = os.path.join(directory, f"transcript-{TRANSCRIPT_ASSET_VERSION}.{extension}")
+        if not os.path.exists(path):
+            temp_path = unique_temp_path(path)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+
+def transcript_asset_tags(mode=None, root=".."):
+    """Stylesheet and script tags for the head of an HTML transcript
+
+    root is the relative path from the transcript's folder to the shared assets.
+    """
+    if (mode or TRANSCRIPT_ASSETS) == "shared":
+        write_shared_transcript_assets()
+        return TRANSCRIPT_SHARED_ASSET_TAGS.format(root=root)
+    return TRANSCRIPT_INLINE_ASSET_TAGS
+
+# ===== TRANSCRIPT CAPTURE =====
+
+def capture_message(msg):
+    """Convert a discord.Message into the record consumed by every transcript renderer"""
+    # Get user avatar
+    avatar_url = msg.author.avatar.url if msg.author.avatar else msg.author.default_avatar.url
+
+    return {
+        'id': msg.id,
+        'author': {
+            'id': msg.author.id,
+            'username': msg.author.name,
+            'display_name': msg.author.display_name,
+            'avatar_url': avatar_url,
+            'bot': msg.author.bot
+        },
+        'content': msg.content,
+        'timestamp': msg.created_at,
+        'embeds': [
+            {
+                'title': embed.title,
+                'description': embed.description,
+                'color': embed.color.value if embed.color else None,
+                'fields': [{'name': field.name, 'value': field.value, 'inline': field.inline} for field in embed.fields],
+                'footer': embed.footer.text if embed.footer else None,
+                'thumbnail': embed.thumbnail.url if embed.thumbnail else None,
+                'image': embed.image.url if embed.image else None
+            }
+            for embed in msg.embeds
+        ],
+        'attachments': [
+            {
+                'filename': attachment.filename,
+                'url': attachment.url,
+                'size': attachment.size
+            }
+            for attachment in msg.attachments
+        ]
+    }
+
+def transcript_records_path(guild_id, ticket_id):
+    """Append-only JSON lines journal of every message record captured for a ticket"""
+    return os.path.join("transcripts", str(guild_id), "records", f"{ticket_id}.jsonl")
+
+def canonical_transcript_path(guild_id, ticket_id):
+    """The stored transcript of a closed ticket: gzip NDJSON of its context and message records"""
+    return os.path.join("transcripts", str(guild_id), f"transcript_{ticket_id}.ndjson.gz")
+
+def write_canonical_transcript(path, context, messages_data):
+    """Atomically write the context line followed by one line per message record"""
+    header = {key: value for key, value in context.items() if key != 'message_count'}
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+        f.write(json.dumps(header, ensure_ascii=False) + "\n")
+        for record in messages_data:
+            f.write(json.dumps(transcript_journal_entry(record), ensure_ascii=False) + "\n")
+    os.replace(path + ".tmp", path)
+
+def read_canonical_transcript(path):
+    """Load (context, message records) from a canonical transcript"""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        context = json.loads(next(f))
+        messages_data = []
+        for line in f:
+            record = json.loads(line)
+            record['timestamp'] = datetime.datetime.fromisoformat(record['timestamp'])
+            messages_data.append(record)
+    context['message_count'] = len(messages_data)
+    return context, messages_data
+
+def load_transcript_records(guild_id, ticket_id):
+    """Replay a ticket's message journal into (records oldest first, synced message ID)
+
+    Replay starts from the canonical transcript of an earlier close, if any.
+    Later lines win, so an edit replaces the earlier record and a deletion drops
+    it. The synced ID is the newest message up to which the journal is known to
+    be complete; messages after it may have been missed while the bot was offline.
+    """
+    records = {}
+    synced_id = 0
+    canonical_path = canonical_transcript_path(guild_id, ticket_id)
+    if os.path.exists(canonical_path):
+        for record in read_canonical_transcript(canonical_path)[1]:
+            records[record['id']] = record
+            synced_id = max(synced_id, record['id'])
+    try:
+        with open(transcript_records_path(guild_id, ticket_id), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn write from a crash; those messages are fetched again
+                if entry.pop('deleted', False):
+                    records.pop(entry['id'], None)
+                    continue
+                if entry.pop('synced', False):
+                    synced_id = max(synced_id, entry['id'])
+                entry['timestamp'] = datetime.datetime.fromisoformat(entry['timestamp'])
+                records[entry['id']] = entry
+    except FileNotFoundError:
+        pass
+    return sorted(records.values(), key=lambda record: record['id']), synced_id
+
+def transcript_journal_entry(record, synced=False):
+    """JSON-ready journal line for a message record"""
+    entry = dict(record, timestamp=record['timestamp'].isoformat())
+    if synced:
+        entry['synced'] = True
+    return entry
+
+def append_transcript_journal(guild_id, ticket_id, entries):
+    """Append journal lines (message records or deletions) to a ticket's message journal"""
+    path = transcript_records_path(guild_id, ticket_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+# One writer per ticket journal at a time, so captures and live events never interleave
+transcript_capture_locks = {}
+
+# Tickets whose journal has received every message event since it was last synced in
+# this gateway session; only these can be transcribed without touching the history
+transcript_live_tickets = {}
+
+# Channel ID -> transcript_key of open tickets, so message events in other channels are
+# dropped without a storage lookup. Every live ticket is in here; events of a ticket
+# missing from it are recovered by the next capture's history fill.
+ticket_channels = {}
+
+# Journal writes started by on_message, referenced until done so they are not collected
+transcript_journal_tasks = {}
+
+def transcript_key(guild_id, ticket_id):
+    """Normalise ids from buttons (ints) and the ticket index (strings) into one key"""
+    return str(guild_id), str(ticket_id)
+
+def transcript_lock(guild_id, ticket_id):
+    """The journal lock of a ticket"""
+    return transcript_capture_locks.setdefault(transcript_key(guild_id, ticket_id), asyncio.Lock())
+
+def track_ticket_channel(guild_id, ticket_id, channel_id):
+    """Journal message events of channel_id into the ticket's transcript"""
+    ticket_channels[channel_id] = transcript_key(guild_id, ticket_id)
+
+def forget_ticket_channel(guild_id, ticket_id, channel_id):
+    """Stop journaling a closed or deleted ticket and drop its in-memory state"""
+    key = transcript_key(guild_id, ticket_id)
+    ticket_channels.pop(channel_id, None)
+    transcript_live_tickets.pop(key, None)
+    lock = transcript_capture_locks.get(key)
+    if lock is not None and not lock.locked():
+        del transcript_capture_locks[key]
+
+async def capture_ticket_history(guild_id, ticket_id, channel):
+    """Return every message record of a ticket from its journal, filling any gap from history
+
+    The on_message listeners keep the journal current, so a ticket that has been
+    live since its last sync needs no fetch at all. Otherwise only the messages
+    after the synced ID are fetched (those sent while the bot was offline, or the
+    whole channel the first time). Returns (records, fetched_count).
+    """
+    key = transcript_key(guild_id, ticket_id)
+    async with transcript_lock(guild_id, ticket_id):
+        records, synced_id = await run_storage_io(load_transcript_records, guild_id, ticket_id)
+        new_records = []
+        if key not in transcript_live_tickets:
+            after = discord.Object(id=synced_id) if synced_id else None
+            new_records = [
+                capture_message(msg)
+                async for msg in channel.history(limit=None, after=after, oldest_first=True)
+            ]
+            # The fetch is authoritative after the synced ID: it replaces messages already
+            # journaled live and drops those deleted while nobody was listening
+            fetched = {record['id'] for record in new_records}
+            stale = [record['id'] for record in records if record['id'] > synced_id and record['id'] not in fetched]
+            entries = [{'id': message_id, 'deleted': True} for message_id in stale]
+            entries.extend(transcript_journal_entry(record, synced=True) for record in new_records)
+            if entries:
+                await run_storage_io(append_transcript_journal, guild_id, ticket_id, entries)
+            records = [record for record in records if record['id'] <= synced_id] + new_records
+            track_ticket_channel(guild_id, ticket_id, channel.id)
+            transcript_live_tickets[key] = True
+    return records, len(new_records)
+
+async def seal_ticket_transcript(guild_id, ticket_id, channel_id, context):
+    """Fold a closing ticket's journal into its canonical transcript and drop the journal
+
+    The channel stops being journaled first, so the closing messages the bot still
+    sends there cannot start a new journal. Returns the message records, so the
+    close can render from them directly.
+    """
+    async with transcript_lock(guild_id, ticket_id):
+        ticket_channels.pop(channel_id, None)
+        transcript_live_tickets.pop(transcript_key(guild_id, ticket_id), None)
+
+        def seal():
+            messages_data, _ = load_transcript_records(guild_id, ticket_id)
+            write_canonical_transcript(canonical_transcript_path(guild_id, ticket_id), context, messages_data)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(transcript_records_path(guild_id, ticket_id))
+            return messages_data
+        return await run_storage_io(seal)
+
+async def journal_ticket_events(channel_id, entries, new_message=False):
+    """Append live message events to the journal of the ticket owning channel_id"""
+    key = ticket_channels.get(channel_id)
+    if key is None:
+        return
+    guild_id, ticket_id = key
+    async with transcript_lock(guild_id, ticket_id):
+        if ticket_channels.get(channel_id) != key:
+            return  # Sealed while this event waited for the lock
+        # A new message only extends the complete prefix if no event was missed before it
+        if new_message and transcript_key(guild_id, ticket_id) in transcript_live_tickets:
+            for entry in entries:
+                entry['synced'] = True
+        await run_storage_io(append_transcript_journal, guild_id, ticket_id, entries)
+
+def iter_log_message(index, msg_data):
+    """Render one message record as plain-text ticket log lines (the format -reopen parses)"""
+    timestamp = msg_data['timestamp'].strftime("%Y-%m-%d %H:%M:%S UTC")
+    author = msg_data['author']
+    author_info = f"{author['id']}|{author['username']}|{author['display_name']}"
+
+    if msg_data['content']:
+        yield f"[{timestamp}] {author_info}: {msg_data['content']}\n"
+
+    for embed in msg_data['embeds']:
+        if embed['title']:
+            yield f"[{timestamp}] {author_info} sent embed: {embed['title']}\n"
+
+    for attachment in msg_data['attachments']:
+        yield f"[{timestamp}] {author_info} sent attachment: {attachment['filename']} ({attachment['url']})\n"
+
+# ===== ATTACHMENT ARCHIVE =====
+
+# Attachments and avatars are copied into transcripts/{guild}/blobs/<sha256> so transcripts
+# outlive the ticket channel and Discord's expiring CDN links
+TRANSCRIPT_ARCHIVE_ATTACHMENTS = os.getenv("TRANSCRIPT_ARCHIVE_ATTACHMENTS", "true").lower() == "true"
+ATTACHMENT_ARCHIVE_CONCURRENCY = int(os.getenv("ATTACHMENT_ARCHIVE_CONCURRENCY", "4"))
+ATTACHMENT_ARCHIVE_MAX_BYTES = int(os.getenv("ATTACHMENT_ARCHIVE_MAX_BYTES", str(25 * 1024 * 1024)))
+ATTACHMENT_ARCHIVE_TIMEOUT = float(os.getenv("ATTACHMENT_ARCHIVE_TIMEOUT", "30"))
+
+# Shared across archive runs so downloads reuse pooled connections; closed with the bot
+http_session = None
+
+# One archive run per guild at a time, so the blob index never loses an update
+blob_index_locks = {}
+
+def get_http_session():
+    """The shared aiohttp session, created on first use inside the running loop"""
+    global http_session
+    if http_session is None or http_session.closed:
+        http_session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=ATTACHMENT_ARCHIVE_TIMEOUT),
+            connector=aiohttp.TCPConnector(limit=ATTACHMENT_ARCHIVE_CONCURRENCY)
+        )
+    return http_session
+
+async def close_http_session():
+    """Close the shared aiohttp session if one was opened"""
+    if http_session is not None and not http_session.closed:
+        await http_session.close()
+
+def blob_dir(guild_id):
+    """Content-addressed store shared by every transcript of a guild"""
+    return os.path.join("transcripts", str(guild_id), "blobs")
+
+def blob_key(url):
+    """CDN URLs carry expiring signatures in the query; the path identifies the file"""
+    return url.split("?", 1)[0]
+
+def load_blob_index(directory):
+    """Read the blob-key -> sha256 index of a blob store"""
+    try:
+        with open(os.path.join(directory, "index.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def store_blob(directory, data):
+    """Write data under its sha256 (once) and return the digest"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = os.path.join(directory, digest)
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        temp_path = unique_temp_path(path)
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+    return digest
+
+async def download_blob(session, url, max_bytes):
+    """Fetch url into memory, giving up (None) on errors or once it exceeds max_bytes"""
+    try:
+        async with session.get(url) as response:
+            if response.status != 200 or (response.content_length or 0) > max_bytes:
+                return None
+            data = bytearray()
+            async for chunk in response.content.iter_chunked(64 * 1024):
+                data.extend(chunk)
+                if len(data) > max_bytes:
+                    return None
+            return bytes(data)
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return None
+
+async def archive_transcript_assets(guild_id, messages_data):
+    """Copy every attachment and avatar of a ticket into the guild's blob store
+
+    Files already in the store (from this or any other ticket) are not fetched
+    again. At most ATTACHMENT_ARCHIVE_CONCURRENCY downloads run at once, each
+    buffered up to ATTACHMENT_ARCHIVE_MAX_BYTES. Returns {remote url: path
+    relative to the guild's transcript folder} for every archived file;
+    anything oversized or unreachable keeps its remote URL.
+    """
+    urls = {}
+    for msg_data in messages_data:
+        urls[msg_data['author']['avatar_url']] = True
+        for attachment in msg_data['attachments']:
+            if attachment['size'] <= ATTACHMENT_ARCHIVE_MAX_BYTES:
+                urls[attachment['url']] = True
+
+    directory = blob_dir(guild_id)
+    session = get_http_session()
+    semaphore = asyncio.Semaphore(ATTACHMENT_ARCHIVE_CONCURRENCY)
+
+    async with blob_index_locks.setdefault(str(guild_id), asyncio.Lock()):
+        index = await run_storage_io(load_blob_index, directory)
+        missing = {blob_key(url): url for url in urls if blob_key(url) not in index}
+
+        async def archive(key, url):
+            async with semaphore:
+                data = await download_blob(session, url, ATTACHMENT_ARCHIVE_MAX_BYTES)
+            if data is not None:
+                index[key] = await run_storage_io(store_blob, directory, data)
+
+        await asyncio.gather(*(archive(key, url) for key, url in missing.items()))
+        if missing:
+            await run_storage_io(JsonDocumentCache.write_file, os.path.join(directory, "index.json"), index)
+
+    return {url: f"blobs/{index[blob_key(url)]}" for url in urls if blob_key(url) in index}
+
+def localize_message_urls(msg_data, asset_urls):
+    """Copy of a message record pointing at archived attachments, keeping the remote URLs as fallbacks"""
+    return dict(
+        msg_data,
+        attachments=[
+            dict(attachment, url=asset_urls.get(attachment['url'], attachment['url']), remote_url=attachment['url'])
+            for attachment in msg_data['attachments']
+        ]
+    )
+
+# ===== TRANSCRIPT RENDERING =====
+
+def transcript_context(ticket_id, ticket_info, guild, channel, message_count):
+    """Plain values the transcript headers need, so rendering never touches Discord objects"""
+    creator_id = ticket_info.get('creator_id')
+    creator = guild.get_member(creator_id) if creator_id else None
+    return {
+        'ticket_id': ticket_id,
+        'ticket_info': ticket_info,
+        'guild_name': guild.name,
+        'channel_name': channel.name,
+        'creator_name': creator.display_name if creator else 'Unknown User',
+        'message_count': message_count
+    }
+
+# Discord markdown is rendered to HTML once while the transcript is written; the
+# transcript's own parser only handles elements without data-markdown (older files)
+MARKDOWN_MEMO_SIZE = int(os.getenv("MARKDOWN_MEMO_SIZE", "4096"))
+MARKDOWN_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;", "\x00": ""})
+MARKDOWN_STASH = re.compile(r"\x00(\d+)\x00")
+MARKDOWN_CODE_BLOCK = re.compile(r"```([a-zA-Z]*)?\n?([\s\S]*?)```")
+MARKDOWN_INLINE_CODE = re.compile(r"`([^`\n]+)`")
+MARKDOWN_LINK = re.compile(r"https?://(?:[^\s&<\x00]|&amp;)+")
+MARKDOWN_CUSTOM_EMOJI = re.compile(r"&lt;(a?):(\w+):(\d+)&gt;")
+MARKDOWN_INLINE_RULES = [
+    (re.compile(r"\*\*([^*\n]+?)\*\*"), r"<strong>\1</strong>"),
+    # Underscores only count at word edges, so snake_case_names stay intact as in Discord
+    (re.compile(r"(?<!\w)__([^_\n]+?)__(?!\w)"), r"<strong>\1</strong>"),
+    (re.compile(r"(?<!\*)\*([^*\n]+?)\*(?!\*)"), r"<em>\1</em>"),
+    (re.compile(r"(?<!\w)_([^_\n]+?)_(?!\w)"), r"<em>\1</em>"),
+    (re.compile(r"~~([^~\n]+?)~~"), r"<s>\1</s>"),
+    (re.compile(r"\|\|([^|\n]+?)\|\|"), r'<span class="spoiler">\1</span>'),
+    (re.compile(r"&lt;@!?(\d+)&gt;"), r'<span class="mention">@User</span>'),
+    (re.compile(r"&lt;#(\d+)&gt;"), r'<span class="channel-mention">#channel</span>'),
+    (re.compile(r"&lt;@&amp;(\d+)&gt;"), r'<span class="role-mention">@role</span>'),
+    (re.compile(r"^### (.+)$", re.MULTILINE), r'<h3 class="discord-header">\1</h3>'),
+    (re.compile(r"^## (.+)$", re.MULTILINE), r'<h2 class="discord-header">\1</h2>'),
+    (re.compile(r"^# (.+)$", re.MULTILINE), r'<h1 class="discord-header">\1</h1>'),
+    (re.compile(r"^&gt; (.+)$", re.MULTILINE), r'<div class="quote-line">\1</div>'),
+]
+
+@functools.lru_cache(maxsize=MARKDOWN_MEMO_SIZE)
+def render_discord_markdown(text):
+    """Escape text and render Discord markdown (code, emphasis, spoilers, mentions, emoji, headers, quotes, links) to HTML
+
+    Memoized, so greetings, canned replies and embeds repeated across a ticket
+    are only rendered once; write_transcript_files() clears the memo after each
+    render so it never holds other tickets' messages.
+    """
+    if not text:
+        return ""
+    text = text.translate(MARKDOWN_ESCAPES)
+
+    # Finished fragments are stashed behind \x00n\x00 so later rules cannot reformat
+    # code or break URLs and emoji names that contain * or _
+    stash = []
+    def keep(html):
+        stash.append(html)
+        return f"\x00{len(stash) - 1}\x00"
+
+    text = MARKDOWN_CODE_BLOCK.sub(lambda m: keep(f'<pre class="code-block" data-lang="{m.group(1) or ""}">{m.group(2).strip()}</pre>'), text)
+    text = MARKDOWN_INLINE_CODE.sub(lambda m: keep(f'<code class="inline-code">{m.group(1)}</code>'), text)
+    text = MARKDOWN_LINK.sub(lambda m: keep(f'<a href="{m.group(0)}" target="_blank" class="discord-link">{m.group(0)}</a>'), text)
+    text = MARKDOWN_CUSTOM_EMOJI.sub(lambda m: keep(
+        f'<img class="emoji" src="https://cdn.discordapp.com/emojis/{m.group(3)}.{"gif" if m.group(1) else "png"}" '
+        f'alt=":{m.group(2)}:" title=":{m.group(2)}:" loading="lazy">'
+    ), text)
+    for pattern, replacement in MARKDOWN_INLINE_RULES:
+        text = pattern.sub(replacement, text)
+    text = text.replace("\n", "<br>")
+    return MARKDOWN_STASH.sub(lambda m: stash[int(m.group(1))], text)
+
+def discord_html_header(context, author_styles="", asset_root=".."):
+    """Document head, styles, scripts and ticket info block of the HTML transcript"""
+    ticket_info = context['ticket_info']
+
+    return (
+        f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Ticket #{context['ticket_id']} Transcript - {context['guild_name']}</title>
+    <link href="https://fonts.googleapis.com/css2?family=Noto+Color+Emoji&family=Whitney:wght@400;500;600;700&display=swap" rel="stylesheet">
+"""
+        + transcript_asset_tags(root=asset_root)
+        + author_styles
+        + f"""</head>
+<body>
+    <!-- Media Modal -->
+    <div id="mediaModal" class="media-modal">
+        <span class="close-modal" onclick="closeModal()">&times;</span>
+        <div id="modalContent"></div>
+    </div>
+    <div class="transcript-container">
+        <div class="header">
+            <h1>
+                <div class="ticket-icon">🎫</div>
+                Ticket #{context['ticket_id']} Transcript
+            </h1>
+            <div class="header-info">
+                <div class="info-item">
+                    <div class="info-label">Server</div>
+                    <div class="info-value">{context['guild_name']}</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label">Channel</div>
+                    <div class="info-value">#{context['channel_name']}</div>
+                </div>
+                <div class="info-item">
+                    <div class="info-label">Created By</div>
+                    <div class="info-value">{context['creator_name']}</div>
+                </div>
+                <div class="info-item">
                     <div class="info-label">Type</div>
                     <div class="info-value">{ticket_info.get('button_name', 'Unknown')}</div>
                 </div>
@@ -1700,7 +2683,7 @@ class TranscriptButton(discord.ui.Button):
                 </div>
                 <div class="info-item">
                     <div class="info-label">Messages</div>
-                    <div class="info-value">{len(messages_data)}</div>
+                    <div class="info-value">{context['message_count']}</div>
                 </div>
                 <div class="info-item">
                     <div class="info-label">Generated</div>
@@ -1711,14 +2694,99 @@ class TranscriptButton(discord.ui.Button):
         
         <div class="messages">
 """
-        
-        for msg_data in messages_data:
-            author = msg_data['author']
-            timestamp = msg_data['timestamp'].strftime('%m/%d/%Y %I:%M %p')
-            
-            html += f"""
-            <div class="message">
-                <img src="{author['avatar_url']}" alt="{author['display_name']}" class="avatar">
+    )
+
+# Like Discord, a message from the same author within this window continues the previous group
+TRANSCRIPT_GROUP_WINDOW = datetime.timedelta(minutes=7)
+
+# Only the first page of an HTML transcript is rendered on open; later pages are kept as inert
+# text and inserted when scrolled into view (0 renders everything at once)
+TRANSCRIPT_PAGE_SIZE = int(os.getenv("TRANSCRIPT_PAGE_SIZE", "500"))
+TRANSCRIPT_PAGE_ESCAPE = re.compile(r"<(/script|!--)", re.IGNORECASE)
+
+def transcript_author_table(messages_data, asset_urls=None):
+    """Give each author a short CSS class and return (keys by author id, <style> block)
+
+    The style block carries every avatar once (archived copy first, remote URL
+    underneath as a fallback) instead of repeating it on each message.
+    """
+    author_keys = {}
+    rules = []
+    for msg_data in messages_data:
+        author = msg_data['author']
+        if author['id'] in author_keys:
+            continue
+        key = f"a{len(author_keys)}"
+        author_keys[author['id']] = key
+        urls = [author['avatar_url']]
+        if asset_urls and author['avatar_url'] in asset_urls:
+            urls.insert(0, asset_urls[author['avatar_url']])
+        backgrounds = ", ".join('url("{}")'.format(url.replace('"', '%22')) for url in urls)
+        rules.append(f"        .{key} .avatar {{ background-image: {backgrounds}; }}\n")
+    return author_keys, f"    <style>\n{''.join(rules)}    </style>\n"
+
+class DiscordHtmlMessages:
+    """render_message and footer for the HTML transcript
+
+    Groups consecutive messages by author and, past the first page, wraps every
+    page_size messages in a <script type="text/html"> block that the transcript
+    script inserts on scroll. Remembers the previous message and the open page,
+    so each transcript needs its own instance.
+    """
+
+    def __init__(self, author_keys, asset_urls=None, page_size=TRANSCRIPT_PAGE_SIZE):
+        self.author_keys = author_keys
+        self.asset_urls = asset_urls
+        self.page_size = page_size
+        self.previous = None
+        self.page_open = False
+
+    def __call__(self, index, msg_data):
+        previous, self.previous = self.previous, msg_data
+        continued = (
+            previous is not None
+            and previous['author']['id'] == msg_data['author']['id']
+            and msg_data['timestamp'] - previous['timestamp'] <= TRANSCRIPT_GROUP_WINDOW
+        )
+        chunks = iter_discord_html_message(index, msg_data, self.author_keys[msg_data['author']['id']], continued, self.asset_urls)
+        if self.page_size and index > 1 and (index - 1) % self.page_size == 0:
+            if self.page_open:
+                yield '</script>\n'
+            yield '<script type="text/html" class="transcript-page">'
+            self.page_open = True
+        if not self.page_open:
+            yield from chunks
+            return
+        for chunk in chunks:
+            yield TRANSCRIPT_PAGE_ESCAPE.sub(r"<\\\1", chunk)
+
+    def footer(self):
+        """Close the last page and add the marker that triggers loading on scroll"""
+        if not self.page_open:
+            return discord_html_footer()
+        return '</script>\n<div class="transcript-more">Loading more messages…</div>\n' + discord_html_footer()
+
+def iter_discord_html_message(index, msg_data, author_key, continued=False, asset_urls=None):
+    """Render one message record of the HTML transcript as a stream of chunks
+
+    author_key is the author's class from transcript_author_table(); a continued
+    message omits the avatar and header. asset_urls maps remote attachment URLs
+    to archived local copies.
+    """
+    if asset_urls:
+        msg_data = localize_message_urls(msg_data, asset_urls)
+    author = msg_data['author']
+    timestamp = msg_data['timestamp'].strftime('%m/%d/%Y %I:%M %p')
+    
+    if continued:
+        yield f"""
+            <div class="message message-continued {author_key}" title="{timestamp}">
+                <div class="message-content">
+"""
+    else:
+        yield f"""
+            <div class="message {author_key}">
+                <div class="avatar"></div>
                 <div class="message-content">
                     <div class="message-header">
                         <span class="username">{author['display_name']}</span>
@@ -1726,86 +2794,84 @@ class TranscriptButton(discord.ui.Button):
                         <span class="timestamp">{timestamp}</span>
                     </div>
 """
+    
+    if msg_data['content']:
+        # Process content for replies and preserve custom emojis
+        content = msg_data["content"]
+        
+        # Check if this is a reply to another message
+        if content.startswith('> '):
+            # Split reply quote from actual message
+            lines = content.split('\n')
+            reply_lines = []
+            message_lines = []
+            in_reply = True
             
-            if msg_data['content']:
-                # Process content for replies and preserve custom emojis
-                content = msg_data["content"]
-                
-                # Check if this is a reply to another message
-                if content.startswith('> '):
-                    # Split reply quote from actual message
-                    lines = content.split('\n')
-                    reply_lines = []
-                    message_lines = []
-                    in_reply = True
-                    
-                    for line in lines:
-                        if line.startswith('> ') and in_reply:
-                            reply_lines.append(line)
-                        else:
-                            in_reply = False
-                            message_lines.append(line)
-                    
-                    if reply_lines:
-                        html += '<div class="message-reply">'
-                        for reply_line in reply_lines:
-                            # Escape HTML but preserve Discord emoji format
-                            escaped_line = reply_line[2:].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                            html += f'{escaped_line}<br>'
-                        html += '</div>'
-                    
-                    if message_lines:
-                        remaining_content = '\\n'.join(message_lines).strip()
-                        if remaining_content:
-                            # Escape HTML but preserve Discord emoji format
-                            escaped_content = remaining_content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                            html += f'<div class="message-text">{escaped_content}</div>'
+            for line in lines:
+                if line.startswith('> ') and in_reply:
+                    reply_lines.append(line)
                 else:
-                    # Regular message - escape HTML entities but preserve Discord emoji format
-                    escaped_content = content.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                    html += f'<div class="message-text">{escaped_content}</div>'
+                    in_reply = False
+                    message_lines.append(line)
             
-            # Add embeds
-            for embed in msg_data['embeds']:
-                border_color = f"#{embed['color']:06x}" if embed['color'] else "#5865f2"
-                
-                html += f"""
+            if reply_lines:
+                yield '<div class="message-reply">'
+                for reply_line in reply_lines:
+                    # Escape HTML but preserve Discord emoji format
+                    escaped_line = reply_line[2:].replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                    yield f'{escaped_line}<br>'
+                yield '</div>'
+            
+            if message_lines:
+                remaining_content = '\n'.join(message_lines).strip()
+                if remaining_content:
+                    yield f'<div class="message-text" data-markdown>{render_discord_markdown(remaining_content)}</div>'
+        else:
+            # Regular message
+            yield f'<div class="message-text" data-markdown>{render_discord_markdown(content)}</div>'
+    
+    # Add embeds
+    for embed in msg_data['embeds']:
+        border_color = f"#{embed['color']:06x}" if embed['color'] else "#5865f2"
+        
+        yield f"""
                     <div class="embed" style="border-left-color: {border_color};">
 """
-                
-                if embed['title']:
-                    html += f'<div class="embed-title">{embed["title"]}</div>'
-                
-                if embed['description']:
-                    html += f'<div class="embed-description">{embed["description"]}</div>'
-                
-                for field in embed['fields']:
-                    html += f"""
+        
+        if embed['title']:
+            yield f'<div class="embed-title">{embed["title"]}</div>'
+        
+        if embed['description']:
+            yield f'<div class="embed-description" data-markdown>{render_discord_markdown(embed["description"])}</div>'
+        
+        for field in embed['fields']:
+            yield f"""
                         <div class="embed-field">
                             <div class="embed-field-name">{field['name']}</div>
-                            <div class="embed-field-value">{field['value']}</div>
+                            <div class="embed-field-value" data-markdown>{render_discord_markdown(field['value'])}</div>
                         </div>
 """
-                
-                if embed['footer']:
-                    html += f'<div class="embed-footer">{embed["footer"]}</div>'
-                
-                html += '</div>'
-            
-            # Add attachments with enhanced media support
-            for attachment in msg_data['attachments']:
-                size_mb = attachment['size'] / (1024 * 1024)
-                filename = attachment['filename'].lower()
-                
-                if any(filename.endswith(ext) for ext in ['.mp4', '.webm', '.mov', '.avi', '.mkv']):
-                    # Video attachment
-                    html += f"""
+        
+        if embed['footer']:
+            yield f'<div class="embed-footer">{embed["footer"]}</div>'
+        
+        yield '</div>'
+    
+    # Add attachments with enhanced media support
+    for attachment in msg_data['attachments']:
+        size_mb = attachment['size'] / (1024 * 1024)
+        filename = attachment['filename'].lower()
+        
+        if any(filename.endswith(ext) for ext in ['.mp4', '.webm', '.mov', '.avi', '.mkv']):
+            # Video attachment
+            yield f"""
                         <div class="attachment">
                             <div class="attachment-name">🎬 {attachment['filename']}</div>
                             <div class="attachment-size">{size_mb:.2f} MB</div>
                             <div class="video-container">
                                 <video class="video-attachment" controls poster="" preload="metadata">
                                     <source src="{attachment['url']}" type="video/mp4">
+                                    <source src="{attachment.get('remote_url', attachment['url'])}" type="video/mp4">
                                     Your browser does not support the video tag.
                                 </video>
                                 <div class="video-controls">
@@ -1815,127 +2881,1062 @@ class TranscriptButton(discord.ui.Button):
                             </div>
                         </div>
 """
-                elif any(filename.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
-                    # Image attachment
-                    html += f"""
+        elif any(filename.endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp']):
+            # Image attachment
+            yield f"""
                         <div class="attachment">
                             <div class="attachment-name">🖼️ {attachment['filename']}</div>
                             <div class="attachment-size">{size_mb:.2f} MB</div>
-                            <img class="image-attachment" src="{attachment['url']}" alt="{attachment['filename']}" loading="lazy">
+                            <img class="image-attachment" src="{attachment['url']}" alt="{attachment['filename']}" loading="lazy" onerror="this.onerror=null;this.src='{attachment.get('remote_url', attachment['url'])}'">
                         </div>
 """
-                elif any(filename.endswith(ext) for ext in ['.mp3', '.wav', '.ogg', '.m4a']):
-                    # Audio attachment
-                    html += f"""
+        elif any(filename.endswith(ext) for ext in ['.mp3', '.wav', '.ogg', '.m4a']):
+            # Audio attachment
+            yield f"""
                         <div class="attachment">
                             <div class="attachment-name">🎵 {attachment['filename']}</div>
                             <div class="attachment-size">{size_mb:.2f} MB</div>
                             <audio controls style="width: 100%; margin-top: 8px;">
                                 <source src="{attachment['url']}" type="audio/mpeg">
+                                <source src="{attachment.get('remote_url', attachment['url'])}" type="audio/mpeg">
                                 Your browser does not support the audio element.
                             </audio>
                         </div>
 """
-                else:
-                    # Regular file attachment
-                    html += f"""
+        else:
+            # Regular file attachment
+            yield f"""
                         <div class="attachment">
                             <div class="attachment-name">📎 {attachment['filename']}</div>
                             <div class="attachment-size">{size_mb:.2f} MB</div>
                             <a href="{attachment['url']}" target="_blank" style="color: #00b0f4; text-decoration: none;">📥 Download</a>
                         </div>
 """
-            
-            html += """
+    
+    yield """
                 </div>
             </div>
 """
-        
-        html += f"""
-        </div>
-        
-        <div class="footer">
-            <div class="footer-text">
-                Discord Ticket Transcript • Generated by Enhanced Ticket Bot
-            </div>
-            <div class="footer-links">
-                <a href="#" class="footer-link">🎫 Close Ticket</a>
-                <a href="#" class="footer-link">🎯 Claim Ticket</a>
-                <a href="#" class="footer-link">📄 Generate New Transcript</a>
-                <a href="#" class="footer-link">✏️ Rename Channel</a>
-            </div>
-        </div>
-    </div>
-</body>
-</html>
+
+def discord_html_footer():
+    """Closing markup of the HTML transcript"""
+    return TRANSCRIPT_HTML_FOOTER
+
+def discord_html_output(filename, context, messages_data, asset_urls=None):
+    """write_transcript_files() output for the Discord-styled HTML transcript"""
+    author_keys, author_styles = transcript_author_table(messages_data, asset_urls)
+    messages = DiscordHtmlMessages(author_keys, asset_urls)
+    asset_root = os.path.relpath(TRANSCRIPT_ASSETS_DIR, os.path.dirname(filename) or ".").replace(os.sep, "/")
+    return (filename, discord_html_header(context, author_styles, asset_root), messages, messages.footer)
+
+def mobile_transcript_header(context):
+    """Banner and ticket info block of the mobile-friendly text transcript"""
+    ticket_info = context['ticket_info']
+
+    return f"""
+╔══════════════════════════════════════════════════════════════════════════════════╗
+║                            DISCORD TICKET TRANSCRIPT                             ║
+╚══════════════════════════════════════════════════════════════════════════════════╝
+
+🎫 Ticket ID: #{context['ticket_id']}
+🏢 Server: {context['guild_name']}
+📍 Channel: #{context['channel_name']}
+👤 Created By: {context['creator_name']}
+🏷️ Type: {ticket_info.get('button_name', 'Unknown')}
+⚡ Priority: {ticket_info.get('priority', 'medium').title()}
+📊 Status: {ticket_info.get('status', 'open').title()}
+📝 Total Messages: {context['message_count']}
+🕐 Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
+
+{'='*80}
+MESSAGE HISTORY
+{'='*80}
+
 """
+
+def iter_mobile_transcript_message(index, msg_data):
+    """Render one message record of the text transcript as a stream of lines"""
+    author = msg_data['author']
+    timestamp = msg_data['timestamp'].strftime('%m/%d/%Y %I:%M %p')
+    
+    yield f"\n[{index:03d}] {timestamp}\n"
+    yield f"👤 {author['display_name']}"
+    if author['bot']:
+        yield " [BOT]"
+    yield f" (ID: {author['id']})\n"
+    
+    if msg_data['content']:
+        # Clean up content for mobile viewing
+        content = msg_data['content'].replace('```', '---').replace('`', '"')
+        yield f"💬 {content}\n"
+    
+    # Add embed information
+    for embed in msg_data['embeds']:
+        if embed['title']:
+            yield f"📄 EMBED: {embed['title']}\n"
+        if embed['description']:
+            desc = embed['description'][:200] + "..." if len(embed['description']) > 200 else embed['description']
+            yield f"   📝 {desc}\n"
+    
+    # Add attachment information
+    for attachment in msg_data['attachments']:
+        size_mb = attachment['size'] / (1024 * 1024)
+        yield f"📎 ATTACHMENT: {attachment['filename']} ({size_mb:.2f} MB)\n"
+        yield f"   🔗 {attachment['url']}\n"
+    
+    yield "-" * 40 + "\n"
+
+def mobile_transcript_footer():
+    """Closing banner of the text transcript"""
+    return f"\n{'='*80}\nEND OF TRANSCRIPT • Generated by Enhanced Ticket Bot\n{'='*80}"
+
+def mobile_transcript_output(filename, context):
+    """write_transcript_files() output for the mobile-friendly text transcript"""
+    return (filename, mobile_transcript_header(context), iter_mobile_transcript_message, mobile_transcript_footer)
+
+def write_transcript_files(messages_data, outputs):
+    """Render several output formats in a single pass over the message records
+
+    Each output is (filename, header, render_message, footer): header is a
+    string, render_message(index, msg_data) yields the chunks for one message
+    and footer() returns the closing string (or footer is None). Chunks go
+    straight to the files, so memory does not grow with the ticket. Returns
+    how many message chunks each output wrote.
+    """
+    chunk_counts = [0] * len(outputs)
+    # Render beside the target and swap in afterwards, so a file that is still being
+    # uploaded from an earlier press is never truncated underneath it. Temp names are
+    # per writer, as two renders of one ticket can run at once in different processes
+    temp_paths = [unique_temp_path(output[0]) for output in outputs]
+    try:
+        with contextlib.ExitStack() as stack:
+            files = [stack.enter_context(open(temp_path, "w", encoding="utf-8")) for temp_path in temp_paths]
+            for f, (_, header, _, _) in zip(files, outputs):
+                f.write(header)
+            for index, msg_data in enumerate(messages_data, 1):
+                for position, (f, (_, _, render_message, _)) in enumerate(zip(files, outputs)):
+                    for chunk in render_message(index, msg_data):
+                        f.write(chunk)
+                        chunk_counts[position] += 1
+            for f, (_, _, _, footer) in zip(files, outputs):
+                if footer is not None:
+                    f.write(footer())
+        for temp_path, output in zip(temp_paths, outputs):
+            os.replace(temp_path, output[0])
+    except BaseException:
+        for temp_path in temp_paths:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(temp_path)
+        raise
+    finally:
+        render_discord_markdown.cache_clear()
+    return chunk_counts
+
+# Tickets with at least this many messages render in a worker process so the event
+# loop keeps serving other guilds; smaller ones render inline (0 workers disables the pool)
+TRANSCRIPT_RENDER_WORKERS = int(os.getenv("TRANSCRIPT_RENDER_WORKERS", "2"))
+TRANSCRIPT_PROCESS_THRESHOLD = int(os.getenv("TRANSCRIPT_PROCESS_THRESHOLD", "1000"))
+transcript_executor = None
+
+def get_transcript_executor():
+    """The transcript render pool, started on first use"""
+    global transcript_executor
+    if transcript_executor is None:
+        transcript_executor = ProcessPoolExecutor(max_workers=TRANSCRIPT_RENDER_WORKERS)
+    return transcript_executor
+
+async def render_transcript_files(messages_data, outputs):
+    """Run write_transcript_files(), in the render pool for large tickets
+
+    Message records and outputs are plain data and module-level functions, so
+    they pickle as-is.
+    """
+    if TRANSCRIPT_RENDER_WORKERS <= 0 or len(messages_data) < TRANSCRIPT_PROCESS_THRESHOLD:
+        return write_transcript_files(messages_data, outputs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_transcript_executor(), write_transcript_files, messages_data, outputs)
+
+# ===== TRANSCRIPT PACKAGING =====
+
+# Bytes kept free for the message text and embeds when files are packed into one upload
+TRANSCRIPT_UPLOAD_HEADROOM = 64 * 1024
+
+def package_transcript_files(paths, limit):
+    """Group artifacts into uploads of at most limit bytes each
+
+    Prefers the raw files in one upload, then a single zip of all of them,
+    then that zip split into numbered parts (.zip.001, .zip.002, ... which
+    concatenate back into the archive). Returns a list of uploads, each a list
+    of paths; archives and parts go in a folder of their own beside the first
+    artifact, so concurrent sends of one ticket never share them.
+    """
+    if sum(os.path.getsize(path) for path in paths) <= limit:
+        return [list(paths)]
+
+    directory = tempfile.mkdtemp(dir=os.path.dirname(paths[0]) or ".", prefix=".upload-")
+    archive = os.path.join(directory, os.path.splitext(os.path.basename(paths[0]))[0] + ".zip")
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for path in paths:
+            zf.write(path, os.path.basename(path))
+    if os.path.getsize(archive) <= limit:
+        return [[archive]]
+
+    parts = []
+    with open(archive, "rb") as f:
+        while chunk := f.read(limit):
+            part = f"{archive}.{len(parts) + 1:03d}"
+            with open(part, "wb") as out:
+                out.write(chunk)
+            parts.append([part])
+    os.remove(archive)
+    return parts
+
+async def send_transcript_files(destination, paths, limit, **kwargs):
+    """Send artifacts in the first form that fits the destination's upload limit
+
+    kwargs (embed, ephemeral, ...) go with the first upload; any further parts
+    follow without the embed. Temporary archives and their folder are removed afterwards.
+    Returns the uploaded attachments so other destinations can link to them.
+    """
+    uploads = await run_storage_io(package_transcript_files, paths, max(limit - TRANSCRIPT_UPLOAD_HEADROOM, 1))
+    attachments = []
+    try:
+        for upload in uploads:
+            message = await destination.send(files=[discord.File(path) for path in upload], **kwargs)
+            if message:
+                attachments.extend(message.attachments)
+            kwargs.pop("embed", None)
+    finally:
+        temporary = [path for upload in uploads for path in upload if path not in paths]
+        if temporary:
+            await run_storage_io(shutil.rmtree, os.path.dirname(temporary[0]), ignore_errors=True)
+    return attachments
+
+def transcript_link_view(attachments):
+    """Link buttons to transcript files uploaded elsewhere, so they are not uploaded twice"""
+    view = discord.ui.View()
+    for attachment in attachments[:25]:
+        view.add_item(discord.ui.Button(style=discord.ButtonStyle.link, label=attachment.filename, url=attachment.url))
+    return view
+
+def append_text_file(path, text):
+    """Append text to a log file"""
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+def read_text_file(path):
+    """The contents of a log file, or None when it does not exist"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+def compress_transcript_files(paths):
+    """Replace artifacts with gzip copies once sent, which is how they are kept on disk"""
+    for path in paths:
+        with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(path + ".gz.tmp", path + ".gz")
+        os.remove(path)
+
+# ===== TRANSCRIPT RENDER CACHE =====
+
+# HTML and TXT are only rendered when someone asks for them and kept in
+# transcripts/{guild}/cache/{version}/; bump the renderer version when the renderers
+# change so old renders are redone (the CSS/JS version is part of the key already)
+TRANSCRIPT_RENDERER_VERSION = "1"
+TRANSCRIPT_RENDER_CACHE_FILES = int(os.getenv("TRANSCRIPT_RENDER_CACHE_FILES", "50"))
+
+def transcript_cache_dir(guild_id):
+    """Cache folder for renders made by the current renderer and template"""
+    return os.path.join("transcripts", str(guild_id), "cache", f"{TRANSCRIPT_RENDERER_VERSION}-{TRANSCRIPT_ASSET_VERSION}")
+
+def prune_transcript_cache(guild_id):
+    """Drop renders of older versions and all but the most recently used current ones"""
+    root = os.path.join("transcripts", str(guild_id), "cache")
+    current = transcript_cache_dir(guild_id)
+    for version in os.listdir(root):
+        if os.path.join(root, version) != current:
+            shutil.rmtree(os.path.join(root, version), ignore_errors=True)
+    renders = sorted(
+        (entry for entry in os.scandir(current) if entry.is_file()),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in renders[TRANSCRIPT_RENDER_CACHE_FILES:]:
+        os.remove(entry.path)
+
+async def render_transcript_cache(guild_id, ticket_id, context, messages_data, extra_outputs=()):
+    """Render the HTML and TXT transcripts into the cache, in one pass with any extra outputs
+
+    Returns ((html path, txt path), chunk counts of the extra outputs).
+    """
+    directory = transcript_cache_dir(guild_id)
+    await run_storage_io(os.makedirs, directory, exist_ok=True)
+    html_filename = os.path.join(directory, f"transcript_{ticket_id}.html")
+    text_filename = os.path.join(directory, f"transcript_{ticket_id}.txt")
+
+    # Keep local copies of attachments and avatars for the HTML version, linked relative to the cache
+    asset_urls = await archive_transcript_assets(guild_id, messages_data) if TRANSCRIPT_ARCHIVE_ATTACHMENTS else None
+    if asset_urls:
+        guild_root = os.path.relpath(os.path.join("transcripts", str(guild_id)), directory).replace(os.sep, "/")
+        asset_urls = {url: f"{guild_root}/{path}" for url, path in asset_urls.items()}
+
+    chunk_counts = await render_transcript_files(messages_data, [
+        discord_html_output(html_filename, context, messages_data, asset_urls),
+        mobile_transcript_output(text_filename, context),
+        *extra_outputs
+    ])
+    await run_storage_io(prune_transcript_cache, guild_id)
+    await run_storage_io(index_ticket_messages, guild_id, ticket_id, context['ticket_info'], messages_data)
+    return (html_filename, text_filename), chunk_counts[2:]
+
+async def cached_transcript_files(guild_id, ticket_id):
+    """HTML and TXT paths of a closed ticket, rendered from its canonical transcript only when stale
+
+    Returns None when the ticket has no canonical transcript.
+    """
+    source = canonical_transcript_path(guild_id, ticket_id)
+    directory = transcript_cache_dir(guild_id)
+    paths = (os.path.join(directory, f"transcript_{ticket_id}.html"), os.path.join(directory, f"transcript_{ticket_id}.txt"))
+
+    def check_cache():
+        """Whether the ticket has a canonical transcript, touching fresh renders as most recently used"""
+        if not os.path.exists(source):
+            return None, False
+        if all(os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source) for path in paths):
+            for path in paths:
+                os.utime(path)
+            return True, True
+        return True, False
+
+    exists, fresh = await run_storage_io(check_cache)
+    if not exists:
+        return None
+    if fresh:
+        return paths
+    context, messages_data = await run_storage_io(read_canonical_transcript, source)
+    paths, _ = await render_transcript_cache(guild_id, ticket_id, context, messages_data)
+    return paths
+
+# ===== TRANSCRIPT SEARCH =====
+
+TRANSCRIPT_SEARCH_DATABASE = os.getenv("TRANSCRIPT_SEARCH_DATABASE", "search.db")
+SEARCH_RESULTS_PER_PAGE = 10
+
+# Closure log lines as written by iter_log_message(), for indexing logs of older tickets
+LOG_LINE_PATTERN = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) UTC\] (\d+)\|[^|]*\|(.*?)(?: sent (?:embed|attachment))?: (.*)$")
+LOG_FILE_PATTERN = re.compile(r"^ticket_(\w+?)_\d+\.txt(?:\.gz)?$")
+
+class TranscriptSearchIndex:
+    """Full-text index over ticket messages in a SQLite FTS5 table.
+
+    One row per message with the filterable fields (guild, ticket, author,
+    ticket type, time) as indexed columns; search_fts indexes the text and is
+    kept in sync by triggers. Tickets are always reindexed as a whole, so
+    edits and deletions are picked up. The connection is shared by the
+    storage threads and guarded by lock.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS search_messages (
+            id INTEGER PRIMARY KEY,
+            guild_id TEXT NOT NULL,
+            ticket_id TEXT NOT NULL,
+            author_id INTEGER,
+            author_name TEXT,
+            ticket_type TEXT,
+            created_at TEXT,
+            content TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_search_ticket ON search_messages (guild_id, ticket_id);
+        CREATE INDEX IF NOT EXISTS idx_search_author ON search_messages (guild_id, author_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_search_created ON search_messages (guild_id, created_at);
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(
+            content, content='search_messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+        );
+        CREATE TRIGGER IF NOT EXISTS search_messages_insert AFTER INSERT ON search_messages BEGIN
+            INSERT INTO search_fts (rowid, content) VALUES (new.id, new.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS search_messages_delete AFTER DELETE ON search_messages BEGIN
+            INSERT INTO search_fts (search_fts, rowid, content) VALUES ('delete', old.id, old.content);
+        END;
+    """
+
+    def __init__(self, path=TRANSCRIPT_SEARCH_DATABASE):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.RLock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+
+    def index_ticket(self, guild_id, ticket_id, ticket_type, rows):
+        """Replace a ticket's indexed messages with rows of (author_id, author_name, created_at, content)"""
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM search_messages WHERE guild_id = ? AND ticket_id = ?",
+                    (str(guild_id), str(ticket_id))
+                )
+                self.conn.executemany(
+                    "INSERT INTO search_messages (guild_id, ticket_id, author_id, author_name, ticket_type, created_at, content) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(str(guild_id), str(ticket_id), author_id, author_name, ticket_type, created_at, content)
+                     for author_id, author_name, created_at, content in rows if content]
+                )
+
+    def search(self, guild_id, words=(), author_id=None, author_name=None, ticket_type=None,
+               before=None, after=None, limit=SEARCH_RESULTS_PER_PAGE, offset=0):
+        """Return (total matches, page of rows), newest first
+
+        Rows are (ticket_id, author_id, author_name, ticket_type, created_at,
+        snippet), with matched words in the snippet between \\x02 and \\x03.
+        Every word must match; words are taken literally rather than as FTS5
+        query syntax.
+        """
+        conditions = ["m.guild_id = ?"]
+        params = [str(guild_id)]
+        if author_id is not None:
+            conditions.append("m.author_id = ?")
+            params.append(author_id)
+        if author_name:
+            conditions.append("m.author_name LIKE ?")
+            params.append(f"%{author_name}%")
+        if ticket_type:
+            conditions.append("m.ticket_type = ? COLLATE NOCASE")
+            params.append(ticket_type)
+        if before:
+            conditions.append("m.created_at < ?")
+            params.append(before)
+        if after:
+            conditions.append("m.created_at >= ?")
+            params.append(after)
+
+        match = " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+        if words:
+            # CROSS JOIN keeps the FTS lookup as the outer loop instead of scanning the guild's messages
+            source = "search_fts CROSS JOIN search_messages m ON m.id = search_fts.rowid"
+            conditions.insert(0, "search_fts MATCH ?")
+            params.insert(0, match)
+        else:
+            source = "search_messages m"
+        where = " AND ".join(conditions)
+
+        with self.lock:
+            total = self.conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+            rows = self.conn.execute(
+                f"SELECT m.id, m.ticket_id, m.author_id, m.author_name, m.ticket_type, m.created_at, substr(m.content, 1, 200) "
+                f"FROM {source} WHERE {where} ORDER BY m.created_at DESC LIMIT ? OFFSET ?",
+                params + [limit, offset]
+            ).fetchall()
+            # Snippets only for the page shown, marking hits with control characters the caller replaces
+            snippets = {}
+            if words and rows:
+                snippets = dict(self.conn.execute(
+                    "SELECT rowid, snippet(search_fts, 0, char(2), char(3), '…', 16) FROM search_fts "
+                    f"WHERE search_fts MATCH ? AND rowid IN ({', '.join('?' * len(rows))})",
+                    [match] + [row[0] for row in rows]
+                ).fetchall())
+        return total, [row[1:6] + (snippets.get(row[0], row[6]),) for row in rows]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# Opened on first use, like the render pool
+search_index = None
+
+def get_search_index():
+    """The transcript search index, opened on first use"""
+    global search_index
+    if search_index is None:
+        search_index = TranscriptSearchIndex()
+    return search_index
+
+def search_rows(messages_data):
+    """Index rows for message records: the text, embed text and attachment names of each message"""
+    for msg_data in messages_data:
+        parts = [msg_data['content']]
+        for embed in msg_data['embeds']:
+            parts.extend((embed['title'], embed['description']))
+            parts.extend(field['value'] for field in embed['fields'])
+        parts.extend(attachment['filename'] for attachment in msg_data['attachments'])
+        author = msg_data['author']
+        yield (
+            author['id'],
+            author['display_name'],
+            msg_data['timestamp'].strftime("%Y-%m-%d %H:%M:%S"),
+            "\n".join(part for part in parts if part)
+        )
+
+def index_ticket_messages(guild_id, ticket_id, ticket_info, messages_data):
+    """(Re)index every message of a ticket"""
+    get_search_index().index_ticket(guild_id, ticket_id, ticket_info.get('button_name'), search_rows(messages_data))
+
+def iter_log_file_rows(path):
+    """Index rows parsed from a closure log
+
+    A message's embed and attachment lines, and continuation lines of
+    multi-line content, are joined into the row above.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    row = None
+    with opener(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("=" * 10):
+                break  # closure summary
+            match = LOG_LINE_PATTERN.match(line.rstrip("\n"))
+            if match:
+                created_at, author_id, author_name, content = match.groups()
+                if row and row[0] == int(author_id) and row[2] == created_at:
+                    row[3] += "\n" + content
+                    continue
+                if row:
+                    yield tuple(row)
+                row = [int(author_id), author_name, created_at, content]
+            elif row:
+                row[3] += "\n" + line.rstrip("\n")
+    if row:
+        yield tuple(row)
+
+def rebuild_search_index():
+    """Index every stored ticket: canonical transcripts, and the latest closure log of older tickets"""
+    indexed = 0
+    for guild_id in (os.listdir("transcripts") if os.path.isdir("transcripts") else []):
+        guild_dir = os.path.join("transcripts", guild_id)
+        if not os.path.isdir(guild_dir):
+            continue
+        for name in os.listdir(guild_dir):
+            if name.startswith("transcript_") and name.endswith(".ndjson.gz"):
+                context, messages_data = read_canonical_transcript(os.path.join(guild_dir, name))
+                index_ticket_messages(guild_id, context['ticket_id'], context['ticket_info'], messages_data)
+                indexed += 1
+
+    for guild_id in (os.listdir("logs") if os.path.isdir("logs") else []):
+        latest_logs = {}
+        for name in sorted(os.listdir(os.path.join("logs", guild_id))):
+            match = LOG_FILE_PATTERN.match(name)
+            if match and not os.path.exists(canonical_transcript_path(guild_id, match.group(1))):
+                latest_logs[match.group(1)] = os.path.join("logs", guild_id, name)
+        for ticket_id, path in latest_logs.items():
+            ticket_info = get_guild_ticket(guild_id, ticket_id) or {}
+            get_search_index().index_ticket(guild_id, ticket_id, ticket_info.get('button_name'), iter_log_file_rows(path))
+            indexed += 1
+    return indexed
+
+def parse_search_query(query):
+    """Split '-search' input into (words, filters) from user:, type:, before: and after: terms"""
+    try:
+        terms = shlex.split(query)
+    except ValueError:
+        terms = query.split()
+    words = []
+    filters = {}
+    for term in terms:
+        key, _, value = term.partition(":")
+        key = key.lower()
+        if value and key in ("user", "type", "before", "after"):
+            if key == "user":
+                mention = re.fullmatch(r"<@!?(\d+)>|(\d{15,20})", value)
+                if mention:
+                    filters['author_id'] = int(mention.group(1) or mention.group(2))
+                else:
+                    filters['author_name'] = value
+            elif key == "type":
+                filters['ticket_type'] = value
+            else:
+                # Dates are compared against "YYYY-MM-DD HH:MM:SS" UTC timestamps
+                filters[key] = datetime.datetime.strptime(value, "%Y-%m-%d").strftime("%Y-%m-%d")
+        else:
+            words.append(term)
+    return words, filters
+
+class SearchResultsView(discord.ui.View):
+    """Previous/next pages of a -search, usable by the member who ran it"""
+
+    def __init__(self, author_id, guild_id, words, filters, embed_color):
+        super().__init__(timeout=300)
+        self.author_id = author_id
+        self.guild_id = guild_id
+        self.words = words
+        self.filters = filters
+        self.embed_color = embed_color
+        self.page = 0
+        self.pages = 1
+
+    async def build_embed(self):
+        """Embed for the current page, loading its rows from the index"""
+        total, rows = await run_storage_io(
+            get_search_index().search, self.guild_id, self.words,
+            limit=SEARCH_RESULTS_PER_PAGE, offset=self.page * SEARCH_RESULTS_PER_PAGE, **self.filters
+        )
+        self.pages = max(1, -(-total // SEARCH_RESULTS_PER_PAGE))
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = (self.page + 1) * SEARCH_RESULTS_PER_PAGE >= total
+
+        embed = discord.Embed(
+            title="🔍 Ticket Search",
+            description=f"**{total}** matching message{'s' if total != 1 else ''}",
+            color=self.embed_color
+        )
+        for ticket_id, author_id, author_name, ticket_type, created_at, snippet in rows:
+            embed.add_field(
+                name=f"Ticket #{ticket_id} • {ticket_type or 'Unknown'} • {created_at[:16]} UTC",
+                value=f"<@{author_id}> ({author_name}): " + discord.utils.escape_markdown(snippet[:900]).replace("\x02", "**").replace("\x03", "**"),
+                inline=False
+            )
+        embed.set_footer(text=f"Page {self.page + 1}/{self.pages} • -transcript <id> to open a ticket")
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("❌ Only the person who searched can change pages.", ephemeral=True)
+            return False
+        return True
+
+    @discord.ui.button(label="Previous", style=discord.ButtonStyle.secondary, emoji="◀️")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
+
+    @discord.ui.button(label="Next", style=discord.ButtonStyle.secondary, emoji="▶️")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
+
+# ===== TICKET PANEL & BUTTON VIEWS =====
+
+class TicketPanelView(discord.ui.View):
+    def __init__(self, button_names: list, guild_id: str):
+        super().__init__(timeout=None)
+        self.guild_id = guild_id
+        for name in button_names:
+            self.add_item(ReasonButton(label=name, guild_id=guild_id))
+
+class ReasonButton(discord.ui.Button):
+    def __init__(self, label: str, guild_id: str):
+        # Truncate label to 45 characters max to comply with Discord limits
+        truncated_label = label[:45] if len(label) > 45 else label
+        super().__init__(label=truncated_label, style=discord.ButtonStyle.primary, custom_id=f"reason_button_{guild_id}_{label}")
+        self.guild_id = guild_id
+
+    async def callback(self, interaction: discord.Interaction):
+        if not await is_guild_configured_async(self.guild_id):
+            await interaction.response.send_message(
+                "❌ This server is not configured yet! An administrator needs to run `-setup` first.", 
+                ephemeral=True
+            )
+            return
+
+        # Check if user is blacklisted
+        if await is_user_blacklisted_async(self.guild_id, interaction.user.id):
+            await interaction.response.send_message(
+                "❌ You are blacklisted from creating tickets in this server.", 
+                ephemeral=True
+            )
+            return
+
+        # Check for existing open tickets
+        open_ticket_count = await count_open_tickets_async(self.guild_id, interaction.user.id)
         
-        return html
+        config = await load_guild_config_async(self.guild_id)
+        max_tickets = config.get("max_tickets_per_user", 3)
+        
+        if open_ticket_count >= max_tickets:
+            await interaction.response.send_message(
+                f"❌ You already have {open_ticket_count} open tickets. Maximum allowed: {max_tickets}", 
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.send_modal(ReasonModal(self.label, self.guild_id))
+
+class ReasonModal(discord.ui.Modal, title='Reason for Ticket'):
+    reason = discord.ui.TextInput(
+        label='Describe your issue (max 500 characters)', 
+        style=discord.TextStyle.paragraph, 
+        max_length=500,
+        placeholder="Describe your issue in detail..."
+    )
+
+    def __init__(self, button_name: str, guild_id: str):
+        super().__init__()
+        self.button_name = button_name
+        self.guild_id = guild_id
+
+    async def on_submit(self, interaction: discord.Interaction):
+        config = await load_guild_config_async(self.guild_id)
+        if not config:
+            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
+            return
+
+        ticket_id, ticket_counter = await allocate_ticket_ids_async(self.guild_id)
+
+        ticket_channel_name = f"{self.button_name.lower()}-{ticket_counter}"
+        guild = interaction.guild
+        category = guild.get_channel(config["ticket_category_id"])
+
+        if not category:
+            await interaction.response.send_message("❌ Ticket category not found! Please check configuration.", ephemeral=True)
+            return
+
+        overwrites = {
+            guild.default_role: discord.PermissionOverwrite(view_channel=False),
+            interaction.user: discord.PermissionOverwrite(
+                view_channel=True, 
+                send_messages=True, 
+                read_messages=True, 
+                attach_files=True,
+                add_reactions=True,
+                embed_links=True
+            ),
+            guild.me: discord.PermissionOverwrite(
+                view_channel=True, 
+                send_messages=True, 
+                read_messages=True, 
+                attach_files=True,
+                manage_channels=True,
+                manage_webhooks=True
+            )
+        }
+
+        for role_id in config["staff_role_ids"]:
+            role = guild.get_role(role_id)
+            if role:
+                overwrites[role] = discord.PermissionOverwrite(
+                    view_channel=True, 
+                    send_messages=True, 
+                    read_messages=True, 
+                    attach_files=True,
+                    manage_messages=True
+                )
 
-    async def generate_mobile_friendly_transcript(self, messages_data, ticket_info, guild, channel):
-        """Generate mobile-friendly text transcript"""
+        try:
+            ticket_channel = await guild.create_text_channel(
+                ticket_channel_name, 
+                category=category, 
+                overwrites=overwrites,
+                topic=f"Ticket #{ticket_id} | Created by {interaction.user} | Type: {self.button_name}"
+            )
+        except discord.Forbidden:
+            await interaction.response.send_message("❌ I don't have permission to create channels!", ephemeral=True)
+            return
+
+        ticket_info = {
+            "channel_id": ticket_channel.id,
+            "creator_id": interaction.user.id,
+            "button_name": self.button_name,
+            "ticket_number": ticket_counter,
+            "created_at": datetime.datetime.utcnow().isoformat(),
+            "closed": False,
+            "reopened": "No",
+            "reason": self.reason.value,
+            "added_users": [],
+            "claimed_by": None,
+            "priority": "medium",
+            "notes": [],
+            "tags": [],
+            "status": "open"
+        }
+        async with ticket_store.transaction(self.guild_id) as transaction:
+            transaction.put(ticket_id, ticket_info, event="created")
+        # The channel is indexed before its first message, so the live journal starts complete
+        track_ticket_channel(self.guild_id, ticket_id, ticket_channel.id)
+        transcript_live_tickets[transcript_key(self.guild_id, ticket_id)] = True
+
+        embed_color = await get_embed_color_async(self.guild_id)
+        embed = discord.Embed(
+            title=f"{ANIMATED_EMOJIS['ticket']} New Support Ticket",
+            color=embed_color
+        )
+        embed.set_author(
+            name=f"{interaction.user.display_name} ({interaction.user})", 
+            icon_url=interaction.user.avatar.url if interaction.user.avatar else interaction.user.default_avatar.url
+        )
+        if interaction.user.avatar:
+            embed.set_thumbnail(url=interaction.user.avatar.url)
         
-        # Get creator info
-        creator_id = ticket_info.get('creator_id')
-        creator = guild.get_member(creator_id) if creator_id else None
+        embed.add_field(name=f"{ANIMATED_EMOJIS['usermanage']} Created by", value=f"{interaction.user.mention}", inline=True)
+        embed.add_field(name=f"{ANIMATED_EMOJIS['label']} Type", value=f"`{self.button_name}`", inline=True)
+        embed.add_field(name=f"{ANIMATED_EMOJIS['tickets']} Ticket ID", value=f"`{ticket_id}`", inline=True)
+        embed.add_field(name=f"{ANIMATED_EMOJIS['file']} Reason", value=f"```{self.reason.value}```", inline=False)
+        embed.add_field(name=f"{ANIMATED_EMOJIS['zap']} Priority", value="`Medium`", inline=True)
+        embed.add_field(name=f"{ANIMATED_EMOJIS['stats']} Status", value="`Open`", inline=True)
+        embed.set_footer(text=f"Ticket #{ticket_counter} • Created at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+        # Get custom welcome message or use default
+        welcome_msg = config.get("welcome_message", 
+            f"**Welcome {interaction.user.mention}!** {ANIMATED_EMOJIS['wave']}\n\n"
+            "Thank you for creating a ticket. Our support team will be with you shortly.\n"
+            "Please provide any additional details about your issue while you wait."
+        )
+
+        view = TicketControlView(ticket_id, self.guild_id)
+        await ticket_channel.send(welcome_msg, embed=embed, view=view)
         
-        text = f"""
-╔══════════════════════════════════════════════════════════════════════════════════╗
-║                            DISCORD TICKET TRANSCRIPT                             ║
-╚══════════════════════════════════════════════════════════════════════════════════╝
+        # Send confirmation
+        await interaction.response.send_message(
+            f"✅ Ticket created successfully! {ticket_channel.mention}", 
+            ephemeral=True
+        )
+
+        # Log ticket creation
+        log_channel = guild.get_channel(config["log_channel_id"])
+        if log_channel:
+            log_embed = discord.Embed(
+                title=f"{ANIMATED_EMOJIS['ticket']} New Ticket Created",
+                color=embed_color
+            )
+            log_embed.add_field(name="User", value=interaction.user.mention, inline=True)
+            log_embed.add_field(name="Channel", value=ticket_channel.mention, inline=True)
+            log_embed.add_field(name="ID", value=f"`{ticket_id}`", inline=True)
+            log_embed.add_field(name="Type", value=f"`{self.button_name}`", inline=True)
+            await log_channel.send(embed=log_embed)
+
+# ===== ENHANCED TICKET CONTROL VIEWS =====
+
+class TicketControlView(discord.ui.View):
+    def __init__(self, ticket_id: int, guild_id: str):
+        super().__init__(timeout=None)
+        self.ticket_id = ticket_id
+        self.guild_id = guild_id
+        self.add_item(CloseTicketButton(ticket_id, guild_id))
+        self.add_item(ClaimTicketButton(ticket_id, guild_id))
+        self.add_item(TranscriptButton(ticket_id, guild_id))
+        self.add_item(RenameTicketButton(ticket_id, guild_id))
+
+class CloseTicketButton(discord.ui.Button):
+    def __init__(self, ticket_id: int, guild_id: str):
+        super().__init__(
+            label="Close Ticket",
+            style=discord.ButtonStyle.danger,
+            emoji=ANIMATED_EMOJIS['lock'],
+            custom_id=f"close_ticket_{guild_id}_{ticket_id}"
+        )
+        self.ticket_id = ticket_id
+        self.guild_id = guild_id
+
+    async def callback(self, interaction: discord.Interaction):
+        config = await load_guild_config_async(self.guild_id)
+        if not config:
+            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
+            return
+
+        ticket_data = await get_guild_ticket_async(self.guild_id, self.ticket_id)
+
+        if not ticket_data:
+            await interaction.response.send_message("Ticket data not found.", ephemeral=True)
+            return
+
+        is_staff = any(role.id in config["staff_role_ids"] for role in interaction.user.roles)
+        is_creator = interaction.user.id == ticket_data["creator_id"]
+        is_claimer = ticket_data.get("claimed_by") == interaction.user.id
+
+        if not (is_staff or is_creator or is_claimer):
+            await interaction.response.send_message("❌ You do not have permission to close this ticket.", ephemeral=True)
+            return
+
+        view = ConfirmCloseView(self.ticket_id, self.guild_id)
+        embed = discord.Embed(
+            title="⚠️ Confirm Ticket Closure",
+            description="Are you sure you want to close this ticket?\n\n**This action will:**\n• Archive all messages\n• Send logs to staff\n• Delete the channel after 10 seconds",
+            color=discord.Color.orange()
+        )
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+class ClaimTicketButton(discord.ui.Button):
+    def __init__(self, ticket_id: int, guild_id: str):
+        super().__init__(
+            label="Claim",
+            style=discord.ButtonStyle.success,
+            emoji=ANIMATED_EMOJIS['wave'],
+            custom_id=f"claim_ticket_{guild_id}_{ticket_id}"
+        )
+        self.ticket_id = ticket_id
+        self.guild_id = guild_id
+
+    async def callback(self, interaction: discord.Interaction):
+        config = await load_guild_config_async(self.guild_id)
+        if not config:
+            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
+            return
+
+        is_staff = any(role.id in config["staff_role_ids"] for role in interaction.user.roles)
+        if not is_staff:
+            await interaction.response.send_message("❌ Only staff members can claim tickets.", ephemeral=True)
+            return
 
-🎫 Ticket ID: #{self.ticket_id}
-🏢 Server: {guild.name}
-📍 Channel: #{channel.name}
-👤 Created By: {creator.display_name if creator else 'Unknown User'}
-🏷️ Type: {ticket_info.get('button_name', 'Unknown')}
-⚡ Priority: {ticket_info.get('priority', 'medium').title()}
-📊 Status: {ticket_info.get('status', 'open').title()}
-📝 Total Messages: {len(messages_data)}
-🕐 Generated: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}
+        # Toggle claim/unclaim in one read-modify-write so simultaneous clicks cannot both claim
+        async with ticket_store.transaction(self.guild_id) as transaction:
+            ticket_data = await transaction.get(self.ticket_id)
+            claimed_by = ticket_data.get("claimed_by") if ticket_data else None
+            if ticket_data and claimed_by == interaction.user.id:
+                ticket_data["claimed_by"] = None
+                ticket_data.pop("claimed_at", None)
+                transaction.put(self.ticket_id, ticket_data, event="unclaimed")
+            elif ticket_data and not claimed_by:
+                ticket_data["claimed_by"] = interaction.user.id
+                ticket_data["claimed_at"] = datetime.datetime.utcnow().isoformat()
+                transaction.put(self.ticket_id, ticket_data, event="claimed")
 
-{'='*80}
-MESSAGE HISTORY
-{'='*80}
+        if not ticket_data:
+            await interaction.response.send_message("Ticket data not found.", ephemeral=True)
+            return
 
-"""
-        
-        for i, msg_data in enumerate(messages_data, 1):
-            author = msg_data['author']
-            timestamp = msg_data['timestamp'].strftime('%m/%d/%Y %I:%M %p')
-            
-            text += f"\n[{i:03d}] {timestamp}\n"
-            text += f"👤 {author['display_name']}"
-            if author['bot']:
-                text += " [BOT]"
-            text += f" (ID: {author['id']})\n"
-            
-            if msg_data['content']:
-                # Clean up content for mobile viewing
-                content = msg_data['content'].replace('```', '---').replace('`', '"')
-                text += f"💬 {content}\n"
+        if claimed_by == interaction.user.id:
+            # Unclaimed
+            embed_color = await get_embed_color_async(self.guild_id)
+            embed = discord.Embed(
+                title="🔓 Ticket Unclaimed",
+                description=f"This ticket has been unclaimed by {interaction.user.mention}",
+                color=embed_color
+            )
+            await interaction.response.send_message(embed=embed)
             
-            # Add embed information
-            for embed in msg_data['embeds']:
-                if embed['title']:
-                    text += f"📄 EMBED: {embed['title']}\n"
-                if embed['description']:
-                    desc = embed['description'][:200] + "..." if len(embed['description']) > 200 else embed['description']
-                    text += f"   📝 {desc}\n"
+            # Update button label
+            self.label = "Claim"
+            self.style = discord.ButtonStyle.success
+            await interaction.edit_original_response(view=self.view)
             
-            # Add attachment information
-            for attachment in msg_data['attachments']:
-                size_mb = attachment['size'] / (1024 * 1024)
-                text += f"📎 ATTACHMENT: {attachment['filename']} ({size_mb:.2f} MB)\n"
-                text += f"   🔗 {attachment['url']}\n"
+        elif claimed_by:
+            claimer = interaction.guild.get_member(claimed_by)
+            claimer_name = claimer.display_name if claimer else "Unknown"
+            await interaction.response.send_message(f"❌ This ticket is already claimed by {claimer_name}.", ephemeral=True)
+            return
+        else:
+            # Claimed
+            embed_color = await get_embed_color_async(self.guild_id)
+            embed = discord.Embed(
+                title="🎯 Ticket Claimed",
+                description=f"This ticket has been claimed by {interaction.user.mention}",
+                color=embed_color
+            )
+            await interaction.response.send_message(embed=embed)
             
-            text += "-" * 40 + "\n"
-        
-        text += f"\n{'='*80}\n"
-        text += f"END OF TRANSCRIPT • Generated by Enhanced Ticket Bot\n"
-        text += f"{'='*80}"
+            # Update button label
+            self.label = "Unclaim"
+            self.style = discord.ButtonStyle.secondary
+            await interaction.edit_original_response(view=self.view)
+
+class TranscriptButton(discord.ui.Button):
+    def __init__(self, ticket_id: int, guild_id: str):
+        super().__init__(
+            label="Transcript",
+            style=discord.ButtonStyle.secondary,
+            emoji=ANIMATED_EMOJIS['file'],
+            custom_id=f"transcript_{guild_id}_{ticket_id}"
+        )
+        self.ticket_id = ticket_id
+        self.guild_id = guild_id
+
+    async def callback(self, interaction: discord.Interaction):
+        config = await load_guild_config_async(self.guild_id)
+        if not config:
+            await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
+            return
+
+        is_staff = any(role.id in config["staff_role_ids"] for role in interaction.user.roles)
+        if not is_staff:
+            await interaction.response.send_message("❌ Only staff members can generate transcripts.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+
+        # Build from the live message journal instead of crawling the channel
+        messages_data, _ = await capture_ticket_history(self.guild_id, self.ticket_id, interaction.channel)
+
+        # Add ticket metadata
+        ticket_info = await get_guild_ticket_async(self.guild_id, self.ticket_id) or {}
+
+        # Render the Discord-styled HTML and the mobile-friendly text version into the cache
+        context = transcript_context(self.ticket_id, ticket_info, interaction.guild, interaction.channel, len(messages_data))
+        (html_filename, text_filename), _ = await render_transcript_cache(self.guild_id, self.ticket_id, context, messages_data)
+
+        # Upload the files once, to the log channel; the staff member gets links to that copy
+        config = await load_guild_config_async(self.guild_id)
+        attachments = []
+        if config and config.get("log_channel_id"):
+            log_channel = interaction.guild.get_channel(config["log_channel_id"])
+            if log_channel:
+                try:
+                    log_embed = discord.Embed(
+                        title="<a:file:1401629622973759650> Transcript Generated",
+                        description=f"Transcript for Ticket #{self.ticket_id}",
+                        color=discord.Color.blue()
+                    )
+                    log_embed.add_field(name="Generated by", value=interaction.user.mention, inline=True)
+                    log_embed.add_field(name="Channel", value=interaction.channel.mention, inline=True)
+                    log_embed.add_field(name="Messages", value=str(len(messages_data)), inline=True)
+                    
+                    # Always send both HTML and TXT to log channel
+                    attachments = await send_transcript_files(
+                        log_channel,
+                        [html_filename, text_filename],
+                        interaction.guild.filesize_limit,
+                        embed=log_embed
+                    )
+                except discord.HTTPException:
+                    # Send a message if files are too large for log channel
+                    await log_channel.send(
+                        embed=log_embed.add_field(name="Note", value="Files too large for Discord - check transcripts directory", inline=False)
+                    )
+                except Exception as e:
+                    print(f"Failed to send transcript to log channel: {e}")
+
+        # Check if transcripts should be sent to users
+        send_to_user = config.get("send_transcript_to_user", True)
         
-        return text
+        if send_to_user:
+            html_size, text_size = await run_storage_io(lambda: (os.path.getsize(html_filename), os.path.getsize(text_filename)))
+
+            # Send both HTML and text versions with user guidance
+            embed = discord.Embed(
+                title="<a:file:1401629622973759650> Transcript Generated Successfully",
+                description="Choose your preferred format:",
+                color=discord.Color.green()
+            )
+            embed.add_field(
+                name="<a:laptop:1401636098098073720> Desktop Users",
+                value="Download the HTML file for the best viewing experience with Discord styling",
+                inline=False
+            )
+            embed.add_field(
+                name="<a:mobile:1401636122282426529> Mobile Users", 
+                value="Use the TXT file for easier mobile viewing and copying",
+                inline=False
+            )
+            embed.add_field(
+                name="<a:stats:1401587832526602240> Stats",
+                value=f"**Messages:** {len(messages_data)}\n**File Size:** HTML (~{html_size//1024}KB), TXT (~{text_size//1024}KB)",
+                inline=False
+            )
+            
+            try:
+                if attachments:
+                    await interaction.followup.send(embed=embed, view=transcript_link_view(attachments), ephemeral=True)
+                else:
+                    await send_transcript_files(
+                        interaction.followup,
+                        [html_filename, text_filename],
+                        interaction.guild.filesize_limit,
+                        embed=embed,
+                        ephemeral=True
+                    )
+            except discord.HTTPException:
+                # Fallback if files are too large
+                await interaction.followup.send(
+                    "<a:file:1401629622973759650> Transcript generated but files are too large to send directly. Check the transcripts directory.",
+                    ephemeral=True
+                )
+        else:
+            # Just confirm generation without sending files to user
+            await interaction.followup.send(
+                "<a:file:1401629622973759650> Transcript generated successfully and sent to log channel.",
+                ephemeral=True
+            )
 
 class RenameTicketButton(discord.ui.Button):
     def __init__(self, ticket_id: int, guild_id: str):
@@ -1949,7 +3950,7 @@ class RenameTicketButton(discord.ui.Button):
         self.guild_id = guild_id
 
     async def callback(self, interaction: discord.Interaction):
-        config = load_guild_config(self.guild_id)
+        config = await load_guild_config_async(self.guild_id)
         if not config:
             await interaction.response.send_message("❌ Server not configured!", ephemeral=True)
             return
@@ -2010,10 +4011,9 @@ class ConfirmButton(discord.ui.Button):
         self.guild_id = guild_id
 
     async def callback(self, interaction: discord.Interaction):
-        config = load_guild_config(self.guild_id)
+        config = await load_guild_config_async(self.guild_id)
         guild = interaction.guild
-        tickets_data = load_guild_tickets(self.guild_id)
-        ticket_info = tickets_data.get(str(self.ticket_id))
+        ticket_info = await get_guild_ticket_async(self.guild_id, self.ticket_id)
 
         if not ticket_info:
             await interaction.response.send_message("❌ Ticket data not found.", ephemeral=True)
@@ -2026,23 +4026,25 @@ class ConfirmButton(discord.ui.Button):
 
         await interaction.response.defer()
 
-        # Get all messages from the ticket channel
-        messages = []
-        async for msg in channel.history(limit=None, oldest_first=True):
-            timestamp = msg.created_at.strftime("%Y-%m-%d %H:%M:%S UTC")
-            author_info = f"{msg.author.id}|{msg.author.name}|{msg.author.display_name}"
-            
-            if msg.content:
-                messages.append(f"[{timestamp}] {author_info}: {msg.content}")
-            
-            for embed in msg.embeds:
-                if embed.title:
-                    messages.append(f"[{timestamp}] {author_info} sent embed: {embed.title}")
-            
-            for attachment in msg.attachments:
-                messages.append(f"[{timestamp}] {author_info} sent attachment: {attachment.filename} ({attachment.url})")
+        # Bring the message journal up to date (fetching only a gap, if any) and seal it into
+        # the ticket's canonical transcript; the log, HTML and TXT all render from its records
+        messages_data, _ = await capture_ticket_history(self.guild_id, self.ticket_id, channel)
+        context = transcript_context(self.ticket_id, ticket_info, guild, channel, len(messages_data))
+        messages_data = await seal_ticket_transcript(self.guild_id, self.ticket_id, channel.id, context)
+        context['message_count'] = len(messages_data)
 
         closed_at = datetime.datetime.utcnow().isoformat()
+
+        # Create the logs directory for this guild
+        await run_storage_io(os.makedirs, f"logs/{self.guild_id}", exist_ok=True)
+        log_filename = f"logs/{self.guild_id}/ticket_{self.ticket_id}_{int(time.time())}.txt"
+
+        # Write the HTML and TXT transcripts (archiving attachments and avatars before the
+        # channel and its CDN links go away) and the plain-text log in one pass
+        (html_filename, text_filename), (log_line_count,) = await render_transcript_cache(
+            self.guild_id, self.ticket_id, context, messages_data,
+            extra_outputs=[(log_filename, "", iter_log_message, None)]
+        )
         
         # Create comprehensive summary
         summary = f"""
@@ -2057,7 +4059,7 @@ Type: {ticket_info['button_name']}
 Priority: {ticket_info.get('priority', 'Medium').title()}
 Status: Closed
 Reopened: {ticket_info['reopened']}
-Total messages: {len(messages)}
+Total messages: {log_line_count}
 Notes count: {len(ticket_info.get('notes', []))}
 Added users: {len(ticket_info.get('added_users', []))}
 Created at: {ticket_info['created_at']}
@@ -2065,80 +4067,15 @@ Closed at: {closed_at}
 Duration: {self.calculate_duration(ticket_info['created_at'], closed_at)}
 {'='*50}
 """
-        
-        log_content = "\n".join(messages) + "\n" + summary
-
-        # Create logs directory for this guild
-        os.makedirs(f"logs/{self.guild_id}", exist_ok=True)
-        log_filename = f"logs/{self.guild_id}/ticket_{self.ticket_id}_{int(time.time())}.txt"
-        with open(log_filename, "w", encoding="utf-8") as f:
-            f.write(log_content)
-
-        # Generate HTML and TXT transcripts for closing
-        messages_data = []
-        async for msg in channel.history(limit=None, oldest_first=True):
-            # Get user avatar
-            avatar_url = msg.author.avatar.url if msg.author.avatar else msg.author.default_avatar.url
-            
-            message_data = {
-                'id': msg.id,
-                'author': {
-                    'id': msg.author.id,
-                    'username': msg.author.name,
-                    'display_name': msg.author.display_name,
-                    'avatar_url': avatar_url,
-                    'bot': msg.author.bot
-                },
-                'content': msg.content,
-                'timestamp': msg.created_at,
-                'embeds': [],
-                'attachments': []
-            }
-            
-            # Process embeds
-            for embed in msg.embeds:
-                embed_data = {
-                    'title': embed.title,
-                    'description': embed.description,
-                    'color': embed.color.value if embed.color else None,
-                    'fields': [{'name': field.name, 'value': field.value, 'inline': field.inline} for field in embed.fields],
-                    'footer': embed.footer.text if embed.footer else None,
-                    'thumbnail': embed.thumbnail.url if embed.thumbnail else None,
-                    'image': embed.image.url if embed.image else None
-                }
-                message_data['embeds'].append(embed_data)
-            
-            # Process attachments
-            for attachment in msg.attachments:
-                attachment_data = {
-                    'filename': attachment.filename,
-                    'url': attachment.url,
-                    'size': attachment.size
-                }
-                message_data['attachments'].append(attachment_data)
-            
-            messages_data.append(message_data)
 
-        # Create HTML transcript
-        from main import TranscriptButton
-        transcript_button = TranscriptButton(self.ticket_id, self.guild_id)
-        html_content = await transcript_button.generate_discord_html_transcript(messages_data, ticket_info, guild, channel)
-        text_content = await transcript_button.generate_mobile_friendly_transcript(messages_data, ticket_info, guild, channel)
-        
-        # Create transcript files
-        os.makedirs(f"transcripts/{self.guild_id}", exist_ok=True)
-        html_filename = f"transcripts/{self.guild_id}/transcript_{self.ticket_id}_{int(time.time())}_close.html"
-        text_filename = f"transcripts/{self.guild_id}/transcript_{self.ticket_id}_{int(time.time())}_close.txt"
-        
-        with open(html_filename, "w", encoding="utf-8") as f:
-            f.write(html_content)
-        with open(text_filename, "w", encoding="utf-8") as f:
-            f.write(text_content)
+        # The summary closes the log once every message line has been written
+        await run_storage_io(append_text_file, log_filename, summary)
 
-        # Send comprehensive log to log channel
+        # Send comprehensive log to log channel; the DM links to these attachments
+        attachments = []
         log_channel = guild.get_channel(config["log_channel_id"])
         if log_channel:
-            embed_color = get_embed_color(self.guild_id)
+            embed_color = await get_embed_color_async(self.guild_id)
             embed = discord.Embed(
                 title=f"🔒 Ticket Closed - #{self.ticket_id}",
                 description=f"Ticket closed by {interaction.user.mention}",
@@ -2153,7 +4090,7 @@ Duration: {self.calculate_duration(ticket_info['created_at'], closed_at)}
             embed.add_field(name="⚡ Priority", value=ticket_info.get('priority', 'Medium').title(), inline=True)
             embed.add_field(name="🎯 Claimed by", value=claimer.mention if claimer else "None", inline=True)
             embed.add_field(name="🔄 Reopened", value=ticket_info['reopened'], inline=True)
-            embed.add_field(name="📊 Messages", value=str(len(messages)), inline=True)
+            embed.add_field(name="📊 Messages", value=str(log_line_count), inline=True)
             embed.add_field(name="⏱️ Duration", value=self.calculate_duration(ticket_info['created_at'], closed_at), inline=True)
             embed.add_field(name="📝 Notes", value=str(len(ticket_info.get('notes', []))), inline=True)
             embed.add_field(name="👥 Added Users", value=str(len(ticket_info.get('added_users', []))), inline=True)
@@ -2161,17 +4098,15 @@ Duration: {self.calculate_duration(ticket_info['created_at'], closed_at)}
             embed.set_footer(text=f"Closed at {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S UTC')}")
 
             try:
-                # Send both HTML and TXT transcripts to log channel
-                await log_channel.send(
-                    embed=embed, 
-                    files=[discord.File(html_filename), discord.File(text_filename), discord.File(log_filename)]
+                # Send the HTML and TXT transcripts and the log, compressed or split if they are too large
+                attachments = await send_transcript_files(
+                    log_channel,
+                    [html_filename, text_filename, log_filename],
+                    guild.filesize_limit,
+                    embed=embed
                 )
             except discord.HTTPException:
-                # Fallback if files are too large
-                try:
-                    await log_channel.send(embed=embed, file=discord.File(log_filename))
-                except:
-                    await log_channel.send(embed=embed)
+                await log_channel.send(embed=embed)
 
         # Send transcript to user if enabled
         if config.get("send_transcript_to_user", True) and creator:
@@ -2183,33 +4118,45 @@ Duration: {self.calculate_duration(ticket_info['created_at'], closed_at)}
                 )
                 dm_embed.add_field(name="🏷️ Type", value=ticket_info['button_name'], inline=True)
                 dm_embed.add_field(name="⏱️ Duration", value=self.calculate_duration(ticket_info['created_at'], closed_at), inline=True)
-                dm_embed.add_field(name="📊 Messages", value=str(len(messages)), inline=True)
+                dm_embed.add_field(name="📊 Messages", value=str(log_line_count), inline=True)
                 dm_embed.add_field(
                     name="📄 Transcript Files",
                     value="Choose your preferred format:\n💻 **HTML** - Best for desktop viewing\n📱 **TXT** - Mobile-friendly format",
                     inline=False
                 )
                 
-                await creator.send(
-                    embed=dm_embed,
-                    files=[discord.File(html_filename), discord.File(text_filename)]
-                )
+                transcript_attachments = [
+                    attachment for attachment in attachments
+                    if attachment.filename in (os.path.basename(html_filename), os.path.basename(text_filename))
+                ]
+                if transcript_attachments:
+                    await creator.send(embed=dm_embed, view=transcript_link_view(transcript_attachments))
+                else:
+                    await send_transcript_files(
+                        creator,
+                        [html_filename, text_filename],
+                        discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES,
+                        embed=dm_embed
+                    )
             except discord.Forbidden:
                 # User has DMs disabled
                 pass
             except Exception as e:
                 print(f"Failed to send DM to user: {e}")
 
+        await run_storage_io(compress_transcript_files, [log_filename])
+
         # Update ticket data
-        ticket_info["closed"] = True
-        ticket_info["closed_at"] = closed_at
-        ticket_info["closed_by"] = interaction.user.id
-        ticket_info["status"] = "closed"
-        tickets_data[str(self.ticket_id)] = ticket_info
-        save_guild_tickets(self.guild_id, tickets_data)
+        async with ticket_store.transaction(self.guild_id) as transaction:
+            ticket_info = await transaction.get(self.ticket_id) or ticket_info
+            ticket_info["closed"] = True
+            ticket_info["closed_at"] = closed_at
+            ticket_info["closed_by"] = interaction.user.id
+            ticket_info["status"] = "closed"
+            transaction.put(self.ticket_id, ticket_info, event="closed")
 
         # Send closure message
-        embed_color = get_embed_color(self.guild_id)
+        embed_color = await get_embed_color_async(self.guild_id)
         closure_embed = discord.Embed(
             title="🔒 Ticket Closing",
             description=f"This ticket has been closed by {interaction.user.mention}.\n\nThe channel will be deleted in **10 seconds**.",
@@ -2217,7 +4164,7 @@ Duration: {self.calculate_duration(ticket_info['created_at'], closed_at)}
         )
         closure_embed.add_field(
             name="📊 Summary", 
-            value=f"**Duration:** {self.calculate_duration(ticket_info['created_at'], closed_at)}\n**Messages:** {len(messages)}\n**Notes:** {len(ticket_info.get('notes', []))}", 
+            value=f"**Duration:** {self.calculate_duration(ticket_info['created_at'], closed_at)}\n**Messages:** {log_line_count}\n**Notes:** {len(ticket_info.get('notes', []))}", 
             inline=False
         )
         
@@ -2230,6 +4177,7 @@ Duration: {self.calculate_duration(ticket_info['created_at'], closed_at)}
             await channel.delete()
         except:
             pass
+        forget_ticket_channel(self.guild_id, self.ticket_id, channel.id)
 
     def calculate_duration(self, start_time, end_time):
         """Calculate duration between start and end time"""
@@ -2333,7 +4281,7 @@ async def on_command_error(ctx, error):
         )
         
         # Check if it's a guild configuration issue
-        if not is_guild_configured(str(ctx.guild.id)):
+        if not await is_guild_configured_async(str(ctx.guild.id)):
             embed.add_field(
                 name="⚙️ Server Not Configured",
                 value="An administrator needs to run `-setup` first!",
@@ -2362,6 +4310,10 @@ async def on_command_error(ctx, error):
 
 @bot.event
 async def on_ready():
+    # A new gateway session may have missed message events, so every journal needs a gap check
+    transcript_live_tickets.clear()
+    ticket_channels.clear()
+
     print(f"🎫 {bot.user} is now online!")
     print(f"📊 Connected to {len(bot.guilds)} servers")
     
@@ -2379,41 +4331,35 @@ async def on_ready():
 
     # Register persistent views for all configured guilds
     try:
-        configs_dir = "configs"
-        if os.path.exists(configs_dir):
-            total_views = 0
-            total_panels = 0
-            for config_file in os.listdir(configs_dir):
-                if config_file.endswith('.json'):
-                    guild_id = config_file[:-5]  # Remove .json extension
-
-                    # Register ticket control views for open tickets
-                    tickets_data = load_guild_tickets(guild_id)
-                    for ticket_id, ticket_info in tickets_data.items():
-                        if not ticket_info.get("closed", False):
-                            bot.add_view(TicketControlView(int(ticket_id), guild_id))
-                            total_views += 1
-
-                    # Register ticket panel views
-                    panels_data = load_guild_panels(guild_id)
-                    for panel_id, panel_info in panels_data.items():
-                        try:
-                            guild = bot.get_guild(int(guild_id))
-                            if guild:
-                                channel = guild.get_channel(panel_info["channel_id"])
-                                if channel:
-                                    # Try to get the message to ensure it still exists
-                                    try:
-                                        message = await channel.fetch_message(int(panel_id))
-                                        if message:
-                                            bot.add_view(TicketPanelView(panel_info["button_names"], guild_id))
-                                            total_panels += 1
-                                    except discord.NotFound:
-                                        # Message was deleted, remove from saved data
-                                        del panels_data[panel_id]
-                                        save_guild_panels(guild_id, panels_data)
-                        except Exception as panel_error:
-                            print(f"❌ Error restoring panel {panel_id}: {panel_error}")
+        total_views = 0
+        total_panels = 0
+        for guild_id in await list_configured_guilds_async():
+            # Register ticket control views for open tickets
+            for ticket_id, ticket_info in (await list_open_guild_tickets_async(guild_id)).items():
+                bot.add_view(TicketControlView(int(ticket_id), guild_id))
+                track_ticket_channel(guild_id, ticket_id, ticket_info["channel_id"])
+                total_views += 1
+
+            # Register ticket panel views
+            panels_data = await load_guild_panels_async(guild_id)
+            for panel_id, panel_info in list(panels_data.items()):
+                try:
+                    guild = bot.get_guild(int(guild_id))
+                    if guild:
+                        channel = guild.get_channel(panel_info["channel_id"])
+                        if channel:
+                            # Try to get the message to ensure it still exists
+                            try:
+                                message = await channel.fetch_message(int(panel_id))
+                                if message:
+                                    bot.add_view(TicketPanelView(panel_info["button_names"], guild_id))
+                                    total_panels += 1
+                            except discord.NotFound:
+                                # Message was deleted, remove from saved data
+                                del panels_data[panel_id]
+                                await save_guild_panels_async(guild_id, panels_data)
+                except Exception as panel_error:
+                    print(f"❌ Error restoring panel {panel_id}: {panel_error}")
 
         print(f"✅ Loaded {total_views} persistent views")
         print(f"✅ Restored {total_panels} ticket panels")
@@ -2423,31 +4369,79 @@ async def on_ready():
     # Start auto-close task if enabled
     auto_close_task.start()
 
+    if STORAGE_FLUSH_INTERVAL > 0 and not storage_flush_task.is_running():
+        storage_flush_task.start()
+    if not ticket_archive_task.is_running():
+        ticket_archive_task.start()
+
+@bot.event
+async def on_message(message):
+    # Journal ticket messages as they arrive so transcripts never crawl the channel.
+    # The write runs beside command dispatch; per-ticket locks keep journal order.
+    if message.channel.id in ticket_channels:
+        entry = transcript_journal_entry(capture_message(message))
+        task = asyncio.create_task(journal_ticket_events(message.channel.id, [entry], new_message=True))
+        transcript_journal_tasks[task] = True
+        task.add_done_callback(lambda done: transcript_journal_tasks.pop(done, None))
+    await bot.process_commands(message)
+
+@bot.event
+async def on_raw_message_edit(payload):
+    # Raw events also cover messages sent before the bot's message cache was filled
+    if payload.channel_id in ticket_channels:
+        entry = transcript_journal_entry(capture_message(payload.message))
+        await journal_ticket_events(payload.channel_id, [entry])
+
+@bot.event
+async def on_raw_message_delete(payload):
+    await journal_ticket_events(payload.channel_id, [{'id': payload.message_id, 'deleted': True}])
+
+@bot.event
+async def on_raw_bulk_message_delete(payload):
+    if payload.channel_id in ticket_channels:
+        entries = [{'id': message_id, 'deleted': True} for message_id in payload.message_ids]
+        await journal_ticket_events(payload.channel_id, entries)
+
+@bot.event
+async def on_guild_channel_delete(channel):
+    # Ticket channels deleted by hand stop being journaled too
+    key = ticket_channels.get(channel.id)
+    if key:
+        forget_ticket_channel(*key, channel.id)
+
+@tasks.loop(seconds=STORAGE_FLUSH_INTERVAL or 1.0)
+async def storage_flush_task():
+    """Write ticket changes held back by write-behind storage"""
+    try:
+        await run_storage_io(storage.flush)
+    except Exception as e:
+        print(f"Error flushing storage: {e}")
+
+@tasks.loop(hours=6)
+async def ticket_archive_task():
+    """Move old closed tickets out of the live ticket files"""
+    try:
+        for guild_id in await run_storage_io(storage.list_guilds, "tickets"):
+            archived = await archive_closed_guild_tickets_async(guild_id)
+            if archived:
+                print(f"🗃️ Archived {archived} closed tickets for guild {guild_id}")
+    except Exception as e:
+        print(f"Error in ticket archive task: {e}")
+
 @tasks.loop(hours=1)
 async def auto_close_task():
     """Auto-close tickets after configured time"""
     try:
-        configs_dir = "configs"
-        if not os.path.exists(configs_dir):
-            return
-            
-        for config_file in os.listdir(configs_dir):
-            if not config_file.endswith('.json'):
-                continue
-                
-            guild_id = config_file[:-5]
-            config = load_guild_config(guild_id)
+        for guild_id in await list_configured_guilds_async():
+            config = await load_guild_config_async(guild_id)
             
             if not config or not config.get("auto_close_hours", 0):
                 continue
                 
             auto_close_hours = config["auto_close_hours"]
-            tickets_data = load_guild_tickets(guild_id)
             
-            for ticket_id, ticket_info in tickets_data.items():
-                if ticket_info.get("closed", False):
-                    continue
-                    
+            open_tickets = await list_open_guild_tickets_async(guild_id)
+            for ticket_id, ticket_info in open_tickets.items():
                 # Check if ticket is old enough to auto-close
                 created_at = datetime.datetime.fromisoformat(ticket_info["created_at"])
                 now = datetime.datetime.utcnow()
@@ -2472,16 +4466,28 @@ async def auto_close_task():
                     try:
                         await channel.send(embed=embed)
                         await asyncio.sleep(5)
+
+                        # Seal the message journal and keep a ticket log, like a manual close
+                        await capture_ticket_history(guild_id, ticket_id, channel)
+                        context = transcript_context(ticket_id, ticket_info, guild, channel, 0)
+                        messages_data = await seal_ticket_transcript(guild_id, ticket_id, channel.id, context)
+                        await run_storage_io(os.makedirs, f"logs/{guild_id}", exist_ok=True)
+                        log_filename = f"logs/{guild_id}/ticket_{ticket_id}_{int(time.time())}.txt"
+                        await render_transcript_files(messages_data, [(log_filename, "", iter_log_message, None)])
+                        await run_storage_io(index_ticket_messages, guild_id, ticket_id, ticket_info, messages_data)
+                        await run_storage_io(compress_transcript_files, [log_filename])
                         
                         # Update ticket data
-                        ticket_info["closed"] = True
-                        ticket_info["closed_at"] = datetime.datetime.utcnow().isoformat()
-                        ticket_info["closed_by"] = bot.user.id
-                        ticket_info["auto_closed"] = True
-                        tickets_data[ticket_id] = ticket_info
-                        save_guild_tickets(guild_id, tickets_data)
+                        async with ticket_store.transaction(guild_id) as transaction:
+                            ticket_info = await transaction.get(ticket_id) or ticket_info
+                            ticket_info["closed"] = True
+                            ticket_info["closed_at"] = datetime.datetime.utcnow().isoformat()
+                            ticket_info["closed_by"] = bot.user.id
+                            ticket_info["auto_closed"] = True
+                            transaction.put(ticket_id, ticket_info, event="closed")
                         
                         await channel.delete()
+                        forget_ticket_channel(guild_id, ticket_id, channel.id)
                     except:
                         continue
                         
@@ -2494,7 +4500,7 @@ def guild_configured_check():
     """Check if the guild is configured"""
     async def predicate(ctx):
         guild_id = str(ctx.guild.id)
-        if not is_guild_configured(guild_id):
+        if not await is_guild_configured_async(guild_id):
             embed = discord.Embed(
                 title="❌ Server Not Configured",
                 description="This server needs to be set up first!\n\nAn administrator must run: `-setup <category_id> <log_channel_id> <staff_role_id>`",
@@ -2513,7 +4519,7 @@ def guild_configured_check():
 async def is_ticket_channel(ctx):
     """Check if the current channel is a ticket channel"""
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
+    config = await load_guild_config_async(guild_id)
     if not config:
         return False
 
@@ -2525,7 +4531,7 @@ def is_staff_member():
     """Check if user has any of the configured staff roles"""
     async def predicate(ctx):
         guild_id = str(ctx.guild.id)
-        config = load_guild_config(guild_id)
+        config = await load_guild_config_async(guild_id)
         if not config:
             return False
         staff_role_ids = config.get("staff_role_ids", [])
@@ -2635,7 +4641,7 @@ async def setup(ctx, category_id: int = None, log_channel_id: int = None, *staff
         "version": "6.0-enhanced"
     }
 
-    save_guild_config(guild_id, config_data)
+    await save_guild_config_async(guild_id, config_data)
 
     embed = discord.Embed(
         title="✅ Bot Setup Complete",
@@ -2667,14 +4673,14 @@ async def config(ctx, setting: str = None, *, value: str = None):
     Settings: auto_close_hours, max_tickets_per_user, welcome_message
     """
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
+    config = await load_guild_config_async(guild_id)
     
     if not setting:
         # Display current configuration
         embed = discord.Embed(
             title="⚙️ Server Configuration",
             description=f"Configuration for **{ctx.guild.name}**",
-            color=get_embed_color(guild_id)
+            color=await get_embed_color_async(guild_id)
         )
         
         category = ctx.guild.get_channel(config["ticket_category_id"])
@@ -2715,7 +4721,7 @@ async def config(ctx, setting: str = None, *, value: str = None):
             if hours < 0:
                 raise ValueError
             config["auto_close_hours"] = hours
-            save_guild_config(guild_id, config)
+            await save_guild_config_async(guild_id, config)
             await ctx.send(f"✅ Auto-close set to {hours} hours {'(disabled)' if hours == 0 else ''}")
         except ValueError:
             await ctx.send("❌ Please provide a valid number of hours (0 or positive integer)")
@@ -2726,18 +4732,18 @@ async def config(ctx, setting: str = None, *, value: str = None):
             if max_tickets < 1 or max_tickets > 10:
                 raise ValueError
             config["max_tickets_per_user"] = max_tickets
-            save_guild_config(guild_id, config)
+            await save_guild_config_async(guild_id, config)
             await ctx.send(f"✅ Maximum tickets per user set to {max_tickets}")
         except ValueError:
             await ctx.send("❌ Please provide a number between 1 and 10")
     
     elif setting == "welcome_message":
         config["welcome_message"] = value
-        save_guild_config(guild_id, config)
+        await save_guild_config_async(guild_id, config)
         embed = discord.Embed(
             title="✅ Welcome Message Updated",
             description="New welcome message:",
-            color=get_embed_color(guild_id)
+            color=await get_embed_color_async(guild_id)
         )
         embed.add_field(name="Message", value=f"```{value}```", inline=False)
         embed.add_field(name="💡 Tip", value="Use `{user}` to mention the ticket creator", inline=False)
@@ -2753,7 +4759,7 @@ async def config(ctx, setting: str = None, *, value: str = None):
         else:
             await ctx.send("❌ Please use `true` or `false` for this setting")
             return
-        save_guild_config(guild_id, config)
+        await save_guild_config_async(guild_id, config)
     
     else:
         await ctx.send(f"❌ Unknown setting: `{setting}`\nAvailable: `auto_close_hours`, `max_tickets_per_user`, `welcome_message`, `send_transcript_to_user`")
@@ -2773,7 +4779,7 @@ async def panel(ctx, channel: discord.TextChannel = None, button1: str = None, b
     guild_id = str(ctx.guild.id)
     button_names = [name for name in (button1, button2, button3, button4, button5) if name]
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title=f"{ANIMATED_EMOJIS['ticket']} Create Support Ticket",
         description="Need help? Click one of the buttons below to create a support ticket.\n\n**Choose the category that best describes your issue:**",
@@ -2813,14 +4819,14 @@ async def panel(ctx, channel: discord.TextChannel = None, button1: str = None, b
     panel_message = await channel.send(embed=embed, view=view)
 
     # Save panel data for persistence
-    panels_data = load_guild_panels(guild_id)
+    panels_data = await load_guild_panels_async(guild_id)
     panels_data[str(panel_message.id)] = {
         "channel_id": channel.id,
         "button_names": button_names,
         "created_by": ctx.author.id,
         "created_at": datetime.datetime.utcnow().isoformat()
     }
-    save_guild_panels(guild_id, panels_data)
+    await save_guild_panels_async(guild_id, panels_data)
 
     success_embed = discord.Embed(
         title="✅ Ticket Panel Created",
@@ -2848,20 +4854,12 @@ async def close(ctx, *, reason: str = None):
     This command can only be used within a ticket channel.
     """
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    config = await load_guild_config_async(guild_id)
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
     is_staff = any(role.id in config["staff_role_ids"] for role in ctx.author.roles)
     is_creator = ctx.author.id == ticket_info["creator_id"]
 
@@ -2871,9 +4869,10 @@ async def close(ctx, *, reason: str = None):
 
     # Add close reason if provided
     if reason:
-        ticket_info["close_reason"] = reason
-        tickets_data[ticket_id] = ticket_info
-        save_guild_tickets(guild_id, tickets_data)
+        async with ticket_store.transaction(guild_id) as transaction:
+            ticket_info = await transaction.get(ticket_id) or ticket_info
+            ticket_info["close_reason"] = reason
+            transaction.put(ticket_id, ticket_info, event="close_reason_set")
 
     view = ConfirmCloseView(int(ticket_id), guild_id)
     embed = discord.Embed(
@@ -2913,24 +4912,17 @@ async def set(ctx, level: str = None):
         return
 
     guild_id = str(ctx.guild.id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
-    ticket_info["priority"] = level.lower()
-    tickets_data[ticket_id] = ticket_info
-    save_guild_tickets(guild_id, tickets_data)
+    async with ticket_store.transaction(guild_id) as transaction:
+        ticket_info = await transaction.get(ticket_id) or ticket_info
+        ticket_info["priority"] = level.lower()
+        transaction.put(ticket_id, ticket_info, event="priority_set")
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="✅ Priority Updated",
         description=f"Ticket priority set to `{level.title()}` by {ctx.author.mention}",
@@ -2948,22 +4940,14 @@ async def show(ctx):
     This command can only be used within a ticket channel by staff members.
     """
     guild_id = str(ctx.guild.id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
     priority_level = ticket_info.get("priority", "medium").title()
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="🎫 Ticket Priority",
         description=f"The current priority for this ticket is: `{priority_level}`",
@@ -2997,27 +4981,20 @@ async def add(ctx, *, content: str = None):
         return
 
     guild_id = str(ctx.guild.id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
-    notes = ticket_info.get("notes", [])
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    notes.append({"author": ctx.author.id, "content": content, "timestamp": timestamp})
-    ticket_info["notes"] = notes
-    tickets_data[ticket_id] = ticket_info
-    save_guild_tickets(guild_id, tickets_data)
-
-    embed_color = get_embed_color(guild_id)
+    async with ticket_store.transaction(guild_id) as transaction:
+        ticket_info = await transaction.get(ticket_id) or ticket_info
+        notes = ticket_info.get("notes", [])
+        notes.append({"author": ctx.author.id, "content": content, "timestamp": timestamp})
+        ticket_info["notes"] = notes
+        transaction.put(ticket_id, ticket_info, event="note_added")
+
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="📝 Note Added",
         description=f"A new note has been added to this ticket by {ctx.author.mention}",
@@ -3036,25 +5013,17 @@ async def view(ctx):
     This command can only be used within a ticket channel by staff members.
     """
     guild_id = str(ctx.guild.id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
     notes = ticket_info.get("notes", [])
     if not notes:
         await ctx.send("❌ No notes found for this ticket.")
         return
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="📝 Ticket Notes",
         description=f"Last {min(10, len(notes))} notes for this ticket",
@@ -3097,15 +5066,15 @@ async def transcripttoggle(ctx):
     This command can only be used by administrators.
     """
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
+    config = await load_guild_config_async(guild_id)
     
     current_setting = config.get("send_transcript_to_user", True)
     new_setting = not current_setting
     
     config["send_transcript_to_user"] = new_setting
-    save_guild_config(guild_id, config)
+    await save_guild_config_async(guild_id, config)
     
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="📄 Transcript Setting Updated",
         description=f"Transcript sending to users is now {'**enabled**' if new_setting else '**disabled**'}",
@@ -3129,16 +5098,16 @@ async def transcripttoggle(ctx):
     await ctx.send(embed=embed)
     return
     guild_id = str(ctx.guild.id)
-    blacklist = load_guild_blacklist(guild_id)
+    blacklist = await load_guild_blacklist_async(guild_id)
 
     if user.id in blacklist:
         await ctx.send(f"❌ {user.mention} is already blacklisted.")
         return
 
     blacklist.append(user.id)
-    save_guild_blacklist(guild_id, blacklist)
+    await save_guild_blacklist_async(guild_id, blacklist)
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="🚫 User Blacklisted",
         description=f"{user.mention} has been blacklisted from creating tickets.",
@@ -3161,16 +5130,16 @@ async def unblacklist(ctx, user: discord.Member = None):
         return
 
     guild_id = str(ctx.guild.id)
-    blacklist = load_guild_blacklist(guild_id)
+    blacklist = await load_guild_blacklist_async(guild_id)
 
     if user.id not in blacklist:
         await ctx.send(f"❌ {user.mention} is not blacklisted.")
         return
 
     blacklist.remove(user.id)
-    save_guild_blacklist(guild_id, blacklist)
+    await save_guild_blacklist_async(guild_id, blacklist)
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="✅ User Unblacklisted",
         description=f"{user.mention} has been removed from the blacklist.",
@@ -3188,23 +5157,23 @@ async def ticketstats(ctx):
     This command can only be used by staff members.
     """
     guild_id = str(ctx.guild.id)
-    tickets_data = load_guild_tickets(guild_id)
+    ticket_stats = await get_guild_ticket_stats_async(guild_id)
 
-    if not tickets_data:
+    if not ticket_stats["total"]:
         await ctx.send("📊 No ticket data found for this server.")
         return
 
-    total_tickets = len(tickets_data)
-    open_tickets = sum(1 for ticket in tickets_data.values() if not ticket.get("closed", False))
-    closed_tickets = total_tickets - open_tickets
-    claimed_tickets = sum(1 for ticket in tickets_data.values() if ticket.get("claimed_by"))
+    total_tickets = ticket_stats["total"]
+    open_tickets = ticket_stats["open"]
+    closed_tickets = ticket_stats["closed"]
+    claimed_tickets = ticket_stats["claimed"]
 
     # Priority breakdown
-    high_priority = sum(1 for ticket in tickets_data.values() if ticket.get("priority") == "high" and not ticket.get("closed", False))
-    medium_priority = sum(1 for ticket in tickets_data.values() if ticket.get("priority") == "medium" and not ticket.get("closed", False))
-    low_priority = sum(1 for ticket in tickets_data.values() if ticket.get("priority") == "low" and not ticket.get("closed", False))
+    high_priority = ticket_stats["priority"]["high"]
+    medium_priority = ticket_stats["priority"]["medium"]
+    low_priority = ticket_stats["priority"]["low"]
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="📊 Ticket Statistics",
         description=f"Statistics for **{ctx.guild.name}**",
@@ -3220,7 +5189,7 @@ async def ticketstats(ctx):
     embed.add_field(name="🟢 Low Priority", value=f"```{low_priority}```", inline=True)
 
     # Blacklist count
-    blacklist = load_guild_blacklist(guild_id)
+    blacklist = await load_guild_blacklist_async(guild_id)
     embed.add_field(name="🚫 Blacklisted Users", value=f"```{len(blacklist)}```", inline=True)
 
     embed.set_footer(text=f"Requested by {ctx.author}", icon_url=ctx.author.avatar.url if ctx.author.avatar else None)
@@ -3255,9 +5224,9 @@ async def setcolor(ctx, hex_color: str = None):
         return
 
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
+    config = await load_guild_config_async(guild_id)
     config["embed_color"] = [r, g, b]
-    save_guild_config(guild_id, config)
+    await save_guild_config_async(guild_id, config)
 
     embed = discord.Embed(
         title="🎨 Color Updated",
@@ -3282,11 +5251,11 @@ async def welcome(ctx, *, message: str = None):
         return
 
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
+    config = await load_guild_config_async(guild_id)
     config["welcome_message"] = message
-    save_guild_config(guild_id, config)
+    await save_guild_config_async(guild_id, config)
 
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="💬 Welcome Message Updated",
         description="Custom welcome message has been set for new tickets!",
@@ -3309,20 +5278,12 @@ async def add(ctx, user: discord.Member = None):
         return
 
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    config = await load_guild_config_async(guild_id)
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
     is_staff = any(role.id in config["staff_role_ids"] for role in ctx.author.roles)
     is_creator = ctx.author.id == ticket_info["creator_id"]
     is_claimer = ticket_info.get("claimed_by") == ctx.author.id
@@ -3345,12 +5306,15 @@ async def add(ctx, user: discord.Member = None):
             attach_files=True
         )
 
-        added_users.append(user.id)
-        ticket_info["added_users"] = added_users
-        tickets_data[ticket_id] = ticket_info
-        save_guild_tickets(guild_id, tickets_data)
+        async with ticket_store.transaction(guild_id) as transaction:
+            ticket_info = await transaction.get(ticket_id) or ticket_info
+            added_users = ticket_info.get("added_users", [])
+            if user.id not in added_users:
+                added_users.append(user.id)
+            ticket_info["added_users"] = added_users
+            transaction.put(ticket_id, ticket_info, event="user_added")
 
-        embed_color = get_embed_color(guild_id)
+        embed_color = await get_embed_color_async(guild_id)
         embed = discord.Embed(
             title="✅ User Added to Ticket",
             description=f"{user.mention} has been added to this ticket by {ctx.author.mention}",
@@ -3382,20 +5346,12 @@ async def remove(ctx, user: discord.Member = None):
         return
 
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
-    tickets_data = load_guild_tickets(guild_id)
-
-    ticket_id = None
-    for tid, data in tickets_data.items():
-        if data["channel_id"] == ctx.channel.id:
-            ticket_id = tid
-            break
-
+    config = await load_guild_config_async(guild_id)
+    ticket_id, ticket_info = await get_ticket_by_channel_async(guild_id, ctx.channel.id)
     if not ticket_id:
         await ctx.send("❌ Could not find ticket information for this channel.")
         return
 
-    ticket_info = tickets_data[ticket_id]
     is_staff = any(role.id in config["staff_role_ids"] for role in ctx.author.roles)
     is_creator = ctx.author.id == ticket_info["creator_id"]
 
@@ -3416,12 +5372,15 @@ async def remove(ctx, user: discord.Member = None):
     try:
         await ctx.channel.set_permissions(user, overwrite=None)
 
-        added_users.remove(user.id)
-        ticket_info["added_users"] = added_users
-        tickets_data[ticket_id] = ticket_info
-        save_guild_tickets(guild_id, tickets_data)
+        async with ticket_store.transaction(guild_id) as transaction:
+            ticket_info = await transaction.get(ticket_id) or ticket_info
+            added_users = ticket_info.get("added_users", [])
+            if user.id in added_users:
+                added_users.remove(user.id)
+            ticket_info["added_users"] = added_users
+            transaction.put(ticket_id, ticket_info, event="user_removed")
 
-        embed_color = get_embed_color(guild_id)
+        embed_color = await get_embed_color_async(guild_id)
         embed = discord.Embed(
             title="🚫 User Removed from Ticket",
             description=f"{user.mention} has been removed from this ticket by {ctx.author.mention}",
@@ -3448,14 +5407,13 @@ async def reopen(ctx, ticket_id: str):
         return
 
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
-    tickets_data = load_guild_tickets(guild_id)
+    config = await load_guild_config_async(guild_id)
+    ticket_info = await get_guild_ticket_async(guild_id, ticket_id)
 
-    if ticket_id not in tickets_data:
+    if not ticket_info:
         await ctx.send(f"❌ No ticket found with ID {ticket_id}.")
         return
 
-    ticket_info = tickets_data[ticket_id]
 
     if not ticket_info.get("closed", False):
         await ctx.send(f"❌ Ticket #{ticket_id} is already open.")
@@ -3503,15 +5461,17 @@ async def reopen(ctx, ticket_id: str):
         overwrites=overwrites
     )
 
-    ticket_info["closed"] = False
-    ticket_info["reopened"] = "Yes"
-    ticket_info["channel_id"] = new_channel.id
-    ticket_info["reopened_at"] = datetime.datetime.utcnow().isoformat()
-    ticket_info["reopened_by"] = ctx.author.id
-    tickets_data[ticket_id] = ticket_info
-    save_guild_tickets(guild_id, tickets_data)
-
-    embed_color = get_embed_color(guild_id)
+    async with ticket_store.transaction(guild_id) as transaction:
+        ticket_info = await transaction.get(ticket_id) or ticket_info
+        ticket_info["closed"] = False
+        ticket_info["reopened"] = "Yes"
+        ticket_info["channel_id"] = new_channel.id
+        ticket_info["reopened_at"] = datetime.datetime.utcnow().isoformat()
+        ticket_info["reopened_by"] = ctx.author.id
+        transaction.put(ticket_id, ticket_info, event="reopened")
+    track_ticket_channel(guild_id, ticket_id, new_channel.id)
+
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="__**Reopened Support Ticket**__",
         color=embed_color
@@ -3532,7 +5492,8 @@ async def reopen(ctx, ticket_id: str):
 
     # Recreate message history using webhooks
     log_file_path = f"logs/{guild_id}/ticket_{ticket_id}.txt"
-    if os.path.exists(log_file_path):
+    log_content = await run_storage_io(read_text_file, log_file_path)
+    if log_content is not None:
         restore_embed = discord.Embed(
             title="📜 Recreating Previous Messages",
             description="Please wait while we restore the message history...",
@@ -3541,9 +5502,6 @@ async def reopen(ctx, ticket_id: str):
         status_msg = await new_channel.send(embed=restore_embed)
 
         try:
-            with open(log_file_path, "r", encoding="utf-8") as f:
-                log_content = f.read()
-
             # Parse messages from log file
             messages_data = []
             for line in log_content.split('\n'):
@@ -3597,6 +5555,77 @@ async def reopen(ctx, ticket_id: str):
         except:
             await new_channel.send(f"📧 Unable to DM {creator.mention}. Please notify them about this reopened ticket.")
 
+@bot.command()
+@guild_configured_check()
+@is_staff_member()
+async def transcript(ctx, ticket_id: str = None):
+    """
+    Sends the HTML and TXT transcripts of a ticket, rendering them on demand.
+    Usage: -transcript 1234
+    This command can only be used by staff members.
+    """
+    if not ticket_id:
+        await ctx.send("❌ Please provide a ticket ID. Example: `-transcript 1234`")
+        return
+
+    guild_id = str(ctx.guild.id)
+    ticket_info = await get_guild_ticket_async(guild_id, ticket_id)
+
+    if not ticket_info:
+        await ctx.send(f"❌ No ticket found with ID {ticket_id}.")
+        return
+
+    async with ctx.typing():
+        channel = None if ticket_info.get("closed", False) else ctx.guild.get_channel(ticket_info.get("channel_id"))
+        if channel:
+            # Open ticket: render from its live message journal
+            messages_data, _ = await capture_ticket_history(guild_id, ticket_id, channel)
+            context = transcript_context(ticket_id, ticket_info, ctx.guild, channel, len(messages_data))
+            paths, _ = await render_transcript_cache(guild_id, ticket_id, context, messages_data)
+        else:
+            # Closed ticket: reuse the cached render or redo it from the canonical transcript
+            paths = await cached_transcript_files(guild_id, ticket_id)
+
+    if not paths:
+        await ctx.send(f"❌ No stored transcript found for ticket #{ticket_id}.")
+        return
+
+    embed = discord.Embed(
+        title=f"{ANIMATED_EMOJIS['file']} Transcript - Ticket #{ticket_id}",
+        description="💻 **HTML** - Best for desktop viewing\n📱 **TXT** - Mobile-friendly format",
+        color=await get_embed_color_async(guild_id)
+    )
+    try:
+        await send_transcript_files(ctx, list(paths), ctx.guild.filesize_limit, embed=embed)
+    except discord.HTTPException:
+        await ctx.send("❌ The transcript could not be uploaded. Check the transcripts directory.")
+
+@bot.command()
+@guild_configured_check()
+@is_staff_member()
+async def search(ctx, *, query: str = None):
+    """
+    Searches the messages of all indexed tickets.
+    Usage: -search <words> [user:@member] [type:<ticket type>] [before:YYYY-MM-DD] [after:YYYY-MM-DD]
+    This command can only be used by staff members.
+    """
+    if not query:
+        await ctx.send("❌ Please provide something to search for. Example: `-search refund user:@Member after:2024-01-01`")
+        return
+
+    try:
+        words, filters = parse_search_query(query)
+    except ValueError:
+        await ctx.send("❌ Dates must look like `before:2024-12-31` or `after:2024-01-01`.")
+        return
+    if not words and not filters:
+        await ctx.send("❌ Please provide words or filters to search for.")
+        return
+
+    guild_id = str(ctx.guild.id)
+    view = SearchResultsView(ctx.author.id, guild_id, words, filters, await get_embed_color_async(guild_id))
+    await ctx.send(embed=await view.build_embed(), view=view)
+
 @bot.command()
 @guild_configured_check()
 @commands.has_permissions(administrator=True)
@@ -3607,15 +5636,15 @@ async def toggletranscriptt(ctx):
     This command can only be used by administrators.
     """
     guild_id = str(ctx.guild.id)
-    config = load_guild_config(guild_id)
+    config = await load_guild_config_async(guild_id)
     
     current_setting = config.get("send_transcript_to_user", True)
     new_setting = not current_setting
     
     config["send_transcript_to_user"] = new_setting
-    save_guild_config(guild_id, config)
+    await save_guild_config_async(guild_id, config)
     
-    embed_color = get_embed_color(guild_id)
+    embed_color = await get_embed_color_async(guild_id)
     embed = discord.Embed(
         title="📄 Transcript Setting Updated",
         description=f"Transcript sending to users is now {'**enabled**' if new_setting else '**disabled**'}",
@@ -3648,7 +5677,7 @@ async def ping(ctx):
             f"**⏱️ Latency:** {latency}ms\n"
             f"**📡 Status:** Online and responsive!\n"
             f"**🏢 Guild:** {ctx.guild.name}\n"
-            f"**⚙️ Configured:** {'✅ Yes' if is_guild_configured(str(ctx.guild.id)) else '❌ No'}"
+            f"**⚙️ Configured:** {'✅ Yes' if await is_guild_configured_async(str(ctx.guild.id)) else '❌ No'}"
         ),
         color=discord.Color.green()
     )
@@ -3667,12 +5696,12 @@ async def stats(ctx):
     
     # Add guild-specific stats
     guild_id = str(ctx.guild.id)
-    tickets_data = load_guild_tickets(guild_id)
-    blacklist = load_guild_blacklist(guild_id)
+    ticket_stats = await get_guild_ticket_stats_async(guild_id)
+    blacklist = await load_guild_blacklist_async(guild_id)
     
     embed.add_field(
         name="🎫 Server Tickets",
-        value=f"```Total: {len(tickets_data)}\nOpen: {sum(1 for t in tickets_data.values() if not t.get('closed', False))}\nClosed: {sum(1 for t in tickets_data.values() if t.get('closed', False))}```",
+        value=f"```Total: {ticket_stats['total']}\nOpen: {ticket_stats['open']}\nClosed: {ticket_stats['closed']}```",
         inline=True
     )
     embed.add_field(
@@ -3689,7 +5718,7 @@ async def help(ctx, command_name: str = None):
     Display help information for commands.
     Usage: -help [command_name]
     """
-    embed_color = get_embed_color(str(ctx.guild.id)) if ctx.guild and is_guild_configured(str(ctx.guild.id)) else discord.Color.blue()
+    embed_color = await get_embed_color_async(str(ctx.guild.id)) if ctx.guild and await is_guild_configured_async(str(ctx.guild.id)) else discord.Color.blue()
 
     if command_name == "setup":
         embed = discord.Embed(
@@ -3724,7 +5753,7 @@ async def help(ctx, command_name: str = None):
             color=embed_color
         )
 
-        if not ctx.guild or not is_guild_configured(str(ctx.guild.id)):
+        if not ctx.guild or not await is_guild_configured_async(str(ctx.guild.id)):
             embed.add_field(
                 name="⚠️ Setup Required",
                 value="This server needs to be configured first!\nRun `-help setup` for instructions.",
@@ -3751,7 +5780,7 @@ async def help(ctx, command_name: str = None):
 
         embed.add_field(
             name=f"{ANIMATED_EMOJIS['stats']} Statistics & Tools",
-            value="• `-ticketstats` - Server statistics\n• `-reopen <id>` - Reopen closed ticket\n• `-transcript` - Generate transcript\n• `-ping` - Check bot status\n• `-help` - Show this menu",
+            value="• `-ticketstats` - Server statistics\n• `-reopen <id>` - Reopen closed ticket\n• `-transcript <id>` - Send a ticket's transcript\n• `-search <words>` - Search ticket messages\n• `-ping` - Check bot status\n• `-help` - Show this menu",
             inline=False
         )
 
@@ -3908,6 +5937,17 @@ Would you like me to implement any of these features?
 
 # Run the bot
 if __name__ == "__main__":
+    # python ticket.py migrate <source> <target>  e.g. "migrate json sqlite" or "migrate sqlite json" to export
+    if len(sys.argv) == 4 and sys.argv[1] == "migrate":
+        migrate_storage(create_storage_backend(sys.argv[2]), create_storage_backend(sys.argv[3]))
+        print(f"✅ Copied all guild data from {sys.argv[2]} to {sys.argv[3]} storage")
+        exit(0)
+
+    # python ticket.py reindex  -- rebuild the -search index from stored transcripts and logs
+    if len(sys.argv) == 2 and sys.argv[1] == "reindex":
+        print(f"✅ Indexed {rebuild_search_index()} tickets")
+        exit(0)
+
     if not TOKEN:
         print("❌ ERROR: DISCORD_BOT_TOKEN environment variable not set!")
         print("Please set your Discord bot token in the Secrets tab.")